@@ -0,0 +1,119 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from core.local_cache import LocalTTLCache
+
+User = get_user_model()
+
+TOKEN_AUTH_USER_FIELDS = ('id', 'is_active', 'is_staff', 'is_superuser')
+
+_local_tokens = LocalTTLCache(
+    max_size=settings.TOKEN_AUTH_LOCAL_CACHE_SIZE,
+    ttl=settings.TOKEN_AUTH_LOCAL_CACHE_TTL,
+)
+
+
+def _get_cache_key(key):
+    """Ключ кеша по хешу токена, сам токен в кеш не попадает."""
+    return f'auth:token:v2:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+def _get_shared_cache():
+    alias = settings.TOKEN_AUTH_SHARED_CACHE_ALIAS
+    return caches[alias] if alias else None
+
+
+def _get_user_field_names():
+    """
+    Поля пользователя, которые кешируются вместе с токеном:
+    только нужные для аутентификации и проверки прав, в порядке
+    полей модели. Остальные поля, включая хеш пароля и счетчики,
+    отложены и читаются из БД при первом обращении, поэтому
+    устаревшие значения из кеша не попадают в save().
+    """
+    return tuple(
+        field.attname for field in User._meta.concrete_fields
+        if field.attname in TOKEN_AUTH_USER_FIELDS
+    )
+
+
+def invalidate_cached_token(key):
+    """Удаляем токен из локального и общего кешей."""
+    cache_key = _get_cache_key(key)
+    _local_tokens.delete(cache_key)
+    shared = _get_shared_cache()
+    if shared is not None:
+        shared.delete(cache_key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Аутентификация по токену с кешированием. Токен и поля
+    пользователя ищутся в кеше процесса с ограниченным размером
+    и временем жизни, затем в общем кеше, и только при промахе -
+    в БД. На каждый запрос из кеша собираются новые экземпляры
+    моделей, у пользователя загружены только поля прав. Запись
+    удаляется при выходе из системы, удалении токена и любом
+    сохранении пользователя; в других процессах она живет не
+    дольше TOKEN_AUTH_LOCAL_CACHE_TTL секунд.
+    """
+
+    def get_cached_values(self, key):
+        """Ищем токен сначала в локальном, затем в общем кеше."""
+        cache_key = _get_cache_key(key)
+        values = _local_tokens.get(cache_key)
+        if values is not None:
+            return values
+        shared = _get_shared_cache()
+        if shared is not None:
+            values = shared.get(cache_key)
+            if values is not None:
+                _local_tokens.set(cache_key, values)
+        return values
+
+    def get_values_from_db(self, key):
+        """Получаем токен с пользователем из БД и кешируем их."""
+        try:
+            token = Token.objects.select_related('user').get(key=key)
+        except Token.DoesNotExist:
+            raise AuthenticationFailed('Недействительный токен.')
+        if not token.user.is_active:
+            raise AuthenticationFailed('Пользователь неактивен или удален.')
+        values = (
+            token.created,
+            tuple(
+                getattr(token.user, field_name)
+                for field_name in _get_user_field_names()
+            ),
+        )
+        cache_key = _get_cache_key(key)
+        _local_tokens.set(cache_key, values)
+        shared = _get_shared_cache()
+        if shared is not None:
+            shared.set(
+                cache_key, values,
+                timeout=settings.TOKEN_AUTH_SHARED_CACHE_TTL,
+            )
+        return values
+
+    def authenticate_credentials(self, key):
+        values = self.get_cached_values(key)
+        if values is None:
+            values = self.get_values_from_db(key)
+        created, user_values = values
+        user = User.from_db(
+            User.objects.db, _get_user_field_names(), user_values
+        )
+        token = Token.from_db(
+            Token.objects.db,
+            ('key', 'user_id', 'created'),
+            (key, user.pk, created),
+        )
+        token.user = user
+        return user, token
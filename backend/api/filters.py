@@ -1,8 +1,10 @@
 from django.contrib.auth import get_user_model
-from django.db.models import Q
 from django_filters.rest_framework import FilterSet, filters
+from rest_framework.filters import OrderingFilter
 
 from core.filters import get_queryset_filter
+from core.ingredient_search import search_ingredients
+from core.recipe_search import search_recipes
 from recipes.models import Ingredient, Recipe, Tag
 
 User = get_user_model()
@@ -13,7 +15,6 @@ class IngredientFilter(FilterSet):
     Кастомный фильтр для ингредиентов.
     Фильтрация производится сначала по точному вхождению начала названия,
     затем по вхождению любой подстроки в названии.
-
     """
 
     name = filters.CharFilter(method='ingredient_name_filter')
@@ -24,18 +25,18 @@ class IngredientFilter(FilterSet):
 
     def ingredient_name_filter(self, queryset, name, value):
         """
-        Осуществляет поиск сначала по вхождению в имя ингредиента,
-        а затем происходит фильтрация по вхождению в любом месте.
+        Осуществляет поиск по вхождению в имя ингредиента.
+        Совпадения по началу названия выводятся первыми,
+        за ними - совпадения в любом месте.
         """
-        return queryset.filter(
-            Q(name__startswith=value) | Q(name__contains=value)
-        )
+        return search_ingredients(queryset, value)
 
 
 class RecipeFilter(FilterSet):
     """
     Кастомный фильтр для рецептов.
-    Доступна фильтрация по избранному, автору, списку покупок и тегам.
+    Доступна фильтрация по избранному, автору, списку покупок и тегам
+    и полнотекстовый поиск по названию и описанию.
     """
 
     is_favorited = filters.BooleanFilter(method='is_favorited_filter')
@@ -47,6 +48,7 @@ class RecipeFilter(FilterSet):
         to_field_name='slug',
         queryset=Tag.objects.all(),
     )
+    search = filters.CharFilter(method='search_filter')
 
     class Meta:
         model = Recipe
@@ -73,3 +75,28 @@ class RecipeFilter(FilterSet):
             value=value,
             relation='in_shopping_cart__user'
         )
+
+    def search_filter(self, queryset, name, value):
+        """
+        Осуществляем полнотекстовый поиск. Результаты
+        сортируются по релевантности.
+        """
+        return search_recipes(queryset, value)
+
+
+class RecipeOrderingFilter(OrderingFilter):
+    """
+    Сортировка рецептов по параметру ordering с добавлением id
+    в том же направлении: у многих рецептов счетчики равны, и без
+    уникального поля порядок страниц по номеру не определен.
+    Индексы счетчиков заканчиваются на id и покрывают такую
+    сортировку. Для пагинации по курсору этого недостаточно:
+    курсор должен хранить значения всех полей, это делает
+    FoodgramCursorPagination.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering or ordering[-1].lstrip('-') in ('id', 'pk'):
+            return ordering
+        return (*ordering, '-id' if ordering[-1].startswith('-') else 'id')
@@ -0,0 +1,20 @@
+from django.http import HttpResponse
+from rest_framework.decorators import api_view, permission_classes
+
+from api.permissions import CanReadMetrics
+from core.metrics import registry
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+@api_view(('GET',))
+@permission_classes((CanReadMetrics,))
+def metrics_view(request):
+    """
+    Веб-сервис метрик процесса в текстовом формате Prometheus.
+    Доступен администратору и по METRICS_TOKEN, анонимно -
+    только при METRICS_PUBLIC.
+    """
+    return HttpResponse(
+        registry.render(), content_type=PROMETHEUS_CONTENT_TYPE
+    )
@@ -0,0 +1,170 @@
+from hashlib import md5
+
+from django.conf import settings
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date, quote_etag
+from rest_framework.filters import OrderingFilter
+from rest_framework.response import Response
+
+from core.async_views import async_view
+from core.catalog_cache import ingredients_catalog, tags_catalog
+from core.servises import (get_recipe_version, get_recipes_version,
+                           get_user_relations_version)
+
+
+class CatalogCacheMixin:
+    """
+    Миксин для вьюсетов справочников. Отдает list и retrieve
+    из версионированного кеша справочника, выставляет ETag и
+    Last-Modified по версии и отвечает 304 без обращения к БД,
+    если у клиента актуальная копия.
+    """
+
+    catalog = None
+
+    def get_catalog_response(self, request, handler, *args, **kwargs):
+        version = self.catalog.get_version()
+        etag = quote_etag(f'{self.catalog.name}-{version}')
+        last_modified = int(version)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            key = request.get_full_path()
+            data = self.catalog.get(key, version)
+            if data is None:
+                response = handler(request, *args, **kwargs)
+                if response.status_code == 200:
+                    self.catalog.set(key, response.data, version)
+            else:
+                response = Response(data)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(
+            response, public=True, max_age=settings.HTTP_CACHE_MAX_AGE
+        )
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.get_catalog_response(
+            request, super().list, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_catalog_response(
+            request, super().retrieve, *args, **kwargs
+        )
+
+
+class ConditionalRecipeMixin:
+    """
+    Миксин условных GET для рецептов. ETag собирается из версии
+    данных без сериализации: для списка - из количества и времени
+    последнего изменения рецептов выборки, для рецепта - из его
+    updated_at и флагов юзера, плюс версии справочников тегов и
+    ингредиентов. Ответ юзеру дополнительно зависит от версии его
+    избранного, корзины и подписок. При совпадении ETag отдаем 304
+    без сериализации. Анонимные ответы общие и кешируются nginx,
+    ответы юзеру приватные и перепроверяются при каждом запросе.
+    Счетчики из unversioned_ordering_fields меняются без
+    updated_at и в версию не входят, поэтому список с сортировкой
+    по ним отдается без ETag и не кешируется.
+    """
+
+    unversioned_ordering_fields = ()
+
+    def has_unversioned_ordering(self, request):
+        """Проверяем, сортируется ли список по полю вне версии."""
+        ordering = request.query_params.get(OrderingFilter.ordering_param, '')
+        return any(
+            field.strip().lstrip('-') in self.unversioned_ordering_fields
+            for field in ordering.split(',')
+        )
+
+    def get_conditional_recipe_response(
+        self, request, handler, version, last_modified, *args, **kwargs
+    ):
+        etag = quote_etag(md5(repr((
+            request.get_full_path(),
+            version,
+            tags_catalog.get_version(),
+            ingredients_catalog.get_version(),
+        )).encode()).hexdigest())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        if request.user.is_authenticated:
+            patch_cache_control(response, private=True, no_cache=True)
+        else:
+            patch_cache_control(
+                response, public=True, max_age=settings.HTTP_CACHE_MAX_AGE
+            )
+        patch_vary_headers(response, ('Authorization',))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        if self.has_unversioned_ordering(request):
+            response = super().list(request, *args, **kwargs)
+            patch_cache_control(response, no_cache=True, no_store=True)
+            patch_vary_headers(response, ('Authorization',))
+            return response
+        version = get_recipes_version(
+            self.filter_queryset(self.get_queryset())
+        )
+        if request.user.is_authenticated:
+            version += get_user_relations_version(request.user)
+        return self.get_conditional_recipe_response(
+            request, super().list, version, None, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Last-Modified отдаем только анонимам: у ответа юзеру
+        флаги меняются без изменения рецепта.
+        """
+        try:
+            version = get_recipe_version(
+                self.get_queryset(), kwargs[self.lookup_field]
+            )
+        except (TypeError, ValueError):
+            version = None
+        if version is None:
+            return super().retrieve(request, *args, **kwargs)
+        last_modified = None
+        if not request.user.is_authenticated:
+            last_modified = int(max(
+                version[0].timestamp(),
+                tags_catalog.get_version(),
+                ingredients_catalog.get_version(),
+            ))
+        return self.get_conditional_recipe_response(
+            request, super().retrieve, version, last_modified,
+            *args, **kwargs
+        )
+
+
+class AsyncActionsMixin:
+    """
+    Миксин для вьюсетов с асинхронными маршрутами. Если включен
+    ASYNC_VIEWS, маршруты, в которых есть действия из
+    async_actions, отдаются роутеру асинхронными представлениями.
+    """
+
+    async_actions = ()
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        if settings.ASYNC_VIEWS and set(actions.values()) & set(
+            cls.async_actions
+        ):
+            return async_view(view)
+        return view
@@ -1,4 +1,166 @@
+import binascii
+import json
+from base64 import b64decode, b64encode
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
 from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.utils.urls import replace_query_param
+
+from core.constants import CURSOR_PAGINATION_PAGE_SIZE
+
+
+def is_unique_field(model, ordering_field):
+    """Проверяем, уникально ли поле сортировки в модели."""
+    name = ordering_field.lstrip('-')
+    if name == 'pk':
+        return True
+    try:
+        return model._meta.get_field(name).unique
+    except FieldDoesNotExist:
+        return False
+
+
+def reverse_ordering_field(ordering_field):
+    """Меняем направление поля сортировки на обратное."""
+    if ordering_field.startswith('-'):
+        return ordering_field[1:]
+    return f'-{ordering_field}'
+
+
+def get_ordering_value(instance, ordering_field):
+    """Получаем значение поля сортировки, в том числе через связи."""
+    value = instance
+    for name in ordering_field.lstrip('-').split('__'):
+        value = getattr(value, name)
+    return value
+
+
+def encode_position_value(value):
+    """
+    Приводим значение поля к JSON. Даты и время передаются
+    в ISO 8601 с микросекундами, чтобы условие по ним было точным.
+    """
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def get_keyset_filter(ordering, position):
+    """
+    Собираем условие "после position" для сортировки ordering:
+    (f1 > v1) OR (f1 = v1 AND f2 > v2) OR ... с учетом
+    направления каждого поля.
+    """
+    condition, equal = Q(), Q()
+    for field, value in zip(ordering, position):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+class FoodgramCursorPagination(pagination.CursorPagination):
+    """
+    Пагинация по курсору (keyset) для глубокого пролистывания
+    лент. Курсор хранит значения всех полей сортировки крайнего
+    объекта страницы, страница выбирается условием по кортежу
+    этих полей вместо OFFSET, количество объектов не считается.
+    Сортировка берется из queryset, а если она не задана - из
+    Meta модели. Если последнее поле сортировки не уникально,
+    в конец добавляется id в том же направлении: иначе объекты
+    с равными значениями повторялись бы или терялись между
+    страницами.
+    """
+
+    page_size = CURSOR_PAGINATION_PAGE_SIZE
+    page_size_query_param = "limit"
+
+    def get_ordering(self, request, queryset, view):
+        ordering = tuple(
+            queryset.query.order_by or queryset.model._meta.ordering
+        )
+        if ordering and is_unique_field(queryset.model, ordering[-1]):
+            return ordering
+        if ordering and ordering[-1].startswith('-'):
+            return (*ordering, '-id')
+        return (*ordering, 'id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        reverse, position = self.decode_cursor(request) or (False, None)
+        self.position = position
+        ordering = (
+            tuple(map(reverse_ordering_field, self.ordering)) if reverse
+            else self.ordering
+        )
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(get_keyset_filter(ordering, position))
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        return self.page
+
+    def get_position(self, instance):
+        """Значения полей сортировки объекта для курсора."""
+        return [
+            encode_position_value(get_ordering_value(instance, field))
+            for field in self.ordering
+        ]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(False, (
+            self.get_position(self.page[-1]) if self.page else self.position
+        ))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(True, (
+            self.get_position(self.page[0]) if self.page else self.position
+        ))
+
+    def encode_cursor(self, reverse, position):
+        encoded = b64encode(json.dumps(
+            {'r': int(reverse), 'p': position}
+        ).encode()).decode()
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded
+        )
+
+    def decode_cursor(self, request):
+        """
+        Получаем из курсора направление и значения полей
+        сортировки. Курсор другой сортировки считается неверным.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            cursor = json.loads(b64decode(encoded.encode()).decode())
+            reverse, position = bool(cursor['r']), cursor['p']
+        except (TypeError, KeyError, ValueError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or (
+            len(position) != len(self.ordering)
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, position
 
 
 class FoodgramPagination(pagination.PageNumberPagination):
@@ -6,7 +168,36 @@ class FoodgramPagination(pagination.PageNumberPagination):
     Собственный пагинатор проекта с возможностью
     у пользователя самостоятельно устанавливать
     количество объектов на странице через параметр
-    "limit".
+    "limit". Пагинация по курсору включается параметром
+    "pagination=cursor", наличием параметра "cursor" или
+    настройкой CURSOR_PAGINATION_BY_DEFAULT.
     """
 
     page_size_query_param = "limit"
+    cursor_paginator = None
+
+    def use_cursor_pagination(self, request):
+        """Определяем, нужна ли запросу пагинация по курсору."""
+        mode = request.query_params.get('pagination')
+        if mode is not None:
+            return mode == 'cursor'
+        if FoodgramCursorPagination.cursor_query_param in request.query_params:
+            return True
+        return (
+            settings.CURSOR_PAGINATION_BY_DEFAULT
+            and self.page_query_param not in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.use_cursor_pagination(request):
+            self.cursor_paginator = FoodgramCursorPagination()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
 from rest_framework.permissions import SAFE_METHODS, BasePermission
 
 
@@ -29,3 +31,21 @@ class IsAdminOrReadOnly(BasePermission):
             request.method in SAFE_METHODS
             or request.user.is_staff
         )
+
+
+class CanReadMetrics(BasePermission):
+    """
+    Допуск к метрикам разрешен администратору и запросам с
+    заголовком Authorization: Bearer <METRICS_TOKEN>. Анонимный
+    доступ открывается только явно, настройкой METRICS_PUBLIC.
+    """
+
+    def has_permission(self, request, view):
+        return (
+            settings.METRICS_PUBLIC
+            or request.user.is_staff
+            or bool(settings.METRICS_TOKEN) and constant_time_compare(
+                request.headers.get('Authorization', ''),
+                f'Bearer {settings.METRICS_TOKEN}',
+            )
+        )
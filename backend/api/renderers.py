@@ -0,0 +1,68 @@
+from rest_framework.renderers import JSONRenderer
+
+from core.exporters import (CSVShoppingCartExporter, JSONShoppingCartExporter,
+                            PDFShoppingCartExporter, TextShoppingCartExporter)
+
+
+class StreamingFileRenderer(JSONRenderer):
+    """
+    Базовый рендерер потоковой выгрузки файла.
+    Сам файл отдается потоком в обход рендерера, а рендерер
+    нужен для согласования формата через параметр ?format=
+    и для вывода ошибок в JSON.
+    """
+
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Ошибки отдаем в JSON с соответствующим типом содержимого."""
+        response = (renderer_context or {}).get('response')
+        if response is not None:
+            response['Content-Type'] = 'application/json'
+        return super().render(data, accepted_media_type, renderer_context)
+
+
+class ShoppingCartRenderer(StreamingFileRenderer):
+    """Базовый рендерер выгрузки списка покупок."""
+
+
+class TextShoppingCartRenderer(ShoppingCartRenderer):
+    """Рендерер списка покупок в текстовом формате."""
+
+    media_type = 'text/plain'
+    format = TextShoppingCartExporter.format
+
+
+class CSVShoppingCartRenderer(ShoppingCartRenderer):
+    """Рендерер списка покупок в формате CSV."""
+
+    media_type = 'text/csv'
+    format = CSVShoppingCartExporter.format
+
+
+class JSONShoppingCartRenderer(ShoppingCartRenderer):
+    """Рендерер списка покупок в формате JSON."""
+
+    format = JSONShoppingCartExporter.format
+
+
+class PDFShoppingCartRenderer(ShoppingCartRenderer):
+    """Рендерер списка покупок в формате PDF."""
+
+    media_type = 'application/pdf'
+    format = PDFShoppingCartExporter.format
+
+
+SHOPPING_CART_RENDERERS = (
+    TextShoppingCartRenderer,
+    CSVShoppingCartRenderer,
+    JSONShoppingCartRenderer,
+    PDFShoppingCartRenderer,
+)
+
+
+class NDJSONRecipesRenderer(StreamingFileRenderer):
+    """Рендерер выгрузки рецептов в формате NDJSON."""
+
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
@@ -1,14 +1,26 @@
+from functools import partial
+
 from django.contrib.auth import get_user_model
-from django.db.models import F
+from django.db import transaction
+from django.db.models import prefetch_related_objects
 from djoser.serializers import UserCreateSerializer, UserSerializer
 from rest_framework.exceptions import ValidationError
-from rest_framework.serializers import (IntegerField, ModelSerializer,
-                                        PrimaryKeyRelatedField,
-                                        SerializerMethodField)
+from rest_framework.serializers import (IntegerField, ListSerializer,
+                                        ModelSerializer, SerializerMethodField)
 from rest_framework.status import HTTP_400_BAD_REQUEST
 
 from core.constants import MIN_INGREDIENT_AMOUNT
-from core.serializers import CustomBaseSerializer
+from core.images import build_recipe_image
+from core.metrics import measure_serializer
+from core.recipe_fragments import get_recipe_body_prefetches, recipe_fragments
+from core.serializers import (Base64ImageField,
+                              CachedTagPrimaryKeyRelatedField,
+                              CustomBaseSerializer, TimedSerializerMixin)
+from core.shopping_cart import (add_recipe_to_shopping_cart_totals,
+                                remove_recipe_from_shopping_cart_totals)
+from core.similar_recipes import update_similar_recipes
+from core.tasks import enqueue
+from core.timeline import fan_out_recipes
 from recipes.models import Ingredient, Recipe, RecipeIngredientAmount, Tag
 
 User = get_user_model()
@@ -21,6 +33,8 @@ class RecipMiniFieldseSerializer(CustomBaseSerializer):
     где не нужны все поля модели.
     """
 
+    image = Base64ImageField(thumbnail_size='small', read_only=True)
+
     class Meta:
         model = Recipe
         fields = (
@@ -46,7 +60,7 @@ class CustomUserCreateSerializer(UserCreateSerializer):
         )
 
 
-class CustomUserSerializer(UserSerializer):
+class CustomUserSerializer(TimedSerializerMixin, UserSerializer):
     """
     Кастомизированный джосеровский сериализатор отображения юзера.
     Добавили поле статуса подписки на пользователя.
@@ -71,7 +85,10 @@ class CustomUserSerializer(UserSerializer):
         получения значения поля is_subscribed. Если юзер
         анонимный - возвращаем False, иначе проверяем
         наличие есть ли юзер в подписке у автора рецепта.
+        Если статус уже аннотирован в queryset - берем его без запроса.
         """
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         user = self.context['request'].user
         if user.is_anonymous:
             return False
@@ -111,15 +128,24 @@ class SubscriptionSerializer(CustomUserSerializer):
         )
 
     def get_recipes_count(self, obj):
-        """Возвращает количество рецептов у автора."""
+        """
+        Возвращает количество рецептов у автора.
+        Если количество аннотировано в queryset - берем его без запроса.
+        """
+        if hasattr(obj, 'recipes_count'):
+            return obj.recipes_count
         return obj.recipe_author.count()
 
     def get_recipes(self, obj):
-        """Возвращаем рецепты у автора в подписке."""
+        """
+        Возвращаем рецепты у автора в подписке.
+        Если рецепты уже подгружены с учетом recipes_limit,
+        срез берется из кеша без запроса.
+        """
         request = self.context['request']
-        recipes_limit = request.GET.get('recipes_limit')
+        recipes_limit = request.GET.get('recipes_limit', '')
         recipes = obj.recipe_author.all()
-        if recipes_limit:
+        if recipes_limit.isdigit():
             recipes = recipes[:int(recipes_limit)]
         return RecipMiniFieldseSerializer(
             recipes, many=True, read_only=True
@@ -145,7 +171,7 @@ class SubscriptionSerializer(CustomUserSerializer):
         return data
 
 
-class TagSerializer(ModelSerializer):
+class TagSerializer(TimedSerializerMixin, ModelSerializer):
     """Сериализатор модели тегов."""
 
     class Meta:
@@ -154,7 +180,7 @@ class TagSerializer(ModelSerializer):
         read_only_fields = ('__all__',)
 
 
-class IngredientSerializer(ModelSerializer):
+class IngredientSerializer(TimedSerializerMixin, ModelSerializer):
     """Сериализатор модели ингредиентов."""
 
     class Meta:
@@ -176,9 +202,26 @@ class RecipeIngredientAmountSerializer(ModelSerializer):
         )
 
 
+class ReadRecipeListSerializer(ListSerializer):
+    """
+    Сериализатор списка рецептов: фрагменты всей страницы
+    берутся из кеша одним обращением.
+    """
+
+    def to_representation(self, data):
+        recipes = data.all() if hasattr(data, 'all') else data
+        return self.child.represent_many(list(recipes))
+
+
 class ReadRecipeSerializer(CustomBaseSerializer):
-    """Сериализатор для вывода рецепта."""
+    """
+    Сериализатор для вывода рецепта. Тело рецепта одинаково
+    для всех юзеров и берется из кеша фрагментов, флаги юзера
+    подставляются из аннотаций queryset. Теги и ингредиенты
+    подгружаются только для рецептов, которых нет в кеше.
+    """
 
+    image = Base64ImageField(thumbnail_size='medium', read_only=True)
     author = CustomUserSerializer(read_only=True)
     tags = TagSerializer(many=True, read_only=True)
     is_favorited = SerializerMethodField()
@@ -199,6 +242,7 @@ class ReadRecipeSerializer(CustomBaseSerializer):
             'text',
             'cooking_time',
         )
+        list_serializer_class = ReadRecipeListSerializer
 
     def get_is_favorited(self, obj):
         """
@@ -206,7 +250,10 @@ class ReadRecipeSerializer(CustomBaseSerializer):
         для получения значения поля is_favorite. Если юзер
         анонимный - возвращаем False, иначе проверяем
         наличие рецепта у юзера в избранном.
+        Если статус уже аннотирован в queryset - берем его без запроса.
         """
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         return (
             self.has_user_related_obj_exists_or_false(
                 'favorite_recipe_user', 'recipe', obj
@@ -219,7 +266,10 @@ class ReadRecipeSerializer(CustomBaseSerializer):
         для получения значения поля is_in_shopping_cart.
         Если юзер анонимный - возвращаем False, иначе проверяем
         наличие рецепта у юзера в корзине покупок.
+        Если статус уже аннотирован в queryset - берем его без запроса.
         """
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         return (
             self.has_user_related_obj_exists_or_false(
                 'shopping_cart_user', 'recipe', obj
@@ -227,22 +277,80 @@ class ReadRecipeSerializer(CustomBaseSerializer):
         )
 
     def get_ingredients(self, obj):
-        """Получаем игредиенты для вывода в рецепте."""
-        return (
-            obj.ingredients.values(
-                'id',
-                'name',
-                'measurement_unit',
-                amount=F('recipeingredientamount__amount')
-            )
-        )
+        """
+        Получаем игредиенты для вывода в рецепте.
+        Читаем из prefetch кеша рецепта, без отдельного запроса.
+        """
+        return [
+            {
+                'id': ingredient_amount.ingredient.id,
+                'name': ingredient_amount.ingredient.name,
+                'measurement_unit': (
+                    ingredient_amount.ingredient.measurement_unit
+                ),
+                'amount': ingredient_amount.amount,
+            }
+            for ingredient_amount in obj.recipeingredientamount_set.all()
+        ]
+
+    def pass_author_subscription(self, instance):
+        """
+        Передаем аннотированный статус подписки на автора
+        во вложенный сериализатор автора.
+        """
+        if hasattr(instance, 'is_subscribed'):
+            instance.author.is_subscribed = instance.is_subscribed
+
+    def add_user_flags(self, fragment, instance):
+        """Подставляем во фрагмент из кеша флаги текущего юзера."""
+        self.pass_author_subscription(instance)
+        return {
+            **fragment,
+            'author': {
+                **fragment['author'],
+                'is_subscribed': self.fields['author'].get_is_subscribed(
+                    instance.author
+                ),
+            },
+            'is_favorited': self.get_is_favorited(instance),
+            'is_in_shopping_cart': self.get_is_in_shopping_cart(instance),
+        }
+
+    def represent_many(self, recipes):
+        """
+        Собираем рецепты: найденные в кеше дополняем флагами
+        юзера, остальные сериализуем целиком и кладем в кеш.
+        """
+        with measure_serializer(self):
+            request = self.context.get('request')
+            fragments = recipe_fragments.get_many(recipes, request)
+            missing = [
+                recipe for recipe in recipes if recipe.id not in fragments
+            ]
+            built = {}
+            if missing:
+                prefetch_related_objects(
+                    missing, *get_recipe_body_prefetches()
+                )
+                for recipe in missing:
+                    self.pass_author_subscription(recipe)
+                    built[recipe.id] = super().to_representation(recipe)
+                recipe_fragments.set_many(missing, built, request)
+            return [
+                built.get(recipe.id)
+                or self.add_user_flags(fragments[recipe.id], recipe)
+                for recipe in recipes
+            ]
+
+    def to_representation(self, instance):
+        return self.represent_many([instance])[0]
 
 
 class WriteRecipeSerializer(CustomBaseSerializer):
     """Сериализатор для создания нового рецепта."""
 
     ingredients = RecipeIngredientAmountSerializer(many=True)
-    tags = PrimaryKeyRelatedField(
+    tags = CachedTagPrimaryKeyRelatedField(
         queryset=Tag.objects.all(),
         many=True,
     )
@@ -261,13 +369,17 @@ class WriteRecipeSerializer(CustomBaseSerializer):
         )
 
     def validate_ingredients(self, value):
-        """Проверяем правильность выбранных ингредиентов."""
+        """
+        Проверяем правильность выбранных ингредиентов.
+        Повторы ищем по множеству id, существование всех
+        ингредиентов проверяем одним запросом.
+        """
         ingredients = self.get_field_and_no_field_value_validate(
             field='ingredients', value=value
         )
-        ingredients_in_recipe = []
+        ingredient_ids = set()
         for ingredient in ingredients:
-            if ingredient in ingredients_in_recipe:
+            if ingredient['id'] in ingredient_ids:
                 raise ValidationError({
                     "ingredients": "Нельзя дважды добавлять ингредиент!"
                 })
@@ -275,7 +387,17 @@ class WriteRecipeSerializer(CustomBaseSerializer):
                 raise ValidationError({
                     "amount": "Количесво ингредиента не может быть меньше 1!"
                 })
-            ingredients_in_recipe.append(ingredient)
+            ingredient_ids.add(ingredient['id'])
+        missing_ids = ingredient_ids - set(
+            Ingredient.objects.in_bulk(ingredient_ids)
+        )
+        if missing_ids:
+            raise ValidationError({
+                "ingredients": (
+                    "Ингредиенты не найдены: "
+                    f"{', '.join(map(str, sorted(missing_ids)))}!"
+                )
+            })
         return value
 
     def validate_tags(self, value):
@@ -283,17 +405,19 @@ class WriteRecipeSerializer(CustomBaseSerializer):
         tags = self.get_field_and_no_field_value_validate(
             field='tags', value=value
         )
-        tags_in_recipe = []
-        for tag in tags:
-            if tag in tags_in_recipe:
-                raise ValidationError({
-                    "tags": "Этот тег уже выбран!"
-                })
-            tags_in_recipe.append(tag)
+        if len(set(tags)) != len(tags):
+            raise ValidationError({
+                "tags": "Этот тег уже выбран!"
+            })
         return value
 
+    @transaction.atomic
     def create(self, validated_data):
-        """Создаем новый рецепт."""
+        """
+        Создаем новый рецепт. Изображение обрабатывается, рецепт
+        раскладывается по лентам подписчиков, а похожие рецепты
+        пересчитываются фоновыми задачами после фиксации транзакции.
+        """
         tags, ingredients = self.get_tags_and_ingredients_from_validated_data(
             data=validated_data
         )
@@ -301,19 +425,44 @@ class WriteRecipeSerializer(CustomBaseSerializer):
         self.add_tags_and_ingredients_to_recipe(
             recipe=recipe, tags=tags, ingredients=ingredients
         )
+        enqueue(build_recipe_image, recipe.id)
+        enqueue(fan_out_recipes, recipe.id)
+        enqueue(update_similar_recipes, recipe.id)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        """Обновляем выбранный рецепт."""
+        """
+        Обновляем выбранный рецепт. Теги и ингредиенты обновляются
+        по разнице с текущими: неизменные строки не трогаем. При
+        изменении ингредиентов пересчитываем списки покупок, где
+        лежит этот рецепт и в фоне обновляем похожие рецепты.
+        Новое изображение обрабатывается фоновой задачей. Прежнее
+        изображение и его миниатюры больше не отдаются и удаляются
+        после фиксации транзакции.
+        """
         if 'tags' in validated_data:
-            instance.tags.clear()
             instance.tags.set(validated_data.pop('tags'))
         if 'ingredients' in validated_data:
-            instance.recipeingredientamount_set.all().delete()
-            self.create_recipe_ingredients_amount(
+            changes = self.get_recipe_ingredients_changes(
                 recipe=instance,
-                ingredients=validated_data.pop('ingredients')
+                ingredients=validated_data.pop('ingredients'),
             )
+            if any(changes):
+                remove_recipe_from_shopping_cart_totals(recipe_id=instance.id)
+                self.apply_recipe_ingredients_changes(instance, *changes)
+                add_recipe_to_shopping_cart_totals(recipe_id=instance.id)
+                enqueue(update_similar_recipes, instance.id)
+        if 'image' in validated_data:
+            validated_data['image_status'] = Recipe.ImageStatus.PENDING
+            validated_data['image_thumbnails'] = {}
+            for name in {
+                instance.image.name, *instance.image_thumbnails.values()
+            }:
+                transaction.on_commit(
+                    partial(instance.image.storage.delete, name)
+                )
+            enqueue(build_recipe_image, instance.id)
         return super().update(instance, validated_data)
 
     def to_representation(self, instance):
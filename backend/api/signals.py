@@ -0,0 +1,36 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.authentication import invalidate_cached_token
+
+User = get_user_model()
+
+
+@receiver(user_logged_out)
+def invalidate_logged_out_token(sender, request, user, **kwargs):
+    """Удаляем из кеша токен, с которым пользователь вышел."""
+    if isinstance(getattr(request, 'auth', None), Token):
+        invalidate_cached_token(request.auth.key)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """Удаляем из кеша удаленный токен."""
+    invalidate_cached_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidate_changed_user_token(sender, instance, created, **kwargs):
+    """
+    Удаляем из кеша токен измененного пользователя, в том
+    числе деактивированного.
+    """
+    if created:
+        return
+    for key in Token.objects.filter(user=instance).values_list(
+        'key', flat=True
+    ):
+        invalidate_cached_token(key)
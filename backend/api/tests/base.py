@@ -0,0 +1,120 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase, APITransactionTestCase
+
+from benchmarks.database import BENCHMARK_CACHES
+from benchmarks.seed import BENCHMARK_IMAGE
+from recipes.models import Ingredient, Recipe, RecipeIngredientAmount, Tag
+
+User = get_user_model()
+
+
+isolated_settings = override_settings(
+    BACKGROUND_TASKS_MODE='queue',
+    MEDIA_ROOT=tempfile.mkdtemp(prefix='foodgram-tests-'),
+    CACHES=BENCHMARK_CACHES,
+)
+
+
+class FoodgramTestMixin:
+    """
+    Общая часть тестов API. Кеши, медиа и очередь фоновых
+    задач изолированы от рабочих, задачи только пишутся в
+    очередь. Данные: два юзера, теги, ингредиенты и рецепты
+    автора.
+    """
+
+    recipes_count = 3
+
+    @classmethod
+    def create_test_data(cls):
+        cls.user = User.objects.create_user(
+            email='user@foodgram.test', username='user',
+            first_name='Юзер', last_name='Тестовый', password='pass-12345',
+        )
+        cls.author = User.objects.create_user(
+            email='author@foodgram.test', username='author',
+            first_name='Автор', last_name='Тестовый', password='pass-12345',
+        )
+        cls.tags = [
+            Tag.objects.create(name=name, color=color, slug=slug)
+            for name, color, slug in (
+                ('Завтрак', '#E26C2D', 'breakfast'),
+                ('Обед', '#49B64E', 'lunch'),
+            )
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'ингредиент {number}', measurement_unit='г'
+            )
+            for number in range(5)
+        ]
+        cls.recipes = [
+            cls.create_recipe(f'Рецепт {number}')
+            for number in range(cls.recipes_count)
+        ]
+
+    @classmethod
+    def create_recipe(cls, name, ingredients=None):
+        """Создаем рецепт автора с тегами и ингредиентами."""
+        recipe = Recipe(
+            author=cls.author, name=name, text='Описание', cooking_time=5
+        )
+        recipe.image.save('recipe.png', ContentFile(BENCHMARK_IMAGE),
+                          save=False)
+        recipe.save()
+        recipe.tags.set(cls.tags)
+        RecipeIngredientAmount.objects.bulk_create(
+            RecipeIngredientAmount(
+                recipe=recipe, ingredient=ingredient, amount=10
+            )
+            for ingredient in ingredients or cls.ingredients[:3]
+        )
+        return recipe
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        super().setUp()
+        for cache in caches.all():
+            cache.clear()
+
+    def client_for(self, user):
+        """Клиент API с токеном юзера."""
+        client = APIClient()
+        token, _ = Token.objects.get_or_create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return client
+
+
+@isolated_settings
+class FoodgramAPITestCase(FoodgramTestMixin, APITestCase):
+    """Тесты API в транзакции, данные создаются один раз."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_test_data()
+
+
+@isolated_settings
+class FoodgramAPITransactionTestCase(
+        FoodgramTestMixin, APITransactionTestCase
+):
+    """
+    Тесты API с фиксацией транзакций, например, для запросов
+    из нескольких потоков. Данные создаются перед каждым тестом.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.create_test_data()
@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from api.tests.base import FoodgramTestMixin, isolated_settings
+from core.shopping_cart import (add_recipe_to_shopping_cart_totals,
+                                get_expected_shopping_cart_totals)
+from recipes.models import Cart, RecipeIngredientAmount, ShoppingCartIngredient
+
+User = get_user_model()
+
+
+@isolated_settings
+class AdminShoppingCartTotalsTests(FoodgramTestMixin, TestCase):
+    """Списки покупок при правке корзин и ингредиентов в админке."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_test_data()
+        cls.admin = User.objects.create_superuser(
+            email='admin@foodgram.test', username='admin',
+            first_name='Админ', last_name='Тестовый', password='pass-12345',
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.admin)
+
+    def assert_totals_match(self):
+        self.assertEqual(
+            set(ShoppingCartIngredient.objects.values_list(
+                'user_id', 'ingredient_id', 'amount'
+            )),
+            {
+                (row['user_id'], row['ingredient_id'], row['total_amount'])
+                for row in get_expected_shopping_cart_totals()
+            },
+        )
+
+    def test_cart_add_change_and_delete(self):
+        self.client.post('/admin/recipes/cart/add/', {
+            'user': self.user.id, 'recipe': self.recipes[0].id,
+        })
+        cart = Cart.objects.get(user=self.user)
+        self.assert_totals_match()
+        self.client.post(f'/admin/recipes/cart/{cart.id}/change/', {
+            'user': self.user.id, 'recipe': self.recipes[1].id,
+        })
+        self.assertEqual(
+            Cart.objects.get(id=cart.id).recipe_id, self.recipes[1].id
+        )
+        self.assert_totals_match()
+        self.client.post('/admin/recipes/cart/', {
+            'action': 'delete_selected', '_selected_action': [cart.id],
+            'post': 'yes',
+        })
+        self.assertFalse(Cart.objects.exists())
+        self.assert_totals_match()
+
+    def test_recipe_ingredient_change_and_delete(self):
+        for user in (self.user, self.author):
+            Cart.objects.create(user=user, recipe=self.recipes[0])
+        add_recipe_to_shopping_cart_totals(recipe_id=self.recipes[0].id)
+        self.assert_totals_match()
+        row = RecipeIngredientAmount.objects.filter(
+            recipe=self.recipes[0]
+        ).first()
+        self.client.post(
+            f'/admin/recipes/recipeingredientamount/{row.id}/change/',
+            {
+                'recipe': self.recipes[0].id,
+                'ingredient': self.ingredients[4].id,
+                'amount': 25,
+            },
+        )
+        self.assertEqual(
+            RecipeIngredientAmount.objects.get(id=row.id).amount, 25
+        )
+        self.assert_totals_match()
+        self.client.post(
+            f'/admin/recipes/recipeingredientamount/{row.id}/delete/',
+            {'post': 'yes'},
+        )
+        self.assertFalse(
+            RecipeIngredientAmount.objects.filter(id=row.id).exists()
+        )
+        self.assert_totals_match()
@@ -0,0 +1,61 @@
+import json
+
+from asgiref.sync import async_to_sync
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from api.tests.base import FoodgramAPITransactionTestCase
+from core.asgi import StreamingASGIHandler
+
+
+class StreamingASGITests(FoodgramAPITransactionTestCase):
+    """Потоковые ответы под ASGI."""
+
+    def asgi_get(self, user, path, query_string=''):
+        """Выполняем GET через ASGI обработчик, собираем ответ."""
+        token, _ = Token.objects.get_or_create(user=user)
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': path,
+            'query_string': query_string.encode(),
+            'headers': [
+                (b'authorization', f'Token {token.key}'.encode()),
+                (b'host', b'testserver'),
+            ],
+        }
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        async_to_sync(StreamingASGIHandler())(scope, receive, send)
+        body = b''.join(
+            message.get('body', b'') for message in messages[1:]
+        )
+        return messages[0]['status'], body.decode()
+
+    def test_shopping_cart_download(self):
+        response = self.client_for(self.user).post(
+            f'/api/recipes/{self.recipes[0].id}/shopping_cart/'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        status_code, body = self.asgi_get(
+            self.user, '/api/recipes/download_shopping_cart/'
+        )
+        self.assertEqual(status_code, status.HTTP_200_OK)
+        for ingredient in self.ingredients[:3]:
+            self.assertIn(ingredient.name, body)
+
+    def test_recipes_export(self):
+        self.user.is_staff = True
+        self.user.save(update_fields=('is_staff',))
+        status_code, body = self.asgi_get(self.user, '/api/recipes/export/')
+        self.assertEqual(status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(json.loads(line)['name'] for line in body.splitlines()),
+            sorted(recipe.name for recipe in self.recipes),
+        )
@@ -0,0 +1,30 @@
+from api.tests.base import FoodgramAPITestCase
+
+
+class CachedTokenAuthenticationTests(FoodgramAPITestCase):
+    """Кеш токенов не возвращает устаревшие поля юзера в БД."""
+
+    def test_set_password_keeps_subscribers_count(self):
+        author_client = self.client_for(self.author)
+        author_client.get('/api/users/me/')
+        self.client_for(self.user).post(
+            f'/api/users/{self.author.id}/subscribe/'
+        )
+        response = author_client.post('/api/users/set_password/', {
+            'current_password': 'pass-12345',
+            'new_password': 'pass-67890',
+        })
+        self.assertEqual(response.status_code, 204)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.subscribers_count, 1)
+        self.user.delete()
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.subscribers_count, 0)
+
+    def test_me_loads_deferred_profile_in_one_query(self):
+        client = self.client_for(self.user)
+        client.get('/api/users/me/')
+        # Профиль одним запросом и проверка подписки.
+        with self.assertNumQueries(2):
+            response = client.get('/api/users/me/')
+        self.assertEqual(response.json()['username'], self.user.username)
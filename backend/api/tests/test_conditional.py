@@ -0,0 +1,24 @@
+from api.tests.base import FoodgramAPITestCase
+
+
+class ConditionalRecipeListTests(FoodgramAPITestCase):
+    """Условные GET списка рецептов."""
+
+    def test_list_etag(self):
+        response = self.client.get('/api/recipes/')
+        self.assertIn('ETag', response)
+        response = self.client.get(
+            '/api/recipes/', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_counter_ordering_is_not_cached(self):
+        url = '/api/recipes/?limit=6&ordering=-favorites_count'
+        first = self.client.get(url)
+        self.assertNotIn('ETag', first)
+        self.assertIn('no-store', first['Cache-Control'])
+        last_id = first.json()['results'][-1]['id']
+        self.client_for(self.user).post(f'/api/recipes/{last_id}/favorite/')
+        second = self.client.get(url)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json()['results'][0]['id'], last_id)
@@ -0,0 +1,47 @@
+from django.test import override_settings
+from rest_framework import status
+
+from api.tests.base import FoodgramAPITestCase
+
+METRICS_URL = '/api/_metrics'
+
+
+class MetricsAccessTests(FoodgramAPITestCase):
+    """Доступ к метрикам процесса."""
+
+    def test_denied_by_default(self):
+        self.assertEqual(
+            self.client.get(METRICS_URL).status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+        self.assertEqual(
+            self.client_for(self.user).get(METRICS_URL).status_code,
+            status.HTTP_403_FORBIDDEN,
+        )
+
+    def test_allowed_for_staff(self):
+        self.user.is_staff = True
+        self.user.save(update_fields=('is_staff',))
+        response = self.client_for(self.user).get(METRICS_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(METRICS_TOKEN='metrics-token')
+    def test_allowed_with_token(self):
+        self.assertEqual(
+            self.client.get(
+                METRICS_URL, HTTP_AUTHORIZATION='Bearer metrics-token'
+            ).status_code,
+            status.HTTP_200_OK,
+        )
+        self.assertEqual(
+            self.client.get(
+                METRICS_URL, HTTP_AUTHORIZATION='Bearer wrong'
+            ).status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+
+    @override_settings(METRICS_PUBLIC=True)
+    def test_public_setting_allows_anonymous(self):
+        self.assertEqual(
+            self.client.get(METRICS_URL).status_code, status.HTTP_200_OK
+        )
@@ -0,0 +1,50 @@
+from api.tests.base import FoodgramAPITestCase
+
+
+class RecipeOrderingTests(FoodgramAPITestCase):
+    """Сортировка рецептов по счетчикам."""
+
+    recipes_count = 5
+
+    def get_ids(self, url):
+        return [recipe['id'] for recipe in self.client.get(url).json()[
+            'results'
+        ]]
+
+    def get_cursor_ids(self, url):
+        """Проходим все страницы по ссылкам next."""
+        ids = []
+        while url:
+            data = self.client.get(url).json()
+            ids += [recipe['id'] for recipe in data['results']]
+            url = data['next']
+        return ids
+
+    def test_equal_counters_ordered_by_id(self):
+        for ordering, expected in (
+            ('-favorites_count', sorted(self.get_all_ids(), reverse=True)),
+            ('carts_count', sorted(self.get_all_ids())),
+        ):
+            pages = [
+                self.get_ids(
+                    f'/api/recipes/?page={page}&limit=2&ordering={ordering}'
+                )
+                for page in (1, 2, 3)
+            ]
+            self.assertEqual(sum(pages, []), expected)
+
+    def test_equal_counters_in_cursor_mode(self):
+        for ordering, expected in (
+            ('-favorites_count', sorted(self.get_all_ids(), reverse=True)),
+            ('carts_count', sorted(self.get_all_ids())),
+        ):
+            self.assertEqual(
+                self.get_cursor_ids(
+                    '/api/recipes/?pagination=cursor&limit=2'
+                    f'&ordering={ordering}'
+                ),
+                expected,
+            )
+
+    def get_all_ids(self):
+        return [recipe.id for recipe in self.recipes]
@@ -0,0 +1,77 @@
+from urllib.parse import quote, urlsplit
+
+from api.tests.base import FoodgramAPITestCase
+from recipes.models import Ingredient, Recipe
+
+
+class CursorPaginationTests(FoodgramAPITestCase):
+    """Пагинация по курсору при равных значениях полей сортировки."""
+
+    recipes_count = 7
+
+    def get_pages(self, url, link='next'):
+        """Проходим страницы по ссылкам, пока они есть."""
+        pages = []
+        while url:
+            data = self.client.get(url).json()
+            pages.append([item['id'] for item in data['results']])
+            self.assertLessEqual(len(pages), 10, 'Пагинация не заканчивается')
+            url = data[link]
+            if url:
+                url = urlsplit(url)._replace(scheme='', netloc='').geturl()
+        return pages
+
+    def test_recipes_default_ordering(self):
+        pages = self.get_pages('/api/recipes/?pagination=cursor&limit=3')
+        ids = sum(pages, [])
+        self.assertEqual(
+            sorted(ids), sorted(recipe.id for recipe in self.recipes)
+        )
+        self.assertEqual(len(pages), 3)
+
+    def test_many_equal_leading_values(self):
+        Recipe.objects.bulk_create(
+            Recipe(
+                author=self.author, name=f'Рецепт {number}', text='текст',
+                cooking_time=5, image=self.recipes[0].image.name,
+            )
+            for number in range(1300)
+        )
+        pages = self.get_pages(
+            '/api/recipes/?pagination=cursor&limit=200'
+            '&ordering=-favorites_count'
+        )
+        ids = sum(pages, [])
+        self.assertEqual(len(ids), Recipe.objects.count())
+        self.assertEqual(ids, sorted(ids, reverse=True))
+
+    def test_previous_links_return_same_pages(self):
+        pages = self.get_pages('/api/recipes/?pagination=cursor&limit=3')
+        last = self.client.get(
+            '/api/recipes/?pagination=cursor&limit=3'
+        ).json()
+        for _ in pages[1:]:
+            last = self.client.get(last['next']).json()
+        url = urlsplit(last['previous'])._replace(
+            scheme='', netloc=''
+        ).geturl()
+        self.assertEqual(
+            self.get_pages(url, link='previous'), pages[-2::-1]
+        )
+
+    def test_ingredient_search_with_equal_names(self):
+        ids = sorted(
+            Ingredient.objects.create(
+                name='соль', measurement_unit=f'ед {number}'
+            ).id
+            for number in range(7)
+        )
+        pages = self.get_pages(
+            '/api/ingredients/?pagination=cursor&limit=2'
+            f'&name={quote("соль")}'
+        )
+        self.assertEqual(sum(pages, []), ids)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/recipes/?cursor=bm90LWpzb24=')
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,75 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+
+from api.tests.base import FoodgramAPITestCase
+from recipes.models import Cart, FavoriteRecipe
+from users.models import Subscription
+
+User = get_user_model()
+
+
+class ReadQueryCountTests(FoodgramAPITestCase):
+    """
+    Количество запросов на чтение не зависит от размера
+    страницы. Кеши сбрасываются перед каждым запросом, чтобы
+    фрагменты рецептов собирались из БД. Токен юзера заранее
+    попадает в кеш процесса.
+    """
+
+    recipes_count = 6
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for recipe in cls.recipes[::2]:
+            FavoriteRecipe.objects.create(user=cls.user, recipe=recipe)
+            Cart.objects.create(user=cls.user, recipe=recipe)
+        Subscription.objects.create(user=cls.user, author=cls.author)
+        for number in range(3):
+            author = User.objects.create_user(
+                email=f'author{number}@foodgram.test',
+                username=f'author_{chr(97 + number)}',
+                first_name='Автор', last_name='Тестовый',
+                password='pass-12345',
+            )
+            Subscription.objects.create(user=cls.user, author=author)
+
+    def assert_cacheless_num_queries(self, client, url, number):
+        for cache in caches.all():
+            cache.clear()
+        with self.assertNumQueries(number):
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_recipe_list(self):
+        user_client = self.client_for(self.user)
+        user_client.get('/api/users/me/')
+        for limit in (1, 6):
+            # Версия выборки, количество, страница, теги и ингредиенты.
+            self.assert_cacheless_num_queries(
+                self.client, f'/api/recipes/?limit={limit}', 5
+            )
+            # Плюс версия избранного, корзины и подписок юзера.
+            response = self.assert_cacheless_num_queries(
+                user_client, f'/api/recipes/?limit={limit}', 6
+            )
+            self.assertEqual(len(response.json()['results']), limit)
+
+    def test_recipe_detail(self):
+        # Версия рецепта, рецепт, теги и ингредиенты.
+        self.assert_cacheless_num_queries(
+            self.client, f'/api/recipes/{self.recipes[0].id}/', 4
+        )
+
+    def test_subscriptions(self):
+        client = self.client_for(self.user)
+        client.get('/api/users/me/')
+        for limit in (1, 4):
+            # Количество, страница авторов и их рецепты.
+            response = self.assert_cacheless_num_queries(
+                client,
+                f'/api/users/subscriptions/?limit={limit}&recipes_limit=2',
+                3,
+            )
+            self.assertEqual(len(response.json()['results']), limit)
@@ -0,0 +1,54 @@
+import json
+
+from rest_framework import status
+
+from api.tests.base import FoodgramAPITestCase
+from core.images import build_recipe_image
+from core.models import BackgroundTask
+from recipes.models import Recipe
+
+
+class RecipeImportTests(FoodgramAPITestCase):
+    """Загрузка рецептов из NDJSON."""
+
+    recipes_count = 1
+
+    def get_record(self, name, **fields):
+        return {
+            'author': self.author.username,
+            'name': name,
+            'text': 'текст',
+            'cooking_time': 10,
+            'image': 'recipes/images/imported.png',
+            'tags': [self.tags[0].slug],
+            'ingredients': [{
+                'name': self.ingredients[0].name,
+                'measurement_unit': self.ingredients[0].measurement_unit,
+                'amount': 10,
+            }],
+            **fields,
+        }
+
+    def test_pending_images_are_queued(self):
+        self.user.is_staff = True
+        self.user.save(update_fields=('is_staff',))
+        BackgroundTask.objects.all().delete()
+        body = '\n'.join(json.dumps(record) for record in (
+            self.get_record('Без миниатюр'),
+            self.get_record(
+                'С миниатюрами',
+                image_status=Recipe.ImageStatus.READY,
+                image_thumbnails={'small': 'recipes/images/small.webp'},
+            ),
+        ))
+        response = self.client_for(self.user).post(
+            '/api/recipes/import/', body,
+            content_type='application/x-ndjson',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['created'], 2)
+        pending = Recipe.objects.get(name='Без миниатюр')
+        self.assertEqual(pending.image_status, Recipe.ImageStatus.PENDING)
+        self.assertEqual(list(BackgroundTask.objects.filter(
+            name=build_recipe_image.task_name
+        ).values_list('args', flat=True)), [[pending.id]])
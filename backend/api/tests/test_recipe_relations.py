@@ -0,0 +1,59 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+
+from api.tests.base import FoodgramAPITransactionTestCase
+from recipes.models import Cart, FavoriteRecipe
+
+THREADS = 8
+
+
+class ConcurrentRecipeRelationsTests(FoodgramAPITransactionTestCase):
+    """
+    Параллельные добавления рецепта в избранное и корзину
+    создают одну строку и увеличивают счетчик один раз.
+    SQLite в памяти не пускает параллельные записи из разных
+    соединений, поэтому тест запускается на PostgreSQL или на
+    файле SQLite (DB_TEST_NAME).
+    """
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('Нужна БД с параллельными соединениями.')
+        super().setUp()
+
+    def request_in_thread(self, client, method, url):
+        try:
+            return getattr(client, method)(url).status_code
+        finally:
+            connection.close()
+
+    def hammer(self, method, url):
+        client = self.client_for(self.user)
+        with ThreadPoolExecutor(max_workers=THREADS) as executor:
+            return sorted(executor.map(
+                lambda _: self.request_in_thread(client, method, url),
+                range(THREADS),
+            ))
+
+    def test_concurrent_adds_and_deletes(self):
+        recipe = self.recipes[0]
+        for model, action, counter in (
+            (FavoriteRecipe, 'favorite', 'favorites_count'),
+            (Cart, 'shopping_cart', 'carts_count'),
+        ):
+            url = f'/api/recipes/{recipe.id}/{action}/'
+            self.assertEqual(
+                self.hammer('post', url), [201] + [400] * (THREADS - 1)
+            )
+            self.assertEqual(
+                model.objects.filter(user=self.user, recipe=recipe).count(),
+                1,
+            )
+            recipe.refresh_from_db()
+            self.assertEqual(getattr(recipe, counter), 1)
+            self.assertEqual(
+                self.hammer('delete', url), [204] + [400] * (THREADS - 1)
+            )
+            recipe.refresh_from_db()
+            self.assertEqual(getattr(recipe, counter), 0)
@@ -0,0 +1,86 @@
+import re
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.tests.base import FoodgramAPITestCase
+from benchmarks.scenarios import BENCHMARK_IMAGE_DATA
+from recipes.models import Recipe
+
+WRITE_TARGET = re.compile(r'^(?:INSERT INTO|UPDATE|DELETE FROM) "(\w+)"')
+
+
+class RecipeUpdateTests(FoodgramAPITestCase):
+    """Обновление рецепта по разнице с текущими тегами и ингредиентами."""
+
+    def setUp(self):
+        super().setUp()
+        self.client = self.client_for(self.author)
+        self.recipe = self.recipes[0]
+        self.url = f'/api/recipes/{self.recipe.id}/'
+
+    def get_payload(self, amounts=None):
+        amounts = amounts or {}
+        return {
+            'name': self.recipe.name,
+            'text': self.recipe.text,
+            'cooking_time': self.recipe.cooking_time,
+            'tags': [tag.id for tag in self.tags],
+            'ingredients': [
+                {'id': ingredient.id, 'amount': amounts.get(ingredient.id, 10)}
+                for ingredient in self.ingredients[:3]
+            ],
+        }
+
+    def get_writes(self, payload, table):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(self.url, payload, format='json')
+        self.assertEqual(response.status_code, 200)
+        return [
+            query['sql'] for query in queries.captured_queries
+            if WRITE_TARGET.findall(query['sql']) == [table]
+        ]
+
+    def test_unchanged_payload_does_not_write_relations(self):
+        payload = self.get_payload()
+        self.assertEqual(
+            self.get_writes(payload, 'recipes_recipeingredientamount'), []
+        )
+        self.assertEqual(self.get_writes(payload, 'recipes_recipe_tags'), [])
+
+    def test_changed_amount_updates_one_statement(self):
+        writes = self.get_writes(
+            self.get_payload({self.ingredients[0].id: 25}),
+            'recipes_recipeingredientamount',
+        )
+        self.assertEqual(len(writes), 1)
+        self.assertTrue(writes[0].startswith('UPDATE'))
+
+    def test_ingredients_validated_in_one_query(self):
+        payload = self.get_payload()
+        payload['ingredients'].append({'id': 999999, 'amount': 5})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(self.url, payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ingredients', response.json())
+        self.assertEqual(len([
+            query for query in queries.captured_queries
+            if 'FROM "recipes_ingredient"' in query['sql']
+        ]), 1)
+
+    def test_new_image_drops_old_thumbnails(self):
+        Recipe.objects.filter(id=self.recipe.id).update(
+            image_status=Recipe.ImageStatus.READY,
+            image_thumbnails={'small': 'recipes/images/old-small.webp'},
+        )
+        payload = self.get_payload()
+        payload['image'] = BENCHMARK_IMAGE_DATA
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(self.url, payload, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('old-small', response.json()['image'])
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_thumbnails, {})
+        self.assertEqual(
+            self.recipe.image_status, Recipe.ImageStatus.PENDING
+        )
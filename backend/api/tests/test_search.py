@@ -0,0 +1,34 @@
+from unittest import skipUnless
+
+from django.apps import apps
+from django.db import connection
+from django.db.models.signals import post_migrate
+
+from api.tests.base import FoodgramAPITestCase
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Триггеры FTS5 только в SQLite')
+class RecipeSearchTriggersTests(FoodgramAPITestCase):
+    """Восстановление триггеров поиска рецептов после миграций."""
+
+    def search(self, value):
+        response = self.client.get('/api/recipes/', {'search': value})
+        return [recipe['id'] for recipe in response.json()]
+
+    def test_post_migrate_restores_lost_triggers(self):
+        recipe = self.recipes[0]
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER recipes_recipe_fts_update')
+        recipe.name = 'Шарлотка'
+        recipe.save(update_fields=('name',))
+        self.assertEqual(self.search('шарлотка'), [])
+        app_config = apps.get_app_config('recipes')
+        post_migrate.send(
+            sender=app_config, app_config=app_config,
+            verbosity=0, interactive=False, using=connection.alias,
+            plan=[], apps=apps,
+        )
+        self.assertEqual(self.search('шарлотка'), [recipe.id])
+        recipe.name = 'Пирог'
+        recipe.save(update_fields=('name',))
+        self.assertEqual(self.search('шарлотка'), [])
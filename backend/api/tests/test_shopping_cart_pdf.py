@@ -0,0 +1,86 @@
+import re
+import zlib
+
+from rest_framework import status
+
+from api.tests.base import FoodgramAPITestCase
+from core.pdf import get_pdf_font
+
+
+class ShoppingCartPDFTests(FoodgramAPITestCase):
+    """Список покупок в PDF со встроенным шрифтом."""
+
+    def download_pdf(self):
+        client = self.client_for(self.user)
+        response = client.post(
+            f'/api/recipes/{self.recipes[0].id}/shopping_cart/'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = client.get(
+            '/api/recipes/download_shopping_cart/', {'format': 'pdf'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b''.join(response.streaming_content)
+
+    @staticmethod
+    def get_object(document, number):
+        """Тело объекта PDF по номеру."""
+        return re.search(
+            rb'\n%d 0 obj\n(.*?)\nendobj\n' % number, document, re.S
+        ).group(1)
+
+    @staticmethod
+    def get_stream(body):
+        return re.search(rb'stream\n(.*)\nendstream', body, re.S).group(1)
+
+    def test_font_glyphs(self):
+        font = get_pdf_font()
+        for char in 'Ёё№—«»АЯая?':
+            self.assertIn(char, font.glyphs)
+            self.assertGreater(font.get_width(font.glyphs[char]), 0)
+
+    def test_font_is_embedded(self):
+        document = self.download_pdf()
+        self.assertTrue(document.startswith(b'%PDF-'))
+        self.assertNotIn(b'/Helvetica', document)
+        descriptor = self.get_object(document, 6)
+        self.assertIn(b'/FontFile2 7 0 R', descriptor)
+        font_file = self.get_object(document, 7)
+        self.assertEqual(
+            zlib.decompress(self.get_stream(font_file)),
+            get_pdf_font().data,
+        )
+
+    def test_xref_offsets(self):
+        document = self.download_pdf()
+        startxref = int(re.search(rb'startxref\n(\d+)', document).group(1))
+        self.assertTrue(document[startxref:].startswith(b'xref\n'))
+        offsets = re.findall(rb'(\d{10}) 00000 n ', document[startxref:])
+        for number, offset in enumerate(offsets, start=1):
+            self.assertTrue(
+                document[int(offset):].startswith(b'%d 0 obj\n' % number)
+            )
+
+    def test_text_maps_back_to_unicode(self):
+        document = self.download_pdf()
+        chars = {
+            int(glyph, 16): bytes.fromhex(char.decode()).decode('utf-16-be')
+            for glyph, char in re.findall(
+                rb'<([0-9A-F]{4})> <([0-9a-f]+)>',
+                self.get_stream(self.get_object(document, 4)),
+            )
+        }
+        lines = [
+            ''.join(
+                chars[int(line[start:start + 4], 16)]
+                for start in range(0, len(line), 4)
+            )
+            for line in re.findall(
+                rb'<([0-9A-F]*)> Tj', self.get_stream(
+                    self.get_object(document, 8)
+                )
+            )
+        ]
+        text = '\n'.join(lines)
+        for ingredient in self.ingredients[:3]:
+            self.assertIn(ingredient.name, text)
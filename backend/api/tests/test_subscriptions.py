@@ -0,0 +1,22 @@
+from api.tests.base import FoodgramAPITestCase
+
+
+class SubscriptionsTests(FoodgramAPITestCase):
+    """Список подписок юзера."""
+
+    url = '/api/users/subscriptions/?page=1&limit=6&recipes_limit=3'
+
+    def test_subscriptions_without_subscriptions(self):
+        response = self.client_for(self.user).get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [])
+
+    def test_subscriptions_recipes_limit(self):
+        client = self.client_for(self.user)
+        client.post(f'/api/users/{self.author.id}/subscribe/')
+        response = client.get(self.url.replace('recipes_limit=3',
+                                               'recipes_limit=2'))
+        self.assertEqual(response.status_code, 200)
+        [author] = response.json()['results']
+        self.assertEqual(len(author['recipes']), 2)
+        self.assertEqual(author['recipes_count'], self.recipes_count)
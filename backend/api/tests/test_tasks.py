@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from api.tests.base import FoodgramAPITestCase
+from core.images import build_recipe_image
+from core.models import BackgroundTask
+from core.tasks import run_pending_tasks
+from recipes.models import Recipe
+
+
+class StaleBackgroundTaskTests(FoodgramAPITestCase):
+    """Задачи, зависшие в работе после падения процесса."""
+
+    recipes_count = 1
+
+    def create_stale_task(self, attempts):
+        return BackgroundTask.objects.create(
+            name=build_recipe_image.task_name,
+            args=[self.recipes[0].id],
+            status=BackgroundTask.Status.RUNNING,
+            attempts=attempts,
+            started_at=timezone.now() - timedelta(
+                seconds=settings.BACKGROUND_TASKS_TIMEOUT + 1
+            ),
+        )
+
+    def test_stale_task_is_retried(self):
+        task = self.create_stale_task(attempts=1)
+        self.assertEqual(run_pending_tasks(limit=10), 1)
+        self.assertFalse(BackgroundTask.objects.filter(id=task.id).exists())
+        self.assertEqual(
+            Recipe.objects.get(id=self.recipes[0].id).image_status,
+            Recipe.ImageStatus.READY,
+        )
+
+    def test_stale_task_without_attempts_left_fails(self):
+        task = self.create_stale_task(
+            attempts=settings.BACKGROUND_TASKS_MAX_ATTEMPTS
+        )
+        self.assertEqual(run_pending_tasks(limit=10), 0)
+        task.refresh_from_db()
+        self.assertEqual(task.status, BackgroundTask.Status.FAILED)
+        self.assertEqual(
+            Recipe.objects.get(id=self.recipes[0].id).image_status,
+            Recipe.ImageStatus.FAILED,
+        )
+        self.assertEqual(run_pending_tasks(limit=10), 0)
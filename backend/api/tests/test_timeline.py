@@ -0,0 +1,59 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api.tests.base import FoodgramAPITestCase
+from core.tasks import run_pending_tasks
+from recipes.models import TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTests(FoodgramAPITestCase):
+    """Лента рецептов из подписок."""
+
+    recipes_count = 4
+    url = '/api/recipes/timeline/?limit=2'
+
+    def setUp(self):
+        super().setUp()
+        self.client = self.client_for(self.user)
+        self.client.post(f'/api/users/{self.author.id}/subscribe/')
+
+    def get_ids(self):
+        return [
+            recipe['id']
+            for recipe in self.client.get(self.url).json()['results']
+        ]
+
+    def test_timeline_pages_entries_by_index(self):
+        with CaptureQueriesContext(connection) as queries:
+            ids = self.get_ids()
+        self.assertEqual(ids, [recipe.id for recipe in self.recipes[:1:-1]])
+        self.assertTrue(any(
+            query['sql'].startswith(
+                'SELECT "recipes_timelineentry"."id"'
+            ) and 'ORDER BY "recipes_timelineentry"."pub_date" DESC'
+            in query['sql']
+            for query in queries.captured_queries
+        ))
+
+    @override_settings(TIMELINE_PULL_THRESHOLD=1)
+    def test_author_fanned_out_after_leaving_pull_mode(self):
+        follower = User.objects.create_user(
+            email='follower@foodgram.test', username='follower',
+            first_name='Подписчик', last_name='Тестовый',
+            password='pass-12345',
+        )
+        follower_client = self.client_for(follower)
+        follower_client.post(f'/api/users/{self.author.id}/subscribe/')
+        recipe = self.create_recipe('Рецепт в режиме чтения')
+        self.assertEqual(self.get_ids()[0], recipe.id)
+        self.assertFalse(TimelineEntry.objects.filter(recipe=recipe).exists())
+        follower_client.delete(f'/api/users/{self.author.id}/subscribe/')
+        run_pending_tasks(limit=10)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.user, recipe=recipe
+        ).exists())
+        self.assertEqual(self.get_ids()[0], recipe.id)
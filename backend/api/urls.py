@@ -1,6 +1,7 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from api.metrics import metrics_view
 from api.views import (CustomUserViewSet, IngredientViewSet, RecipeViewSet,
                        TagViewSet)
 
@@ -14,6 +15,7 @@ router.register('users', CustomUserViewSet, 'users')
 
 
 urlpatterns = [
+    path('_metrics', metrics_view, name='metrics'),
     path('', include(router.urls)),
     path('auth/', include('djoser.urls.authtoken')),
 ]
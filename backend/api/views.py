@@ -3,33 +3,44 @@ from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
 from rest_framework.decorators import action
 from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 
-from api.filters import IngredientFilter, RecipeFilter
+from api.filters import IngredientFilter, RecipeFilter, RecipeOrderingFilter
+from api.mixins import (AsyncActionsMixin, CatalogCacheMixin,
+                        ConditionalRecipeMixin)
 from api.pagination import FoodgramPagination
 from api.permissions import IsAdminOrReadOnly, IsAuthorOrReadOnly
+from api.renderers import SHOPPING_CART_RENDERERS, NDJSONRecipesRenderer
 from api.serializers import (CustomUserSerializer, IngredientSerializer,
                              ReadRecipeSerializer, TagSerializer,
                              WriteRecipeSerializer)
+from core.catalog_cache import ingredients_catalog, tags_catalog
 from core.constants import ARGUMENTS_TO_ACTION_DECORATORS
 from core.servises import (create_and_download_shopping_cart,
+                           create_recipes_export_response,
                            creating_subscription_between_user_and_author,
                            creation_favorite_or_shopping_cart_recipe,
                            delete_recipe_from_favorite_or_shopping_cart,
                            delete_subscription_between_user_and_author,
                            get_filtered_subscription_queryset,
-                           get_subscriptions_serializer_with_pages)
+                           get_recipe_queryset_with_user_flags,
+                           get_similar_recipes,
+                           get_subscriptions_serializer_with_pages,
+                           get_timeline_queryset, get_timeline_recipes,
+                           import_recipes_from_request)
 from recipes.models import Cart, FavoriteRecipe, Ingredient, Recipe, Tag
 
 User = get_user_model()
 
 
-class CustomUserViewSet(UserViewSet):
+class CustomUserViewSet(AsyncActionsMixin, UserViewSet):
     """
     Вьюсет для работы с пользователем.
     Наследуем от базового джосеровского UserViewSet.
     """
 
+    async_actions = ('subscriptions',)
     queryset = User.objects.all()
     serializer_class = CustomUserSerializer
     pagination_class = FoodgramPagination
@@ -68,9 +79,13 @@ class CustomUserViewSet(UserViewSet):
         )
 
 
-class IngredientViewSet(ReadOnlyModelViewSet):
+class IngredientViewSet(
+        AsyncActionsMixin, CatalogCacheMixin, ReadOnlyModelViewSet
+):
     """Вьюсет для модели ингредиентов."""
 
+    async_actions = ('list',)
+    catalog = ingredients_catalog
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = (IsAdminOrReadOnly,)
@@ -79,22 +94,38 @@ class IngredientViewSet(ReadOnlyModelViewSet):
     filterset_class = IngredientFilter
 
 
-class TagViewSet(ReadOnlyModelViewSet):
+class TagViewSet(CatalogCacheMixin, ReadOnlyModelViewSet):
     """Вьюсет для модели тегов."""
 
+    catalog = tags_catalog
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (IsAdminOrReadOnly,)
 
 
-class RecipeViewSet(ModelViewSet):
+class RecipeViewSet(
+        AsyncActionsMixin, ConditionalRecipeMixin, ModelViewSet
+):
     """Вьюсет для модели рецептов."""
 
+    async_actions = ('list', 'timeline')
     queryset = Recipe.objects.all()
     permission_classes = (IsAuthorOrReadOnly | IsAdminOrReadOnly,)
     pagination_class = FoodgramPagination
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, RecipeOrderingFilter)
     filterset_class = RecipeFilter
+    ordering_fields = ('favorites_count', 'carts_count', 'pub_date')
+    unversioned_ordering_fields = ('favorites_count', 'carts_count')
+
+    def get_queryset(self):
+        """
+        Для чтения отдаем queryset с подгруженными связями и
+        аннотированными флагами, чтобы страница рецептов
+        собиралась за фиксированное количество запросов.
+        """
+        if self.request.method in SAFE_METHODS:
+            return get_recipe_queryset_with_user_flags(self.request.user)
+        return super().get_queryset()
 
     def perform_create(self, serializer):
         """Переопределяем метод создания. Добавляем автора."""
@@ -136,10 +167,63 @@ class RecipeViewSet(ModelViewSet):
             model=Cart, user=request.user, id=pk
         )
 
+    @action(**ARGUMENTS_TO_ACTION_DECORATORS.get('public_get_detail'))
+    def similar(self, request, pk):
+        """
+        Веб-сервис похожих рецептов по набору ингредиентов,
+        самые похожие первыми. Доступно без токена.
+        """
+        return Response(self.get_serializer(
+            get_similar_recipes(user=request.user, recipe_id=pk), many=True
+        ).data)
+
     @action(**ARGUMENTS_TO_ACTION_DECORATORS.get('get'))
+    def timeline(self, request):
+        """
+        Веб-сервис ленты рецептов авторов из подписок юзера,
+        новые рецепты первыми. Доступно только авторизированному
+        пользователю. Рецепты выводятся согласно заданной пагинации.
+        """
+        page = self.paginate_queryset(get_timeline_queryset(request.user))
+        return self.get_paginated_response(self.get_serializer(
+            get_timeline_recipes(user=request.user, page=page), many=True
+        ).data)
+
+    @action(
+        **ARGUMENTS_TO_ACTION_DECORATORS.get('get'),
+        renderer_classes=SHOPPING_CART_RENDERERS,
+    )
     def download_shopping_cart(self, request):
         """
         Веб-сервис для скачивания списка покупок.
         Доступно только авторизированному пользователю.
+        Формат файла выбирается параметром ?format=
+        (txt, csv, json, pdf), по умолчанию - txt.
+        """
+        return create_and_download_shopping_cart(
+            user=request.user,
+            export_format=request.accepted_renderer.format,
+        )
+
+    @action(
+        **ARGUMENTS_TO_ACTION_DECORATORS.get('admin_get'),
+        url_path='export',
+        renderer_classes=(NDJSONRecipesRenderer,),
+    )
+    def export_recipes(self, request):
+        """
+        Веб-сервис для выгрузки всех рецептов в NDJSON.
+        Доступно только администратору.
+        """
+        return create_recipes_export_response()
+
+    @action(
+        **ARGUMENTS_TO_ACTION_DECORATORS.get('admin_post'),
+        url_path='import',
+    )
+    def import_recipes(self, request):
+        """
+        Веб-сервис для загрузки рецептов из NDJSON в теле запроса.
+        Доступно только администратору.
         """
-        return create_and_download_shopping_cart(request.user)
+        return import_recipes_from_request(request)
@@ -0,0 +1,5 @@
+"""
+Нагрузочные замеры API Foodgram: синтетические данные,
+замер задержек и количества SQL запросов по маршрутам
+и сравнение с базовой линией. Запуск - команда runbenchmarks.
+"""
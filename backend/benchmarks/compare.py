@@ -0,0 +1,26 @@
+def compare_results(current, baseline, tolerance, min_delta_ms,
+                    metric='p95_ms'):
+    """
+    Сравниваем результаты с базовой линией. Регрессия - рост
+    количества SQL запросов или рост перцентиля metric больше
+    чем на tolerance (доля) и одновременно больше min_delta_ms.
+    Возвращаем список описаний регрессий.
+    """
+    regressions = []
+    for key, base in baseline['results'].items():
+        result = current['results'].get(key)
+        if result is None:
+            regressions.append(f'{key}: маршрут больше не замеряется')
+            continue
+        if result['queries_max'] > base['queries_max']:
+            regressions.append(
+                f'{key}: SQL запросов {base["queries_max"]} -> '
+                f'{result["queries_max"]}'
+            )
+        delta = result[metric] - base[metric]
+        if delta > min_delta_ms and delta > base[metric] * tolerance:
+            regressions.append(
+                f'{key}: {metric} {base[metric]:.1f} -> '
+                f'{result[metric]:.1f} мс'
+            )
+    return regressions
@@ -0,0 +1,121 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from benchmarks.runner import PERCENTILES, percentile
+
+SLOW_CLIENT_HEADERS = 10
+
+
+def build_request(host, path, token=None, headers=()):
+    """Собираем HTTP/1.1 запрос GET с закрытием соединения."""
+    lines = [f'GET {path} HTTP/1.1', f'Host: {host}', 'Connection: close']
+    if token:
+        lines.append(f'Authorization: Token {token}')
+    lines.extend(headers)
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode()
+
+
+async def fetch(host, port, request):
+    """Отправляем запрос и читаем ответ целиком. Возвращаем статус."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(request)
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    return int(response.split(b' ', 2)[1])
+
+
+async def fast_client(host, port, request, deadline, latencies, errors):
+    """Шлем запросы подряд и замеряем время каждого ответа."""
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            status = await fetch(host, port, request)
+        except (OSError, IndexError, ValueError):
+            status = None
+        if status == 200:
+            latencies.append(time.perf_counter() - started)
+        else:
+            errors.append(status)
+
+
+async def slow_client(host, port, path, delay, deadline):
+    """
+    Медленный клиент: передает заголовки запроса по одному
+    с паузой delay, занимая соединение на все время передачи.
+    """
+    headers = [f'X-Slow-Client-{number}: 1'
+               for number in range(SLOW_CLIENT_HEADERS)]
+    while time.monotonic() < deadline:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+        except OSError:
+            await asyncio.sleep(delay)
+            continue
+        try:
+            request = build_request(host, path, headers=headers)
+            for line in request.split(b'\r\n')[:-2]:
+                writer.write(line + b'\r\n')
+                await writer.drain()
+                await asyncio.sleep(delay)
+            writer.write(b'\r\n')
+            await reader.read()
+        except OSError:
+            pass
+        finally:
+            writer.close()
+
+
+async def _run(url, path, clients, slow_clients, slow_delay, duration,
+               token):
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    deadline = time.monotonic() + duration
+    request = build_request(host, path, token)
+    latencies, errors = [], []
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(
+            slow_client(host, port, path, slow_delay, deadline)
+            for _ in range(slow_clients)
+        ),
+        *(
+            fast_client(host, port, request, deadline, latencies, errors)
+            for _ in range(clients)
+        ),
+    )
+    return latencies, errors, time.perf_counter() - started
+
+
+def run_concurrency_benchmark(url, path, clients, slow_clients, slow_delay,
+                              duration, token=None):
+    """
+    Замеряем пропускную способность запущенного сервера: clients
+    клиентов шлют запросы без пауз, пока slow_clients медленных
+    клиентов держат соединения открытыми. Возвращаем количество
+    успешных ответов в секунду и перцентили задержек.
+    """
+    latencies, errors, elapsed = asyncio.run(_run(
+        url, path, clients, slow_clients, slow_delay, duration, token
+    ))
+    result = {
+        'url': url + path,
+        'clients': clients,
+        'slow_clients': slow_clients,
+        'slow_delay': slow_delay,
+        'duration': round(elapsed, 3),
+        'requests': len(latencies),
+        'errors': len(errors),
+        'rps': round(len(latencies) / elapsed, 2),
+    }
+    if latencies:
+        durations = [latency * 1000 for latency in latencies]
+        result.update({
+            f'p{percent}_ms': round(percentile(durations, percent), 3)
+            for percent in PERCENTILES
+        })
+        result['max_ms'] = round(max(durations), 3)
+    return result
@@ -0,0 +1,41 @@
+import tempfile
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import (override_settings, setup_test_environment,
+                               teardown_test_environment)
+
+BENCHMARK_CACHES = {
+    alias: {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': f'benchmark-{alias}',
+    }
+    for alias in ('default', 'shared')
+}
+
+
+@contextmanager
+def benchmark_database():
+    """
+    Временная тестовая БД для замеров. Кеши, медиа и очередь
+    фоновых задач подменяются изолированными, чтобы прогон
+    не затрагивал рабочие данные. Метрики открыты анонимно,
+    как в закрытой сети. БД удаляется на выходе.
+    """
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False
+    )
+    try:
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(
+                BACKGROUND_TASKS_MODE='queue',
+                MEDIA_ROOT=media_root,
+                CACHES=BENCHMARK_CACHES,
+                METRICS_PUBLIC=True,
+            ):
+                yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
@@ -0,0 +1,175 @@
+import re
+from collections import namedtuple
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import F
+from django.test import RequestFactory
+
+from api.filters import RecipeFilter
+from core.constants import CURSOR_PAGINATION_PAGE_SIZE
+from core.servises import (get_filtered_subscription_queryset,
+                           get_recipe_queryset_with_user_flags,
+                           get_timeline_queryset)
+from recipes.models import (Cart, FavoriteRecipe, Recipe,
+                            ShoppingCartIngredient, Tag)
+from users.models import Subscription
+
+User = get_user_model()
+
+QueryPlan = namedtuple('QueryPlan', 'name sql plan seq_scans')
+
+SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?(?P<table>\w+)(?: AS \w+)?$')
+
+
+class AuditError(Exception):
+    """Ошибка подготовки данных для аудита планов запросов."""
+
+
+def get_audit_context():
+    """
+    Выбираем из БД объекты, на которых строятся канонические
+    запросы: юзера, автора, теги, рецепт и слово для поиска.
+    """
+    user = User.objects.order_by('id').first()
+    recipe = Recipe.objects.order_by('id').first()
+    if user is None or recipe is None:
+        raise AuditError('В БД нет юзеров или рецептов для аудита!')
+    return {
+        'user': user,
+        'author_id': recipe.author_id,
+        'recipe_id': recipe.id,
+        'search': recipe.name.split()[0],
+        'tag_slugs': list(
+            Tag.objects.values_list('slug', flat=True)[:2]
+        ),
+    }
+
+
+def _filter_recipes(user, params, ordering=None):
+    """Рецепты после RecipeFilter, как их получает список API."""
+    request = RequestFactory().get('/api/recipes/', params)
+    request.user = user
+    queryset = RecipeFilter(
+        request.GET,
+        queryset=get_recipe_queryset_with_user_flags(user),
+        request=request,
+    ).qs
+    if ordering:
+        queryset = queryset.order_by(*ordering)
+    return queryset[:CURSOR_PAGINATION_PAGE_SIZE]
+
+
+def iter_canonical_queries(context):
+    """
+    Канонические запросы горячих путей API: список рецептов
+    с фильтрами, поиском и сортировками, похожие рецепты, подписки,
+    лента, избранное, корзина и список покупок юзера.
+    """
+    user = context['user']
+    yield 'recipes', _filter_recipes(user, {})
+    yield 'recipe_detail', get_recipe_queryset_with_user_flags(
+        user
+    ).filter(pk=context['recipe_id'])
+    yield 'similar_recipes', get_recipe_queryset_with_user_flags(
+        user
+    ).filter(
+        similar_to_recipes__recipe_id=context['recipe_id']
+    ).order_by('-similar_to_recipes__score', '-id')
+    yield 'recipes_by_author', _filter_recipes(
+        user, {'author': context['author_id']}
+    )
+    yield 'recipes_by_tags', _filter_recipes(
+        user, {'tags': context['tag_slugs']}
+    )
+    yield 'recipes_search', _filter_recipes(
+        user, {'search': context['search']}
+    )
+    yield 'recipes_favorited', _filter_recipes(user, {'is_favorited': 1})
+    yield 'recipes_not_favorited', _filter_recipes(
+        user, {'is_favorited': 0}
+    )
+    yield 'recipes_in_shopping_cart', _filter_recipes(
+        user, {'is_in_shopping_cart': 1}
+    )
+    yield 'recipes_by_favorites_count', _filter_recipes(
+        user, {}, ordering=('-favorites_count', '-id')
+    )
+    yield 'subscriptions', get_filtered_subscription_queryset(
+        user
+    )[:CURSOR_PAGINATION_PAGE_SIZE]
+    yield 'timeline', get_timeline_queryset(
+        user
+    )[:CURSOR_PAGINATION_PAGE_SIZE]
+    yield 'user_favorites', FavoriteRecipe.objects.filter(user=user)
+    yield 'user_cart', Cart.objects.filter(user=user)
+    yield 'user_subscriptions', Subscription.objects.filter(user=user)
+    yield 'shopping_cart_totals', ShoppingCartIngredient.objects.filter(
+        user=user
+    ).values(
+        'ingredient__name',
+        'ingredient__measurement_unit',
+        in_shopping_cart_ingredient_amount=F('amount'),
+    ).order_by('ingredient__name')
+
+
+def _iter_postgresql_nodes(node):
+    yield node
+    for child in node.get('Plans', ()):
+        yield from _iter_postgresql_nodes(child)
+
+
+def explain_queryset(queryset):
+    """
+    Получаем план запроса и таблицы, которые читаются
+    последовательным сканированием. PostgreSQL отдает план в
+    JSON, в SQLite ищутся строки SCAN без использования индекса.
+    """
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0][0]['Plan']
+            return sql, plan, sorted({
+                node['Relation Name']
+                for node in _iter_postgresql_nodes(plan)
+                if node['Node Type'] == 'Seq Scan'
+            })
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        plan = [row[-1] for row in cursor.fetchall()]
+    tables = connection.introspection.table_names()
+    return sql, plan, sorted({
+        match.group('table')
+        for match in map(SQLITE_SCAN.match, plan)
+        if match and match.group('table') in tables
+    })
+
+
+def count_rows(table):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}'
+        )
+        return cursor.fetchone()[0]
+
+
+def audit_query_plans(context, min_rows):
+    """
+    Строим планы канонических запросов. Последовательное
+    сканирование таблиц меньше min_rows строк не учитывается:
+    на маленьких таблицах оно дешевле индекса.
+    """
+    row_counts = {}
+    plans = []
+    for name, queryset in iter_canonical_queries(context):
+        sql, plan, tables = explain_queryset(queryset)
+        for table in tables:
+            if table not in row_counts:
+                row_counts[table] = count_rows(table)
+        plans.append(QueryPlan(
+            name,
+            sql,
+            plan,
+            [table for table in tables if row_counts[table] >= min_rows],
+        ))
+    return plans
@@ -0,0 +1,176 @@
+import math
+import platform
+import time
+
+import django
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver
+from rest_framework.test import APIClient
+
+from benchmarks.scenarios import SCENARIOS
+from benchmarks.seed import seed_dataset
+from recipes.models import Cart, FavoriteRecipe
+from users.models import Subscription
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+class BenchmarkError(Exception):
+    """Ответ маршрута не совпал с ожидаемым статусом."""
+
+
+def percentile(values, percent):
+    """Перцентиль по методу ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def iter_route_names(patterns, namespace=''):
+    """Получаем имена всех маршрутов с учетом пространств имен."""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            prefix = namespace
+            if pattern.namespace:
+                prefix = f'{namespace}{pattern.namespace}:'
+            yield from iter_route_names(pattern.url_patterns, prefix)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield f'{namespace}{pattern.name}'
+
+
+def get_api_route_names():
+    """Имена маршрутов из api/urls.py без суффиксов форматов."""
+    return sorted({
+        name for name in iter_route_names(get_resolver().url_patterns)
+        if name.startswith('api:')
+    })
+
+
+def get_step_key(step):
+    key = f'{step.route} {step.method}'
+    return f'{key} [{step.label}]' if step.label else key
+
+
+def perform_step(client, step, token):
+    """Выполняем запрос шага и замеряем время и SQL запросы."""
+    if step.auth is True:
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+    elif step.auth:
+        client.credentials(HTTP_AUTHORIZATION=f'Token {step.auth}')
+    else:
+        client.credentials()
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        response = getattr(client, step.method.lower())(
+            step.path, step.data, format='json'
+        )
+        if response.streaming:
+            b''.join(response.streaming_content)
+        duration = time.perf_counter() - started
+    if response.status_code != step.status:
+        raise BenchmarkError(
+            f'{get_step_key(step)}: ожидался статус {step.status}, '
+            f'получен {response.status_code}: {getattr(response, "data", "")}'
+        )
+    return response, duration, len(queries)
+
+
+def run_scenario(client, scenario, context, iteration, samples):
+    """Проходим шаги сценария, передавая в него ответы."""
+    steps = scenario(context, iteration)
+    response = None
+    while True:
+        try:
+            step = steps.send(response)
+        except StopIteration:
+            return
+        response, duration, queries = perform_step(
+            client, step, context['token']
+        )
+        if samples is not None:
+            key = get_step_key(step)
+            samples.setdefault(key, {'route': step.route, 'runs': []})
+            samples[key]['runs'].append((duration, queries))
+
+
+def summarize(samples):
+    """Считаем перцентили задержек и диапазон количества запросов."""
+    results = {}
+    for key, sample in sorted(samples.items()):
+        durations = [duration * 1000 for duration, _ in sample['runs']]
+        queries = [count for _, count in sample['runs']]
+        results[key] = {
+            'route': sample['route'],
+            'runs': len(durations),
+            'mean_ms': round(sum(durations) / len(durations), 3),
+            **{
+                f'p{percent}_ms': round(percentile(durations, percent), 3)
+                for percent in PERCENTILES
+            },
+            'max_ms': round(max(durations), 3),
+            'queries_min': min(queries),
+            'queries_max': max(queries),
+        }
+    return results
+
+
+def build_context(scale, seed):
+    """Заполняем БД и выбираем объекты для сценариев-переключателей."""
+    context = seed_dataset(scale, seed)
+    user = context['user']
+    context['free_recipe_id'] = next(
+        recipe_id for recipe_id in context['recipe_ids']
+        if not FavoriteRecipe.objects.filter(
+            user=user, recipe_id=recipe_id
+        ).exists()
+        and not Cart.objects.filter(user=user, recipe_id=recipe_id).exists()
+    )
+    context['free_author_id'] = next(
+        user_id for user_id in context['user_ids'][1:]
+        if not Subscription.objects.filter(
+            user=user, author_id=user_id
+        ).exists()
+    )
+    context['login_email'] = (
+        type(user).objects.get(id=context['user_ids'][1]).email
+    )
+    return context
+
+
+def run_benchmarks(scale, iterations, warmup, seed=0):
+    """
+    Заполняем БД, прогоняем сценарии warmup раз без замеров
+    и iterations раз с замерами. Возвращаем результаты для
+    сохранения в JSON.
+    """
+    started = time.perf_counter()
+    context = build_context(scale, seed)
+    seed_seconds = time.perf_counter() - started
+    client = APIClient()
+    samples = {}
+    for iteration in range(warmup + iterations):
+        for scenario in SCENARIOS:
+            run_scenario(
+                client, scenario, context, iteration,
+                samples if iteration >= warmup else None,
+            )
+    results = summarize(samples)
+    covered = {result['route'] for result in results.values()}
+    return {
+        'meta': {
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'scale': scale,
+            'iterations': iterations,
+            'warmup': warmup,
+            'seed': seed,
+            'seed_seconds': round(seed_seconds, 3),
+            'not_covered_routes': [
+                name for name in get_api_route_names()
+                if name not in covered
+            ],
+        },
+        'results': results,
+    }
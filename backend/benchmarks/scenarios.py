@@ -0,0 +1,191 @@
+import base64
+from collections import namedtuple
+
+from benchmarks.seed import (BENCHMARK_IMAGE, BENCHMARK_PASSWORD,
+                             number_to_letters)
+
+Step = namedtuple('Step', 'route method path data auth status label')
+Step.__new__.__defaults__ = (None, True, 200, '')
+
+BENCHMARK_IMAGE_DATA = (
+    'data:image/png;base64,' + base64.b64encode(BENCHMARK_IMAGE).decode()
+)
+NEW_PASSWORD = 'benchmark-password-new'
+
+
+def read_catalogs(context, iteration):
+    ingredient_id = context['ingredient_ids'][0]
+    tag_id = context['tag_ids'][0]
+    yield Step('api:api-root', 'GET', '/api/')
+    yield Step('api:ingredients-list', 'GET', '/api/ingredients/')
+    yield Step(
+        'api:ingredients-list', 'GET', '/api/ingredients/?name=%D0%BC',
+        label='search',
+    )
+    yield Step(
+        'api:ingredients-detail', 'GET', f'/api/ingredients/{ingredient_id}/'
+    )
+    yield Step('api:tags-list', 'GET', '/api/tags/')
+    yield Step('api:tags-detail', 'GET', f'/api/tags/{tag_id}/')
+
+
+def read_recipes(context, iteration):
+    recipe_id = context['recipe_ids'][iteration % len(context['recipe_ids'])]
+    yield Step(
+        'api:recipes-list', 'GET', '/api/recipes/?limit=6', auth=False,
+        label='anonymous',
+    )
+    yield Step('api:recipes-list', 'GET', '/api/recipes/?limit=6')
+    deep_page = max(len(context['recipe_ids']) // 6, 1)
+    yield Step(
+        'api:recipes-list', 'GET', f'/api/recipes/?page={deep_page}&limit=6',
+        label='deep page',
+    )
+    yield Step(
+        'api:recipes-list', 'GET',
+        '/api/recipes/?limit=6&pagination=cursor', label='cursor',
+    )
+    yield Step(
+        'api:recipes-list', 'GET',
+        '/api/recipes/?limit=6&is_favorited=1&tags=breakfast&tags=lunch',
+        label='filters',
+    )
+    yield Step(
+        'api:recipes-list', 'GET',
+        '/api/recipes/?limit=6&ordering=-favorites_count',
+        label='popular',
+    )
+    yield Step(
+        'api:recipes-list', 'GET',
+        '/api/recipes/?limit=6&search=%D1%80%D0%B5%D1%86%D0%B5%D0%BF%D1%82+12',
+        label='search',
+    )
+    yield Step('api:recipes-detail', 'GET', f'/api/recipes/{recipe_id}/')
+    yield Step(
+        'api:recipes-similar', 'GET', f'/api/recipes/{recipe_id}/similar/'
+    )
+    for export_format in ('txt', 'pdf'):
+        yield Step(
+            'api:recipes-download-shopping-cart', 'GET',
+            f'/api/recipes/download_shopping_cart/?format={export_format}',
+            label=export_format,
+        )
+
+
+def write_recipe(context, iteration):
+    response = yield Step(
+        'api:recipes-list', 'POST', '/api/recipes/',
+        data={
+            'ingredients': [
+                {'id': ingredient_id, 'amount': 10}
+                for ingredient_id in context['ingredient_ids'][:5]
+            ],
+            'tags': context['tag_ids'][:2],
+            'image': BENCHMARK_IMAGE_DATA,
+            'name': f'Новый рецепт {iteration}',
+            'text': 'Описание нового рецепта',
+            'cooking_time': 10,
+        },
+        status=201,
+    )
+    recipe_id = response.json()['id']
+    yield Step(
+        'api:recipes-detail', 'PATCH', f'/api/recipes/{recipe_id}/',
+        data={
+            'ingredients': [
+                {'id': ingredient_id, 'amount': 20}
+                for ingredient_id in context['ingredient_ids'][3:8]
+            ],
+            'tags': context['tag_ids'][1:],
+            'name': f'Измененный рецепт {iteration}',
+            'text': 'Новое описание',
+            'cooking_time': 15,
+        },
+    )
+    yield Step(
+        'api:recipes-detail', 'DELETE', f'/api/recipes/{recipe_id}/',
+        status=204,
+    )
+
+
+def toggle_recipe_relations(context, iteration):
+    recipe_id = context['free_recipe_id']
+    for route, action in (
+        ('api:recipes-favorite', 'favorite'),
+        ('api:recipes-shopping-cart', 'shopping_cart'),
+    ):
+        path = f'/api/recipes/{recipe_id}/{action}/'
+        yield Step(route, 'POST', path, status=201)
+        yield Step(route, 'DELETE', path, status=204)
+
+
+def read_users(context, iteration):
+    user_id = context['user_ids'][iteration % len(context['user_ids'])]
+    yield Step('api:users-list', 'GET', '/api/users/?limit=6')
+    yield Step('api:users-detail', 'GET', f'/api/users/{user_id}/')
+    yield Step('api:users-me', 'GET', '/api/users/me/')
+    yield Step(
+        'api:users-subscriptions', 'GET',
+        '/api/users/subscriptions/?limit=6&recipes_limit=3',
+    )
+    yield Step('api:recipes-timeline', 'GET', '/api/recipes/timeline/?limit=6')
+    yield Step(
+        'api:recipes-timeline', 'GET',
+        '/api/recipes/timeline/?limit=6&pagination=cursor', label='cursor',
+    )
+
+
+def toggle_subscription(context, iteration):
+    path = f'/api/users/{context["free_author_id"]}/subscribe/'
+    yield Step('api:users-subscribe', 'POST', path, status=201)
+    yield Step('api:users-subscribe', 'DELETE', path, status=204)
+
+
+def manage_accounts(context, iteration):
+    yield Step(
+        'api:users-list', 'POST', '/api/users/', auth=False, status=201,
+        data={
+            'email': f'new{iteration}@foodgram.test',
+            'username': f'new_{number_to_letters(iteration)}',
+            'first_name': 'Новый',
+            'last_name': 'Пользователь',
+            'password': BENCHMARK_PASSWORD,
+        },
+        label='register',
+    )
+    login = yield Step(
+        'api:login', 'POST', '/api/auth/token/login/', auth=False,
+        data={
+            'email': context['login_email'],
+            'password': BENCHMARK_PASSWORD,
+        },
+    )
+    yield Step(
+        'api:logout', 'POST', '/api/auth/token/logout/', status=204,
+        auth=login.json()['auth_token'],
+    )
+    for current, new in (
+        (BENCHMARK_PASSWORD, NEW_PASSWORD),
+        (NEW_PASSWORD, BENCHMARK_PASSWORD),
+    ):
+        yield Step(
+            'api:users-set-password', 'POST', '/api/users/set_password/',
+            data={'current_password': current, 'new_password': new},
+            status=204,
+        )
+
+
+def read_metrics(context, iteration):
+    yield Step('api:metrics', 'GET', '/api/_metrics', auth=False)
+
+
+SCENARIOS = (
+    read_catalogs,
+    read_recipes,
+    write_recipe,
+    toggle_recipe_relations,
+    read_users,
+    toggle_subscription,
+    manage_accounts,
+    read_metrics,
+)
@@ -0,0 +1,208 @@
+import io
+import os
+import random
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+from rest_framework.authtoken.models import Token
+
+from core.constants import LOADER_BATCH_SIZE
+from core.loaders import iter_records
+from core.recipe_relations import reconcile_recipe_counters
+from core.shopping_cart import get_expected_shopping_cart_totals
+from core.similar_recipes import build_similar_recipes
+from core.timeline import reconcile_timelines
+from recipes.models import (Cart, FavoriteRecipe, Ingredient, Recipe,
+                            RecipeIngredientAmount, ShoppingCartIngredient,
+                            Tag)
+from users.models import Subscription
+
+User = get_user_model()
+
+BENCHMARK_PASSWORD = 'benchmark-password'
+
+
+def _build_benchmark_image():
+    """Небольшая PNG картинка для рецептов."""
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), (200, 120, 40)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+BENCHMARK_IMAGE = _build_benchmark_image()
+
+
+def number_to_letters(number):
+    """Записываем число латинскими буквами для юзернеймов."""
+    letters = ''
+    while True:
+        number, rest = divmod(number, 26)
+        letters = chr(ord('a') + rest) + letters
+        if not number:
+            return letters
+
+
+DEFAULT_SCALE = {
+    'users': 200,
+    'recipes': 2000,
+    'ingredients': 500,
+    'ingredients_per_recipe': 8,
+    'favorites_per_user': 20,
+    'carts_per_user': 5,
+    'subscriptions_per_user': 10,
+}
+
+
+def _sample_pairs(generator, user_ids, target_ids, per_user, exclude=None):
+    """Случайные уникальные пары (пользователь, объект)."""
+    for user_id in user_ids:
+        targets = [
+            target_id for target_id in target_ids
+            if exclude is None or target_id != exclude(user_id)
+        ]
+        for target_id in generator.sample(
+            targets, min(per_user, len(targets))
+        ):
+            yield user_id, target_id
+
+
+def seed_dataset(scale, seed=0):
+    """
+    Заполняем пустую БД синтетическими данными масштаба scale
+    пачками bulk_create. Ингредиенты берутся из
+    data/ingredients.json. Предрасчитанные суммы списков
+    покупок, счетчики рецептов, ленты подписок и похожие
+    рецепты пересчитываются в конце.
+    Возвращаем данные для сценариев замеров.
+    """
+    generator = random.Random(seed)
+    batch_size = LOADER_BATCH_SIZE
+    password = make_password(BENCHMARK_PASSWORD)
+    User.objects.bulk_create(
+        (
+            User(
+                email=f'benchmark{number}@foodgram.test',
+                username=f'benchmark_{number_to_letters(number)}',
+                first_name='Бенчмарк',
+                last_name='Пользователь',
+                password=password,
+            )
+            for number in range(scale['users'])
+        ),
+        batch_size=batch_size,
+    )
+    user_ids = list(User.objects.values_list('id', flat=True))
+
+    records = iter_records(
+        os.path.join(settings.BASE_DIR, 'data', 'ingredients.json')
+    )
+    Ingredient.objects.bulk_create(
+        (
+            Ingredient(**record)
+            for _, record in zip(range(scale['ingredients']), records)
+        ),
+        batch_size=batch_size,
+    )
+    ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+    for record in iter_records(
+        os.path.join(settings.BASE_DIR, 'data', 'tags.json')
+    ):
+        Tag.objects.create(**record)
+    tag_ids = list(Tag.objects.values_list('id', flat=True))
+
+    image = default_storage.save(
+        'recipes/images/benchmark.png', ContentFile(BENCHMARK_IMAGE)
+    )
+    Recipe.objects.bulk_create(
+        (
+            Recipe(
+                author_id=generator.choice(user_ids),
+                name=f'Рецепт {number}',
+                text='Описание рецепта для замеров',
+                cooking_time=generator.randint(1, 120),
+                image=image,
+                image_status=Recipe.ImageStatus.READY,
+            )
+            for number in range(scale['recipes'])
+        ),
+        batch_size=batch_size,
+    )
+    recipe_ids = list(Recipe.objects.values_list('id', flat=True))
+    Recipe.tags.through.objects.bulk_create(
+        (
+            Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id in recipe_ids
+            for tag_id in generator.sample(
+                tag_ids, generator.randint(1, len(tag_ids))
+            )
+        ),
+        batch_size=batch_size,
+    )
+    RecipeIngredientAmount.objects.bulk_create(
+        (
+            RecipeIngredientAmount(
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_id,
+                amount=generator.randint(1, 500),
+            )
+            for recipe_id in recipe_ids
+            for ingredient_id in generator.sample(
+                ingredient_ids,
+                min(scale['ingredients_per_recipe'], len(ingredient_ids)),
+            )
+        ),
+        batch_size=batch_size,
+    )
+
+    for model, per_user in (
+        (FavoriteRecipe, scale['favorites_per_user']),
+        (Cart, scale['carts_per_user']),
+    ):
+        model.objects.bulk_create(
+            (
+                model(user_id=user_id, recipe_id=recipe_id)
+                for user_id, recipe_id in _sample_pairs(
+                    generator, user_ids, recipe_ids, per_user
+                )
+            ),
+            batch_size=batch_size,
+        )
+    Subscription.objects.bulk_create(
+        (
+            Subscription(user_id=user_id, author_id=author_id)
+            for user_id, author_id in _sample_pairs(
+                generator, user_ids, user_ids,
+                scale['subscriptions_per_user'],
+                exclude=lambda user_id: user_id,
+            )
+        ),
+        batch_size=batch_size,
+    )
+    ShoppingCartIngredient.objects.bulk_create(
+        (
+            ShoppingCartIngredient(
+                user_id=row['user_id'],
+                ingredient_id=row['ingredient_id'],
+                amount=row['total_amount'],
+            )
+            for row in get_expected_shopping_cart_totals().iterator()
+        ),
+        batch_size=batch_size,
+    )
+    reconcile_recipe_counters()
+    reconcile_timelines()
+    build_similar_recipes(*recipe_ids)
+
+    user = User.objects.get(id=user_ids[0])
+    return {
+        'user': user,
+        'token': Token.objects.create(user=user).key,
+        'user_ids': user_ids,
+        'recipe_ids': recipe_ids,
+        'ingredient_ids': ingredient_ids,
+        'tag_ids': tag_ids,
+    }
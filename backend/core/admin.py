@@ -0,0 +1,24 @@
+from django.contrib import admin
+
+from core.models import BackgroundTask
+
+
+@admin.register(BackgroundTask)
+class BackgroundTaskAdmin(admin.ModelAdmin):
+    """Настройка админки для фоновых задач."""
+
+    list_display = (
+        'name',
+        'status',
+        'attempts',
+        'run_at',
+    )
+    list_filter = (
+        'status',
+        'name',
+    )
+    readonly_fields = (
+        'started_at',
+        'last_error',
+        'created_at',
+    )
@@ -0,0 +1,81 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIHandler
+from django.db import connections
+
+_STREAM_END = object()
+
+
+def _next_part(iterator):
+    return next(iterator, _STREAM_END)
+
+
+async def iterate_in_thread(iterator, executor):
+    """
+    Асинхронно перебираем синхронный итератор. Части читаются
+    в потоках executor, а не в цикле событий.
+    """
+    while True:
+        part = await sync_to_async(
+            _next_part, thread_sensitive=False, executor=executor
+        )(iterator)
+        if part is _STREAM_END:
+            return
+        yield part
+
+
+class StreamingASGIHandler(ASGIHandler):
+    """
+    ASGI обработчик, который читает потоковые ответы вне цикла
+    событий. ASGIHandler в Django 3.2 перебирает тело
+    StreamingHttpResponse прямо в цикле событий, и генераторы
+    на iterator() ORM падают с SynchronousOnlyOperation.
+    """
+
+    @staticmethod
+    def get_response_headers(response):
+        """Собираем заголовки и cookies ответа для ASGI."""
+        headers = []
+        for header, value in response.items():
+            if isinstance(header, str):
+                header = header.encode('ascii')
+            if isinstance(value, str):
+                value = value.encode('latin1')
+            headers.append((bytes(header), bytes(value)))
+        for cookie in response.cookies.values():
+            headers.append((
+                b'Set-Cookie',
+                cookie.output(header='').encode('ascii').strip(),
+            ))
+        return headers
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': self.get_response_headers(response),
+        })
+        # Один поток на ответ: курсор iterator() читается в том
+        # потоке, который его открыл.
+        executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='asgi-stream'
+        )
+        try:
+            async for part in iterate_in_thread(iter(response), executor):
+                for chunk, _ in self.chunk_bytes(part):
+                    await send({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+            await send({'type': 'http.response.body'})
+        finally:
+            await sync_to_async(response.close, thread_sensitive=True)()
+            await sync_to_async(
+                connections.close_all, thread_sensitive=False,
+                executor=executor,
+            )()
+            executor.shutdown(wait=False)
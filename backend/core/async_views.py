@@ -0,0 +1,49 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+from core.executors import LazyThreadPool
+
+_executor = LazyThreadPool('ASYNC_VIEWS_THREADS', 'async-view')
+
+
+def get_executor():
+    """
+    Получаем пул потоков для синхронной части асинхронных
+    представлений. Каждый поток держит свое соединение с БД,
+    поэтому размер пула ограничивает и число соединений.
+    """
+    return _executor.get()
+
+
+def _run_view(view, request, *args, **kwargs):
+    """
+    Выполняем синхронное представление в потоке пула и сразу
+    рендерим ответ. Соединения с БД закрываются по тем же
+    правилам, что и в начале и конце обычного запроса.
+    """
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if callable(getattr(response, 'render', None)):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_view(view):
+    """
+    Оборачиваем синхронное представление в асинхронное.
+    Под ASGI цикл событий не блокируется на время работы ORM:
+    представление выполняется в отдельном пуле потоков без
+    привязки к потоку запроса (thread_sensitive=False), поэтому
+    медленные клиенты и запросы к БД не занимают воркер.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        return await sync_to_async(
+            _run_view, thread_sensitive=False, executor=get_executor()
+        )(view, request, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,109 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from recipes.models import Tag
+
+
+class CatalogCache:
+    """
+    Версионированный двухуровневый кеш справочника.
+    Перед общим кешем (файловым или Redis-совместимым) стоит
+    локальный кеш процесса. Версия справочника - время его
+    последнего изменения; она входит в ключи данных, поэтому
+    сброс сводится к записи новой версии. Локальная копия
+    версии живет CATALOG_CACHE_VERSION_TTL секунд, это граница
+    рассинхронизации между процессами.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.version_key = f'catalog:{name}:version'
+
+    @property
+    def local(self):
+        return caches[settings.CATALOG_LOCAL_CACHE_ALIAS]
+
+    @property
+    def shared(self):
+        return caches[settings.CATALOG_SHARED_CACHE_ALIAS]
+
+    def get_version(self):
+        """
+        Получаем текущую версию справочника. Если версии нет
+        ни в одном из кешей - считаем справочник измененным сейчас.
+        """
+        version = self.local.get(self.version_key)
+        if version is None:
+            version = self.shared.get(self.version_key)
+            if version is None:
+                version = time.time()
+                if not self.shared.add(
+                    self.version_key, version, timeout=None
+                ):
+                    version = self.shared.get(self.version_key, version)
+            self.local.set(
+                self.version_key,
+                version,
+                timeout=settings.CATALOG_CACHE_VERSION_TTL,
+            )
+        return version
+
+    def invalidate(self):
+        """Сбрасываем кеш справочника записью новой версии."""
+        version = time.time()
+        self.shared.set(self.version_key, version, timeout=None)
+        self.local.set(
+            self.version_key,
+            version,
+            timeout=settings.CATALOG_CACHE_VERSION_TTL,
+        )
+
+    def get_data_key(self, key, version):
+        return f'catalog:{self.name}:{version}:{key}'
+
+    def get(self, key, version=None):
+        """Ищем данные сначала в локальном, затем в общем кеше."""
+        data_key = self.get_data_key(key, version or self.get_version())
+        value = self.local.get(data_key)
+        if value is None:
+            value = self.shared.get(data_key)
+            if value is not None:
+                self.local.set(
+                    data_key, value, timeout=settings.CATALOG_CACHE_TIMEOUT
+                )
+        return value
+
+    def set(self, key, value, version=None):
+        """Записываем данные в оба уровня кеша."""
+        data_key = self.get_data_key(key, version or self.get_version())
+        for cache in (self.local, self.shared):
+            cache.set(data_key, value, timeout=settings.CATALOG_CACHE_TIMEOUT)
+
+    def get_or_set(self, key, default):
+        """
+        Получаем данные из кеша, а при промахе вычисляем
+        их вызовом default() и сохраняем.
+        """
+        version = self.get_version()
+        value = self.get(key, version)
+        if value is None:
+            value = default()
+            self.set(key, value, version)
+        return value
+
+
+tags_catalog = CatalogCache('tags')
+ingredients_catalog = CatalogCache('ingredients')
+
+
+def get_tags_by_id():
+    """Получаем словарь всех тегов по id из кеша справочника."""
+    return tags_catalog.get_or_set(
+        'tags_by_id',
+        lambda: {
+            tag['id']: tag
+            for tag in Tag.objects.values('id', 'name', 'color', 'slug')
+        },
+    )
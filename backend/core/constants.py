@@ -1,4 +1,4 @@
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 
 MAX_EMAEL_LENGHT = 254
 MAX_TAG_COLOR_LENGHT = 7
@@ -9,6 +9,44 @@ MIN_HEX_COLOR_LENGHT = 4
 MIN_MEASUREMENT_UNIT_LENGHT = 1
 MIN_COOKING_TIME = 1
 MIN_INGREDIENT_AMOUNT = 1
+SHOPPING_CART_FILENAME = 'foodgram_shopping_cart'
+RECIPE_EXPORT_FILENAME = 'foodgram_recipes'
+SHOPPING_CART_ITERATOR_CHUNK_SIZE = 2000
+SHOPPING_CART_REBUILD_BATCH_SIZE = 1000
+INGREDIENT_SEARCH_NGRAM_SIZE = 3
+LOADER_BATCH_SIZE = 1000
+LOADER_READ_CHUNK_SIZE = 64 * 1024
+PDF_PAGE_WIDTH = 595
+PDF_PAGE_HEIGHT = 842
+PDF_MARGIN = 50
+PDF_FONT_SIZE = 11
+PDF_LEADING = 15
+PDF_FONT_NAME = 'DejaVuSans'
+PDF_FONT_FILENAME = 'DejaVuSans.ttf'
+SUBSCRIPTION_RECIPES_ORDERING = ('-pub_date', 'name')
+CURSOR_PAGINATION_PAGE_SIZE = 6
+BASE64_DECODE_CHUNK_SIZE = 64 * 1024
+RECIPE_IMAGE_SPOOL_SIZE = 1024 * 1024
+RECIPE_IMAGE_MAX_PIXELS = 50_000_000
+RECIPE_IMAGE_MAX_SIZE = 1600
+RECIPE_IMAGE_QUALITY = 80
+RUNTASKS_BATCH_SIZE = 100
+STALE_BACKGROUND_TASK_ERROR = 'Задача не завершилась за отведенное время'
+RECIPE_TRANSFER_BATCH_SIZE = 500
+SIMILAR_RECIPES_LIMIT = 10
+SIMILAR_RECIPES_BATCH_SIZE = 200
+METRICS_DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+METRICS_QUERY_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+METRICS_WAIT_BUCKETS = (
+    0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10,
+)
+METRICS_QUERY_SHAPE_MAX_LENGTH = 300
+RECIPE_IMAGE_THUMBNAIL_SIZES = {
+    'small': 320,
+    'medium': 640,
+}
 ARGUMENTS_TO_ACTION_DECORATORS = {
     'post_del': {
         'methods': ('post', 'delete',),
@@ -19,4 +57,19 @@ ARGUMENTS_TO_ACTION_DECORATORS = {
         'detail': False,
         'permission_classes': (IsAuthenticated,),
     },
+    'public_get_detail': {
+        'methods': ('get',),
+        'detail': True,
+        'permission_classes': (AllowAny,),
+    },
+    'admin_get': {
+        'methods': ('get',),
+        'detail': False,
+        'permission_classes': (IsAdminUser,),
+    },
+    'admin_post': {
+        'methods': ('post',),
+        'detail': False,
+        'permission_classes': (IsAdminUser,),
+    },
 }
@@ -0,0 +1,98 @@
+import threading
+import time
+
+from django.conf import settings
+from psycopg2 import Error, OperationalError
+from psycopg2.pool import ThreadedConnectionPool
+
+from core.metrics import registry
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """
+    Пул соединений процесса с ожиданием свободного соединения.
+    ThreadedConnectionPool при исчерпании сразу падает, поэтому
+    выдача ограничена семафором: поток ждет освобождения
+    соединения не дольше timeout секунд. Время ожидания
+    попадает в метрики, по нему подбирается число воркеров
+    и размер пула.
+    """
+
+    def __init__(self, alias, conn_params, min_size, max_size, timeout):
+        self.alias = alias
+        self.timeout = timeout
+        self.slots = threading.BoundedSemaphore(max_size)
+        self.pool = ThreadedConnectionPool(min_size, max_size, **conn_params)
+
+    def checkout(self, health_check=False):
+        """
+        Получаем соединение из пула. При health_check соединение
+        проверяется запросом SELECT 1, разорванное закрывается и
+        заменяется новым.
+        """
+        started_at = time.perf_counter()
+        if not self.slots.acquire(timeout=self.timeout):
+            raise OperationalError(
+                f'Нет свободных соединений в пуле {self.alias} '
+                f'за {self.timeout} с.'
+            )
+        registry.observe(
+            'foodgram_db_pool_checkout_wait_seconds',
+            {'alias': self.alias},
+            time.perf_counter() - started_at,
+        )
+        try:
+            connection = self.pool.getconn()
+            if health_check and not self.is_usable(connection):
+                self.pool.putconn(connection, close=True)
+                connection = self.pool.getconn()
+        except Exception:
+            self.slots.release()
+            raise
+        return connection
+
+    def release(self, connection, close=False):
+        """
+        Возвращаем соединение в пул. Незавершенная транзакция
+        откатывается пулом, закрытое соединение отбрасывается.
+        """
+        try:
+            self.pool.putconn(connection, close=close or connection.closed)
+        finally:
+            self.slots.release()
+
+    @staticmethod
+    def is_usable(connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            if not connection.autocommit:
+                connection.rollback()
+        except Error:
+            return False
+        return True
+
+
+def get_pool(alias, conn_params):
+    """
+    Получаем пул соединений процесса для базы alias. Пулы
+    различаются и по имени БД: тестовый прогон подменяет
+    NAME у существующего подключения.
+    """
+    key = (alias, conn_params.get('database'))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is not None:
+            return pool
+        pool = ConnectionPool(
+            alias,
+            conn_params,
+            settings.DB_POOL_MIN_SIZE,
+            settings.DB_POOL_MAX_SIZE,
+            settings.DB_POOL_TIMEOUT,
+        )
+        _pools[key] = pool
+        return pool
@@ -0,0 +1,28 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+
+class LazyThreadPool:
+    """
+    Пул потоков процесса, который создается при первом
+    обращении. Размер пула берется из настройки workers_setting,
+    создание защищено блокировкой от гонки потоков.
+    """
+
+    def __init__(self, workers_setting, thread_name_prefix):
+        self.workers_setting = workers_setting
+        self.thread_name_prefix = thread_name_prefix
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Получаем пул, создавая его при первом вызове."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, self.workers_setting),
+                    thread_name_prefix=self.thread_name_prefix,
+                )
+            return self._executor
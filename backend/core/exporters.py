@@ -0,0 +1,149 @@
+import csv
+import json
+
+from core.pdf import StreamingPDFWriter
+
+
+class _EchoBuffer:
+    """Псевдо-буфер для csv.writer, возвращающий записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+class BaseShoppingCartExporter:
+    """
+    Базовый класс выгрузки списка покупок.
+    Наследники задают формат, тип содержимого и
+    генератор частей файла stream(). Ингредиенты
+    передаются итератором и не держатся в памяти целиком.
+    """
+
+    format = None
+    content_type = None
+
+    def __init__(self, user, ingredients, date):
+        self.user = user
+        self.ingredients = ingredients
+        self.date = date
+
+    def get_header_lines(self):
+        """Получаем приветствие в начале списка покупок."""
+        return (
+            f'Привет, {self.user.first_name}!',
+            '',
+            f'Вот твой список покупок на {self.date.strftime("%d.%m")}.',
+            '',
+            'Для выбранных рецептов нужны игредиенты:',
+            '',
+        )
+
+    def get_footer_lines(self):
+        """Получаем подпись в конце списка покупок."""
+        return (
+            '',
+            f'Получено с помощью Foodgram {self.date.strftime("%Y")}.',
+        )
+
+    @staticmethod
+    def get_ingredient_line(ingredient):
+        """Получаем строку с ингредиентом для текстовых форматов."""
+        return (
+            f' - {ingredient["ingredient__name"]} '
+            f'({ingredient["ingredient__measurement_unit"]})'
+            f' - {ingredient["in_shopping_cart_ingredient_amount"]}'
+        )
+
+    def get_lines(self):
+        """Генерируем все строки текстового списка покупок."""
+        yield from self.get_header_lines()
+        for ingredient in self.ingredients:
+            yield self.get_ingredient_line(ingredient)
+        yield from self.get_footer_lines()
+
+    def stream(self):
+        raise NotImplementedError(
+            'Метод stream() должен быть переопределен!'
+        )
+
+
+class TextShoppingCartExporter(BaseShoppingCartExporter):
+    """Выгрузка списка покупок в текстовый файл."""
+
+    format = 'txt'
+    content_type = 'text/plain; charset=utf-8'
+
+    def stream(self):
+        for line in self.get_lines():
+            yield f'{line}\n'
+
+
+class CSVShoppingCartExporter(BaseShoppingCartExporter):
+    """Выгрузка списка покупок в CSV таблицу."""
+
+    format = 'csv'
+    content_type = 'text/csv; charset=utf-8'
+
+    def stream(self):
+        writer = csv.writer(_EchoBuffer())
+        yield writer.writerow(
+            ('Ингредиент', 'Единица измерения', 'Количество')
+        )
+        for ingredient in self.ingredients:
+            yield writer.writerow((
+                ingredient['ingredient__name'],
+                ingredient['ingredient__measurement_unit'],
+                ingredient['in_shopping_cart_ingredient_amount'],
+            ))
+
+
+class JSONShoppingCartExporter(BaseShoppingCartExporter):
+    """
+    Выгрузка списка покупок в JSON.
+    Документ собирается по одному ингредиенту за раз.
+    """
+
+    format = 'json'
+    content_type = 'application/json'
+
+    def stream(self):
+        yield '{"date": %s, "ingredients": [' % json.dumps(
+            self.date.isoformat()
+        )
+        separator = ''
+        for ingredient in self.ingredients:
+            yield separator + json.dumps(
+                {
+                    'name': ingredient['ingredient__name'],
+                    'measurement_unit': (
+                        ingredient['ingredient__measurement_unit']
+                    ),
+                    'amount': (
+                        ingredient['in_shopping_cart_ingredient_amount']
+                    ),
+                },
+                ensure_ascii=False,
+            )
+            separator = ', '
+        yield ']}'
+
+
+class PDFShoppingCartExporter(BaseShoppingCartExporter):
+    """Выгрузка списка покупок в PDF документ."""
+
+    format = 'pdf'
+    content_type = 'application/pdf'
+
+    def stream(self):
+        return StreamingPDFWriter().stream(self.get_lines())
+
+
+SHOPPING_CART_EXPORTERS = {
+    exporter.format: exporter
+    for exporter in (
+        TextShoppingCartExporter,
+        CSVShoppingCartExporter,
+        JSONShoppingCartExporter,
+        PDFShoppingCartExporter,
+    )
+}
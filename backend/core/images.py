@@ -0,0 +1,179 @@
+import base64
+import binascii
+import io
+import os
+from tempfile import SpooledTemporaryFile
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+from rest_framework.exceptions import ValidationError
+
+from core.constants import (BASE64_DECODE_CHUNK_SIZE, RECIPE_IMAGE_MAX_PIXELS,
+                            RECIPE_IMAGE_MAX_SIZE, RECIPE_IMAGE_QUALITY,
+                            RECIPE_IMAGE_SPOOL_SIZE,
+                            RECIPE_IMAGE_THUMBNAIL_SIZES)
+from core.tasks import background_task
+from recipes.models import Recipe
+
+
+def decode_base64_image(encoded):
+    """
+    Декодируем base64 строку изображения во временный файл
+    частями, не создавая полную копию данных в памяти.
+    Размер проверяется до декодирования по длине строки.
+    """
+    max_size = settings.RECIPE_IMAGE_MAX_UPLOAD_SIZE
+    if len(encoded) // 4 * 3 > max_size:
+        raise ValidationError(
+            f'Размер изображения не должен превышать {max_size} байт!'
+        )
+    file = SpooledTemporaryFile(max_size=RECIPE_IMAGE_SPOOL_SIZE)
+    try:
+        for start in range(0, len(encoded), BASE64_DECODE_CHUNK_SIZE):
+            file.write(base64.b64decode(
+                encoded[start:start + BASE64_DECODE_CHUNK_SIZE],
+                validate=True,
+            ))
+    except (binascii.Error, ValueError):
+        file.close()
+        raise ValidationError('Некорректная base64 строка изображения!')
+    file.seek(0)
+    return file
+
+
+def get_image_format():
+    """Получаем формат сохранения: WebP, если Pillow его поддерживает."""
+    return 'WEBP' if features.check('webp') else 'JPEG'
+
+
+def encode_image(image):
+    """
+    Кодируем изображение в WebP или JPEG с заданным качеством.
+    Прозрачность сохраняется только в WebP.
+    """
+    image_format = get_image_format()
+    has_alpha = image.mode in ('RGBA', 'LA') or (
+        image.mode == 'P' and 'transparency' in image.info
+    )
+    mode = 'RGBA' if has_alpha and image_format == 'WEBP' else 'RGB'
+    if image.mode != mode:
+        image = image.convert(mode)
+    buffer = io.BytesIO()
+    image.save(
+        buffer, format=image_format, quality=RECIPE_IMAGE_QUALITY,
+        optimize=True,
+    )
+    return ContentFile(
+        buffer.getvalue(),
+        name=f'{uuid4().hex}.{image_format.lower()}',
+    )
+
+
+def open_image_header(file):
+    """
+    Открываем изображение и проверяем размер в пикселях по
+    заголовку, до декодирования.
+    """
+    try:
+        image = Image.open(file)
+    except (UnidentifiedImageError, OSError):
+        raise ValidationError('Загрузите корректное изображение!')
+    width, height = image.size
+    if width * height > RECIPE_IMAGE_MAX_PIXELS:
+        raise ValidationError('Слишком большое разрешение изображения!')
+    return image
+
+
+def open_image(file, max_size):
+    """
+    Открываем изображение и уменьшаем его до max_size по
+    большей стороне. JPEG сразу декодируется в уменьшенном
+    масштабе, близком к max_size.
+    """
+    image = open_image_header(file)
+    image.draft('RGB', (max_size, max_size))
+    try:
+        image = ImageOps.exif_transpose(image)
+    except (OSError, SyntaxError):
+        raise ValidationError('Загрузите корректное изображение!')
+    image.thumbnail((max_size, max_size))
+    return image
+
+
+def get_thumbnail_name(image_name, size_name):
+    """Получаем имя миниатюры рядом с оригиналом изображения."""
+    stem = os.path.splitext(image_name)[0]
+    return f'{stem}_{size_name}.{get_image_format().lower()}'
+
+
+def check_uploaded_image(file):
+    """
+    Проверяем загруженное изображение по заголовку, без полного
+    декодирования, и получаем для него имя файла с расширением
+    по фактическому формату.
+    """
+    image = open_image_header(file)
+    file.seek(0)
+    return f'{uuid4().hex}.{image.format.lower()}'
+
+
+def save_recipe_thumbnails(storage, image, image_name):
+    """Сохраняем миниатюры всех размеров рядом с изображением."""
+    thumbnails = {}
+    for size_name, size in RECIPE_IMAGE_THUMBNAIL_SIZES.items():
+        thumbnail = image.copy()
+        thumbnail.thumbnail((size, size))
+        thumbnails[size_name] = storage.save(
+            get_thumbnail_name(image_name, size_name),
+            encode_image(thumbnail),
+        )
+    return thumbnails
+
+
+def mark_recipe_image_failed(recipe_id):
+    """Помечаем, что обработать изображение рецепта не удалось."""
+    Recipe.objects.filter(id=recipe_id).update(
+        image_status=Recipe.ImageStatus.FAILED
+    )
+
+
+@background_task(on_failure=mark_recipe_image_failed)
+def build_recipe_image(recipe_id):
+    """
+    Фоновая задача обработки изображения рецепта: оригинал
+    уменьшается и перекодируется, рядом строятся миниатюры.
+    Результат записывается, только если за время обработки
+    изображение рецепта не заменили, иначе новые файлы
+    удаляются. Прежние файлы удаляются после записи.
+    """
+    recipe = Recipe.objects.filter(id=recipe_id).first()
+    if recipe is None or not recipe.image:
+        return
+    source = recipe.image.name
+    previous_thumbnails = set(recipe.image_thumbnails.values())
+    storage = recipe.image.storage
+    Recipe.objects.filter(id=recipe_id, image=source).update(
+        image_status=Recipe.ImageStatus.PROCESSING
+    )
+    with recipe.image.open('rb') as file:
+        image = open_image(file, RECIPE_IMAGE_MAX_SIZE)
+    encoded = encode_image(image)
+    image_name = storage.save(
+        recipe.image.field.generate_filename(recipe, encoded.name), encoded
+    )
+    thumbnails = save_recipe_thumbnails(storage, image, image_name)
+    created = {image_name, *thumbnails.values()}
+    updated = Recipe.objects.filter(id=recipe_id, image=source).update(
+        image=image_name,
+        image_thumbnails=thumbnails,
+        image_status=Recipe.ImageStatus.READY,
+        updated_at=timezone.now(),
+    )
+    stale = created
+    if updated:
+        stale = {source, *previous_thumbnails} - created
+    for name in stale:
+        storage.delete(name)
@@ -0,0 +1,141 @@
+import threading
+
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from core.catalog_cache import ingredients_catalog
+from core.constants import INGREDIENT_SEARCH_NGRAM_SIZE
+from recipes.models import Ingredient
+
+PREFIX_MATCH_RANK = 0
+SUBSTRING_MATCH_RANK = 1
+
+
+class _TrieNode:
+    """Узел префиксного дерева с id всех названий под ним."""
+
+    __slots__ = ('children', 'ids')
+
+    def __init__(self):
+        self.children = {}
+        self.ids = []
+
+
+class IngredientSearchIndex:
+    """
+    Поисковый индекс по названиям ингредиентов в памяти процесса.
+    Префиксное дерево отвечает на поиск по началу названия,
+    индекс n-грамм - на поиск по вхождению подстроки.
+    Используется, когда БД не поддерживает pg_trgm.
+    """
+
+    def __init__(self, ingredients):
+        self.root = _TrieNode()
+        self.ngrams = {}
+        self.names = {}
+        for ingredient_id, name in ingredients:
+            self.add(ingredient_id, name.lower())
+
+    def add(self, ingredient_id, name):
+        """Добавляем название в дерево и в индекс n-грамм."""
+        self.names[ingredient_id] = name
+        node = self.root
+        for char in name:
+            node = node.children.setdefault(char, _TrieNode())
+            node.ids.append(ingredient_id)
+        for size in range(1, INGREDIENT_SEARCH_NGRAM_SIZE + 1):
+            for start in range(len(name) - size + 1):
+                self.ngrams.setdefault(
+                    name[start:start + size], set()
+                ).add(ingredient_id)
+
+    def get_prefix_ids(self, query):
+        """Получаем id названий, начинающихся с query."""
+        node = self.root
+        for char in query:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return node.ids
+
+    def get_substring_ids(self, query):
+        """
+        Получаем id названий, содержащих query.
+        Кандидаты - пересечение списков n-грамм запроса,
+        затем проверяем точное вхождение.
+        """
+        size = min(len(query), INGREDIENT_SEARCH_NGRAM_SIZE)
+        candidates = None
+        for start in range(len(query) - size + 1):
+            postings = self.ngrams.get(query[start:start + size])
+            if not postings:
+                return set()
+            candidates = (
+                set(postings) if candidates is None
+                else candidates & postings
+            )
+        if size == len(query):
+            return candidates
+        return {
+            ingredient_id for ingredient_id in candidates
+            if query in self.names[ingredient_id]
+        }
+
+    def search(self, query):
+        """
+        Ищем ингредиенты по части названия. Возвращаем
+        id совпадений по началу и id всех совпадений.
+        """
+        query = query.lower()
+        if not query:
+            return [], set(self.names)
+        return self.get_prefix_ids(query), self.get_substring_ids(query)
+
+
+_index = None
+_index_version = None
+_index_lock = threading.Lock()
+
+
+def get_ingredient_search_index():
+    """
+    Получаем индекс ингредиентов текущего процесса.
+    Индекс строится лениво и перестраивается, когда меняется
+    версия справочника ингредиентов в кеше справочников.
+    """
+    global _index, _index_version
+    version = ingredients_catalog.get_version()
+    with _index_lock:
+        if _index is not None and _index_version == version:
+            return _index
+        index = IngredientSearchIndex(
+            Ingredient.objects.values_list('id', 'name').iterator()
+        )
+        _index, _index_version = index, version
+        return index
+
+
+def search_ingredients(queryset, value):
+    """
+    Фильтруем ингредиенты по части названия и ранжируем:
+    сначала совпадения по началу названия, затем по вхождению
+    подстроки, внутри групп - по алфавиту. В PostgreSQL поиск
+    идет по GIN индексу pg_trgm, в остальных БД - по индексу
+    в памяти процесса.
+    """
+    if connection.vendor == 'postgresql':
+        matches = Q(name__icontains=value)
+        prefix_matches = Q(name__istartswith=value)
+    else:
+        prefix_ids, substring_ids = (
+            get_ingredient_search_index().search(value)
+        )
+        matches = Q(id__in=substring_ids)
+        prefix_matches = Q(id__in=prefix_ids)
+    return queryset.filter(matches).annotate(
+        search_rank=Case(
+            When(prefix_matches, then=Value(PREFIX_MATCH_RANK)),
+            default=Value(SUBSTRING_MATCH_RANK),
+            output_field=IntegerField(),
+        )
+    ).order_by('search_rank', 'name')
@@ -0,0 +1,60 @@
+import csv
+import json
+import os
+from itertools import islice
+
+from core.constants import LOADER_READ_CHUNK_SIZE
+
+
+def iter_json_array(file, chunk_size=LOADER_READ_CHUNK_SIZE):
+    """
+    Потоково читаем JSON массив объектов из файла.
+    Файл читается частями, элементы массива разбираются
+    по одному, поэтому весь документ в памяти не держится.
+    """
+    decoder = json.JSONDecoder()
+    buffer = file.read(chunk_size).lstrip()
+    if not buffer.startswith('['):
+        raise ValueError('Ожидался JSON массив!')
+    buffer = buffer[1:]
+    eof = False
+    while True:
+        buffer = buffer.lstrip()
+        if buffer.startswith(']'):
+            return
+        if buffer.startswith(','):
+            buffer = buffer[1:]
+            continue
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = file.read(chunk_size)
+            eof = not chunk
+            buffer += chunk
+            continue
+        yield item
+        buffer = buffer[end:]
+
+
+def iter_records(path):
+    """
+    Потоково читаем записи из JSON или CSV файла.
+    Формат определяется по расширению файла.
+    """
+    with open(path, encoding='utf-8', newline='') as file:
+        if os.path.splitext(path)[1].lower() == '.csv':
+            yield from csv.DictReader(file)
+        else:
+            yield from iter_json_array(file)
+
+
+def iter_batches(iterable, batch_size):
+    """Разбиваем поток на списки длиной не больше batch_size."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
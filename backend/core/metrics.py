@@ -0,0 +1,200 @@
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+from core.constants import (METRICS_DURATION_BUCKETS, METRICS_QUERY_BUCKETS,
+                            METRICS_QUERY_SHAPE_MAX_LENGTH,
+                            METRICS_WAIT_BUCKETS)
+
+logger = logging.getLogger(__name__)
+
+METRICS = {
+    'foodgram_http_request_duration_seconds': (
+        'Время обработки запроса', METRICS_DURATION_BUCKETS,
+    ),
+    'foodgram_http_request_db_queries': (
+        'Количество SQL запросов на запрос', METRICS_QUERY_BUCKETS,
+    ),
+    'foodgram_http_request_db_duration_seconds': (
+        'Время SQL запросов на запрос', METRICS_DURATION_BUCKETS,
+    ),
+    'foodgram_http_request_serializer_duration_seconds': (
+        'Время сериализации на запрос', METRICS_DURATION_BUCKETS,
+    ),
+    'foodgram_db_pool_checkout_wait_seconds': (
+        'Время ожидания соединения из пула', METRICS_WAIT_BUCKETS,
+    ),
+}
+
+_IN_VALUES_RE = re.compile(r'\((?:%s, )+%s\)')
+_NUMBER_RE = re.compile(r'\b\d+\b')
+
+
+def get_query_shape(sql):
+    """
+    Приводим SQL к форме без значений: списки параметров IN
+    и числовые литералы схлопываются.
+    """
+    shape = _NUMBER_RE.sub('N', _IN_VALUES_RE.sub('(...)', sql))
+    return shape[:METRICS_QUERY_SHAPE_MAX_LENGTH]
+
+
+class Histogram:
+    """Гистограмма в формате Prometheus: счетчики по корзинам и сумма."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += 1
+        self.sum += value
+
+
+class MetricsRegistry:
+    """
+    Агрегатор метрик процесса в памяти. Хранит гистограммы
+    METRICS и счетчик запросов в разрезе меток и отдает их
+    в текстовом формате Prometheus.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.requests = Counter()
+
+    def observe(self, name, labels, value):
+        """Добавляем наблюдение в гистограмму name с метками labels."""
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = Histogram(METRICS[name][1])
+                self.histograms[key] = histogram
+            histogram.observe(value)
+
+    def count_request(self, labels):
+        with self.lock:
+            self.requests[tuple(sorted(labels.items()))] += 1
+
+    @staticmethod
+    def format_labels(labels, **extra):
+        pairs = [*labels, *extra.items()]
+        return ','.join(
+            '{}="{}"'.format(
+                name, str(value).replace('\\', '\\\\').replace('"', '\\"')
+            )
+            for name, value in pairs
+        )
+
+    def render_histograms(self, name):
+        """Строки одной гистограммы для всех наборов меток."""
+        lines = [
+            f'# HELP {name} {METRICS[name][0]}',
+            f'# TYPE {name} histogram',
+        ]
+        for (metric, labels), histogram in sorted(self.histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(
+                (*histogram.buckets, '+Inf'), histogram.counts
+            ):
+                cumulative += count
+                lines.append(
+                    f'{name}_bucket{{'
+                    f'{self.format_labels(labels, le=bound)}}} {cumulative}'
+                )
+            lines.append(
+                f'{name}_sum{{{self.format_labels(labels)}}} {histogram.sum}'
+            )
+            lines.append(
+                f'{name}_count{{{self.format_labels(labels)}}} '
+                f'{histogram.total}'
+            )
+        return lines
+
+    def render(self):
+        """Отдаем все метрики в текстовом формате Prometheus."""
+        with self.lock:
+            lines = [
+                '# HELP foodgram_http_requests_total Количество запросов',
+                '# TYPE foodgram_http_requests_total counter',
+                *(
+                    'foodgram_http_requests_total'
+                    f'{{{self.format_labels(labels)}}} {count}'
+                    for labels, count in sorted(self.requests.items())
+                ),
+            ]
+            for name in METRICS:
+                lines.extend(self.render_histograms(name))
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class RequestMetrics:
+    """Метрики одного запроса: SQL запросы и время сериализации."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0
+        self.serializer_time = 0
+        self.serializer = None
+        self.serializer_shapes = Counter()
+
+    def record_query(self, sql, duration):
+        self.queries += 1
+        self.db_time += duration
+        if self.serializer is not None:
+            shape = get_query_shape(sql)
+            self.serializer_shapes[(self.serializer, shape)] += 1
+
+    def log_n_plus_one(self, route):
+        """
+        Пишем в лог запросы одной формы, повторенные
+        сериализатором не меньше METRICS_N_PLUS_ONE_THRESHOLD раз.
+        """
+        threshold = settings.METRICS_N_PLUS_ONE_THRESHOLD
+        if not threshold:
+            return
+        for (serializer, shape), count in self.serializer_shapes.items():
+            if count >= threshold:
+                logger.warning(
+                    'Возможный N+1 в %s (%s): %s запросов вида %s',
+                    serializer, route, count, shape,
+                )
+
+
+current_request_metrics = ContextVar('current_request_metrics', default=None)
+
+
+@contextmanager
+def measure_serializer(serializer):
+    """
+    Учитываем время сериализации. Вложенные сериализаторы
+    входят во время внешнего и не учитываются отдельно.
+    """
+    metrics = current_request_metrics.get()
+    if metrics is None or metrics.serializer is not None:
+        yield
+        return
+    metrics.serializer = type(serializer).__name__
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_time += time.perf_counter() - started_at
+        metrics.serializer = None
@@ -0,0 +1,94 @@
+import asyncio
+import time
+
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+
+from core.metrics import RequestMetrics, current_request_metrics, registry
+
+
+class QueryRecorder:
+    """
+    Обертка выполнения SQL, учитывающая запросы в метриках
+    текущего запроса. Метрики берутся из контекстной переменной,
+    поэтому учитываются и запросы из потоков, в которых
+    выполняются асинхронные представления.
+    """
+
+    def __call__(self, execute, sql, params, many, context):
+        metrics = current_request_metrics.get()
+        if metrics is None:
+            return execute(sql, params, many, context)
+        started_at = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            metrics.record_query(sql, time.perf_counter() - started_at)
+
+
+query_recorder = QueryRecorder()
+
+
+class MetricsMiddleware:
+    """
+    Middleware метрик запроса: количество и время SQL запросов,
+    время сериализации и общее время по имени маршрута
+    (например, api:recipes-list). Метрики агрегируются в
+    гистограммы для /api/_metrics и, если включено, отдаются
+    в заголовке Server-Timing. Работает и под WSGI, и под ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        context_token = current_request_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_request_metrics.reset(context_token)
+        self.record(request, response, metrics)
+        return response
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        context_token = current_request_metrics.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_request_metrics.reset(context_token)
+        self.record(request, response, metrics)
+        return response
+
+    def record(self, request, response, metrics):
+        duration = time.perf_counter() - metrics.started_at
+        match = request.resolver_match
+        route = match.view_name if match is not None else 'unresolved'
+        labels = {'route': route, 'method': request.method}
+        registry.count_request({**labels, 'status': response.status_code})
+        for name, value in (
+            ('foodgram_http_request_duration_seconds', duration),
+            ('foodgram_http_request_db_queries', metrics.queries),
+            ('foodgram_http_request_db_duration_seconds', metrics.db_time),
+            (
+                'foodgram_http_request_serializer_duration_seconds',
+                metrics.serializer_time,
+            ),
+        ):
+            registry.observe(name, labels, value)
+        metrics.log_n_plus_one(route)
+        if settings.METRICS_SERVER_TIMING:
+            response['Server-Timing'] = ', '.join((
+                f'db;dur={metrics.db_time * 1000:.1f};'
+                f'desc="{metrics.queries} queries"',
+                f'serializer;dur={metrics.serializer_time * 1000:.1f}',
+                f'total;dur={duration * 1000:.1f}',
+            ))
@@ -0,0 +1,43 @@
+from django.db import migrations
+
+
+class VendorRunSQL(migrations.RunSQL):
+    """
+    Операция RunSQL, которая выполняется только на БД
+    с заданным vendor. Нужна для индексов, расширений и
+    триггеров, синтаксис которых отличается между БД.
+    """
+
+    vendor = None
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if schema_editor.connection.vendor == self.vendor:
+            super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        if schema_editor.connection.vendor == self.vendor:
+            super().database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+
+class PostgreSQLRunSQL(VendorRunSQL):
+    """
+    Операция RunSQL, которая выполняется только на PostgreSQL.
+    Нужна для индексов и расширений, которых нет в SQLite.
+    """
+
+    vendor = 'postgresql'
+
+
+class SQLiteRunSQL(VendorRunSQL):
+    """
+    Операция RunSQL, которая выполняется только на SQLite.
+    Нужна для замен возможностей PostgreSQL, например FTS5.
+    """
+
+    vendor = 'sqlite'
@@ -0,0 +1,68 @@
+from django.db import models
+from django.utils import timezone
+
+
+class BackgroundTask(models.Model):
+    """
+    Модель фоновой задачи. Очередь хранится в БД и не требует
+    отдельного брокера: задачи выполняет пул потоков процесса,
+    поставившего задачу, или команда runtasks. Выполненные
+    задачи удаляются, в очереди остаются ожидающие, выполняемые
+    и проваленные.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Ожидает'
+        RUNNING = 'running', 'Выполняется'
+        FAILED = 'failed', 'Ошибка'
+
+    name = models.CharField(
+        verbose_name='Путь к функции задачи',
+        max_length=255,
+    )
+    args = models.JSONField(
+        verbose_name='Аргументы',
+        default=list,
+    )
+    status = models.CharField(
+        verbose_name='Статус',
+        max_length=16,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Количество попыток',
+        default=0,
+    )
+    run_at = models.DateTimeField(
+        verbose_name='Время запуска',
+        default=timezone.now,
+    )
+    started_at = models.DateTimeField(
+        verbose_name='Время начала последней попытки',
+        null=True,
+        blank=True,
+    )
+    last_error = models.TextField(
+        verbose_name='Последняя ошибка',
+        blank=True,
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Дата создания',
+        auto_now_add=True,
+    )
+
+    class Meta:
+        ordering = ('run_at',)
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = (
+            models.Index(
+                fields=('status', 'run_at'),
+                name='backgroundtask_status_run_idx',
+            ),
+        )
+
+    def __str__(self):
+        """Возвращаем читаемую связку для админки."""
+        return f'{self.name}{tuple(self.args)}: {self.status}'
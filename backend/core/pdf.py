@@ -0,0 +1,306 @@
+import os
+import zlib
+from functools import lru_cache
+from struct import unpack_from
+
+from django.conf import settings
+
+from core.constants import (PDF_FONT_FILENAME, PDF_FONT_NAME, PDF_FONT_SIZE,
+                            PDF_LEADING, PDF_MARGIN, PDF_PAGE_HEIGHT,
+                            PDF_PAGE_WIDTH)
+
+
+class TrueTypeFont:
+    """
+    Разбор шрифта TrueType в объеме, нужном для встраивания
+    в PDF: метрики из head, hhea, OS/2 и post, ширины глифов
+    из hmtx и соответствие символов глифам из cmap (3, 1).
+    Ширины и размеры приведены к 1000 единиц на кегль.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        tables = self._get_tables()
+        units_per_em, = unpack_from('>H', data, tables['head'] + 18)
+        scale = 1000 / units_per_em
+        self.bbox = [
+            round(value * scale)
+            for value in unpack_from('>4h', data, tables['head'] + 36)
+        ]
+        ascent, descent = unpack_from('>hh', data, tables['hhea'] + 4)
+        self.ascent = round(ascent * scale)
+        self.descent = round(descent * scale)
+        self.cap_height = self.ascent
+        os2_version, = unpack_from('>H', data, tables['OS/2'])
+        if os2_version >= 2:
+            cap_height, = unpack_from('>h', data, tables['OS/2'] + 88)
+            self.cap_height = round(cap_height * scale)
+        italic_angle, = unpack_from('>i', data, tables['post'] + 4)
+        self.italic_angle = round(italic_angle / 65536)
+        metrics_count, = unpack_from('>H', data, tables['hhea'] + 34)
+        self.widths = [
+            round(unpack_from('>H', data, tables['hmtx'] + 4 * glyph)[0]
+                  * scale)
+            for glyph in range(metrics_count)
+        ]
+        self.glyphs = self._get_glyphs(tables['cmap'])
+
+    def _get_tables(self):
+        """Смещения таблиц шрифта по их тегам."""
+        tables_count, = unpack_from('>H', self.data, 4)
+        tables = {}
+        for index in range(tables_count):
+            tag, _, offset, _ = unpack_from(
+                '>4sIII', self.data, 12 + 16 * index
+            )
+            tables[tag.decode('latin1')] = offset
+        return tables
+
+    def _get_glyphs(self, cmap):
+        """
+        Соответствие кодов Unicode номерам глифов из подтаблицы
+        формата 4 для Windows Unicode BMP.
+        """
+        data = self.data
+        subtables_count, = unpack_from('>H', data, cmap + 2)
+        for index in range(subtables_count):
+            platform, encoding, offset = unpack_from(
+                '>HHI', data, cmap + 4 + 8 * index
+            )
+            if (platform, encoding) == (3, 1):
+                subtable = cmap + offset
+                break
+        else:
+            raise ValueError('В шрифте нет таблицы символов Unicode.')
+        segments_count = unpack_from('>H', data, subtable + 6)[0] // 2
+        ends = subtable + 14
+        starts = ends + 2 * segments_count + 2
+        deltas = starts + 2 * segments_count
+        range_offsets = deltas + 2 * segments_count
+        glyphs = {}
+        for segment in range(segments_count):
+            end, = unpack_from('>H', data, ends + 2 * segment)
+            start, = unpack_from('>H', data, starts + 2 * segment)
+            delta, = unpack_from('>H', data, deltas + 2 * segment)
+            range_offset, = unpack_from(
+                '>H', data, range_offsets + 2 * segment
+            )
+            for code in range(start, min(end, 0xFFFE) + 1):
+                if range_offset:
+                    glyph, = unpack_from(
+                        '>H', data,
+                        range_offsets + 2 * segment + range_offset
+                        + 2 * (code - start),
+                    )
+                    if glyph:
+                        glyph = (glyph + delta) & 0xFFFF
+                else:
+                    glyph = (code + delta) & 0xFFFF
+                if glyph:
+                    glyphs[chr(code)] = glyph
+        return glyphs
+
+    def get_width(self, glyph):
+        """Ширина глифа: после hmtx глифы берут последнюю ширину."""
+        return self.widths[min(glyph, len(self.widths) - 1)]
+
+
+@lru_cache(maxsize=None)
+def get_pdf_font():
+    """Читаем шрифт для PDF один раз на процесс."""
+    with open(
+        os.path.join(settings.BASE_DIR, 'data', 'fonts', PDF_FONT_FILENAME),
+        'rb',
+    ) as font_file:
+        return TrueTypeFont(font_file.read())
+
+
+class StreamingPDFWriter:
+    """
+    Минималистичный генератор PDF на чистом Python.
+    Принимает итерируемый набор строк и отдает документ
+    частями байт, держа в памяти не больше одной страницы.
+    В документ встраивается шрифт DejaVu Sans с кириллицей,
+    текст записывается номерами глифов (Identity-H), а CMap
+    ToUnicode возвращает по ним исходные символы.
+    """
+
+    def __init__(self, font_size=PDF_FONT_SIZE, leading=PDF_LEADING):
+        self.font_size = font_size
+        self.leading = leading
+        self.lines_per_page = (
+            (PDF_PAGE_HEIGHT - 2 * PDF_MARGIN) // leading
+        )
+        self.font = get_pdf_font()
+        self._offsets = {}
+        self._position = 0
+
+    def _write_object(self, number, body):
+        """Формируем объект PDF и запоминаем его смещение для xref."""
+        self._offsets[number] = self._position
+        chunk = b'%d 0 obj\n' % number + body + b'\nendobj\n'
+        self._position += len(chunk)
+        return chunk
+
+    def _write_stream(self, number, content, dictionary=b''):
+        """Формируем объект потока с заданным содержимым."""
+        return self._write_object(
+            number,
+            b'<< /Length %d%s >>\nstream\n' % (len(content), dictionary)
+            + content
+            + b'\nendstream',
+        )
+
+    def _write_raw(self, chunk):
+        """Отдаем служебный фрагмент документа с учетом смещения."""
+        self._position += len(chunk)
+        return chunk
+
+    def _get_to_unicode_cmap(self):
+        """
+        CMap соответствия номеров глифов символам Unicode,
+        чтобы текст корректно копировался и искался в документе.
+        """
+        chars = {}
+        for char, glyph in sorted(self.font.glyphs.items(), reverse=True):
+            chars[glyph] = char
+        mappings = [
+            b'<%04X> <%s>' % (glyph, char.encode('utf-16-be').hex().encode())
+            for glyph, char in sorted(chars.items())
+        ]
+        return (
+            b'/CIDInit /ProcSet findresource begin 12 dict begin '
+            b'begincmap /CMapName /Foodgram-Identity def /CMapType 2 def '
+            b'1 begincodespacerange <0000> <FFFF> endcodespacerange\n'
+            + b''.join(
+                b'%d beginbfchar\n' % len(mappings[start:start + 100])
+                + b'\n'.join(mappings[start:start + 100])
+                + b'\nendbfchar\n'
+                for start in range(0, len(mappings), 100)
+            )
+            + b'endcmap CMapName currentdict /CMap defineresource pop '
+            b'end end'
+        )
+
+    def _write_font(self):
+        """
+        Отдаем объекты шрифта: составной шрифт Type0 (3),
+        CMap ToUnicode (4), шрифт CIDFontType2 (5), описание
+        шрифта (6) и сам файл шрифта (7).
+        """
+        font = self.font
+        font_name = PDF_FONT_NAME.encode()
+        yield self._write_stream(4, self._get_to_unicode_cmap())
+        yield self._write_object(
+            3,
+            b'<< /Type /Font /Subtype /Type0 /BaseFont /%s '
+            b'/Encoding /Identity-H /DescendantFonts [5 0 R] '
+            b'/ToUnicode 4 0 R >>' % font_name,
+        )
+        yield self._write_object(
+            5,
+            b'<< /Type /Font /Subtype /CIDFontType2 /BaseFont /%s '
+            b'/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) '
+            b'/Supplement 0 >> /FontDescriptor 6 0 R /CIDToGIDMap /Identity '
+            b'/DW %d /W [0 [%s]] >>' % (
+                font_name,
+                font.get_width(0),
+                b' '.join(b'%d' % width for width in font.widths),
+            ),
+        )
+        yield self._write_object(
+            6,
+            b'<< /Type /FontDescriptor /FontName /%s /Flags 32 '
+            b'/FontBBox [%s] /ItalicAngle %d /Ascent %d /Descent %d '
+            b'/CapHeight %d /StemV 80 /FontFile2 7 0 R >>' % (
+                font_name,
+                b' '.join(b'%d' % value for value in font.bbox),
+                font.italic_angle,
+                font.ascent,
+                font.descent,
+                font.cap_height,
+            ),
+        )
+        yield self._write_stream(
+            7,
+            zlib.compress(font.data),
+            b' /Length1 %d /Filter /FlateDecode' % len(font.data),
+        )
+
+    def _encode(self, line):
+        """
+        Кодируем строку номерами глифов. Символы, которых нет
+        в шрифте, заменяются знаком вопроса.
+        """
+        glyphs = self.font.glyphs
+        missing = glyphs['?']
+        return b''.join(
+            b'%04X' % glyphs.get(char, missing) for char in line
+        )
+
+    def _get_page_content(self, lines):
+        """Собираем поток содержимого одной страницы."""
+        content = b'BT /F1 %d Tf %d TL %d %d Td\n' % (
+            self.font_size,
+            self.leading,
+            PDF_MARGIN,
+            PDF_PAGE_HEIGHT - PDF_MARGIN,
+        )
+        content += b''.join(
+            b'<' + self._encode(line) + b'> Tj T*\n' for line in lines
+        )
+        return content + b'ET'
+
+    def _write_page(self, number, lines):
+        """Отдаем поток содержимого и объект страницы."""
+        yield self._write_stream(number, self._get_page_content(lines))
+        yield self._write_object(
+            number + 1,
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] '
+            b'/Resources << /Font << /F1 3 0 R >> >> '
+            b'/Contents %d 0 R >>' % (
+                PDF_PAGE_WIDTH, PDF_PAGE_HEIGHT, number
+            ),
+        )
+
+    def stream(self, lines):
+        """
+        Генерируем документ постранично. Объекты 1-7 (каталог,
+        дерево страниц и шрифт) зарезервированы, дерево страниц
+        записывается в конце, когда известны все страницы.
+        """
+        yield self._write_raw(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        yield from self._write_font()
+        pages = []
+        next_number = 8
+        page_lines = []
+        for line in lines:
+            page_lines.append(line)
+            if len(page_lines) == self.lines_per_page:
+                yield from self._write_page(next_number, page_lines)
+                pages.append(next_number + 1)
+                next_number += 2
+                page_lines = []
+        if page_lines or not pages:
+            yield from self._write_page(next_number, page_lines)
+            pages.append(next_number + 1)
+            next_number += 2
+        yield self._write_object(
+            2,
+            b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+                b' '.join(b'%d 0 R' % page for page in pages),
+                len(pages),
+            ),
+        )
+        yield self._write_object(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+        xref_position = self._position
+        xref = b'xref\n0 %d\n0000000000 65535 f \n' % next_number
+        xref += b''.join(
+            b'%010d 00000 n \n' % self._offsets[number]
+            for number in range(1, next_number)
+        )
+        yield self._write_raw(
+            xref
+            + b'trailer\n<< /Size %d /Root 1 0 R >>\n' % next_number
+            + b'startxref\n%d\n%%%%EOF\n' % xref_position
+        )
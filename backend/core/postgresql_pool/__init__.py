@@ -0,0 +1,4 @@
+"""
+Бэкенд PostgreSQL с пулом соединений процесса.
+Подключается через DB_ENGINE=core.postgresql_pool.
+"""
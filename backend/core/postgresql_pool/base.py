@@ -0,0 +1,38 @@
+from django.db.backends.postgresql import base
+from psycopg2.extras import register_default_jsonb
+
+from core.db_pool import get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Соединения берутся из пула процесса и возвращаются в него
+    при закрытии вместо разрыва. Размер пула задается
+    DB_POOL_MIN_SIZE и DB_POOL_MAX_SIZE, а CONN_MAX_AGE
+    оставляется нулевым: соединение возвращается в пул
+    в конце каждого запроса.
+    """
+
+    def get_pool(self):
+        return get_pool(self.alias, self.get_connection_params())
+
+    def get_new_connection(self, conn_params):
+        connection = self.get_pool().checkout(
+            health_check=self.settings_dict.get('CONN_HEALTH_CHECKS', False)
+        )
+        options = self.settings_dict['OPTIONS']
+        self.isolation_level = options.get(
+            'isolation_level', connection.isolation_level
+        )
+        if self.isolation_level != connection.isolation_level:
+            connection.set_session(isolation_level=self.isolation_level)
+        register_default_jsonb(conn_or_curs=connection, loads=lambda x: x)
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        with self.wrap_database_errors:
+            self.get_pool().release(
+                self.connection, close=self.errors_occurred
+            )
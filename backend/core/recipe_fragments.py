@@ -0,0 +1,82 @@
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Prefetch
+
+from core.catalog_cache import ingredients_catalog, tags_catalog
+from recipes.models import RecipeIngredientAmount
+
+# Поля профиля автора, которые выводятся в рецепте.
+RECIPE_AUTHOR_FIELDS = ('email', 'username', 'first_name', 'last_name')
+
+
+def get_recipe_body_prefetches():
+    """Связи, нужные только для сборки тела рецепта."""
+    return (
+        'tags',
+        Prefetch(
+            'recipeingredientamount_set',
+            queryset=RecipeIngredientAmount.objects.select_related(
+                'ingredient'
+            ),
+        ),
+    )
+
+
+class RecipeFragmentCache:
+    """
+    Кеш сериализованных рецептов, общий для всех юзеров.
+    На рецепт хранится один фрагмент вместе с updated_at, с
+    которым он собран: фрагмент устаревшей версии считается
+    промахом и перезаписывается. Ключ включает версии
+    справочников тегов и ингредиентов и адрес сайта (ссылки на
+    картинки абсолютные), так что правка тега или ингредиента
+    сбрасывает все фрагменты. Правка профиля автора обновляет
+    updated_at его рецептов.
+    """
+
+    @property
+    def cache(self):
+        return caches[settings.RECIPE_FRAGMENT_CACHE_ALIAS]
+
+    @staticmethod
+    def get_namespace(request):
+        base_url = request.build_absolute_uri('/') if request else ''
+        return md5(repr((
+            base_url,
+            tags_catalog.get_version(),
+            ingredients_catalog.get_version(),
+        )).encode()).hexdigest()
+
+    def get_keys(self, recipes, request):
+        namespace = self.get_namespace(request)
+        return {
+            f'recipe-fragment:{namespace}:{recipe.id}': recipe
+            for recipe in recipes
+        }
+
+    def get_many(self, recipes, request):
+        """
+        Получаем актуальные фрагменты рецептов одним обращением
+        к кешу. Возвращаем словарь фрагментов по id рецепта.
+        """
+        keys = self.get_keys(recipes, request)
+        fragments = {}
+        for key, (updated_at, fragment) in self.cache.get_many(keys).items():
+            if updated_at == keys[key].updated_at:
+                fragments[keys[key].id] = fragment
+        return fragments
+
+    def set_many(self, recipes, fragments, request):
+        """Сохраняем фрагменты рецептов одним обращением к кешу."""
+        self.cache.set_many(
+            {
+                key: (recipe.updated_at, fragments[recipe.id])
+                for key, recipe in self.get_keys(recipes, request).items()
+            },
+            timeout=settings.RECIPE_FRAGMENT_CACHE_TIMEOUT,
+        )
+
+
+recipe_fragments = RecipeFragmentCache()
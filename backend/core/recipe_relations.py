@@ -0,0 +1,124 @@
+from django.db import connection
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from recipes.models import Cart, FavoriteRecipe, Recipe
+
+RECIPE_COUNTER_FIELDS = {
+    FavoriteRecipe: 'favorites_count',
+    Cart: 'carts_count',
+}
+
+
+def _change_recipe_counter(model, recipe_ids, delta):
+    """
+    Изменяем счетчик добавлений рецептов на delta одним
+    UPDATE с выражением F(), без чтения текущего значения.
+    """
+    counter = RECIPE_COUNTER_FIELDS[model]
+    Recipe.objects.filter(id__in=recipe_ids).update(
+        **{counter: F(counter) + delta}
+    )
+
+
+def add_recipe_relation(model, user_id, recipe_id):
+    """
+    Добавляем рецепт в избранное или корзину пользователя
+    одним запросом INSERT ... ON CONFLICT DO NOTHING.
+    Повторное добавление, в том числе из параллельного
+    запроса, не приводит к ошибке уникальности. Счетчик
+    добавлений рецепта увеличивается только при вставке.
+    Возвращаем True, если строка была добавлена.
+    """
+    instance = model(user_id=user_id, recipe_id=recipe_id)
+    fields = [
+        field for field in model._meta.concrete_fields
+        if not field.primary_key
+    ]
+    quote_name = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote_name(model._meta.db_table)} '
+            f'({", ".join(quote_name(field.column) for field in fields)}) '
+            f'VALUES ({", ".join(["%s"] * len(fields))}) '
+            'ON CONFLICT (user_id, recipe_id) DO NOTHING',
+            [
+                field.get_db_prep_save(
+                    field.pre_save(instance, add=True), connection
+                )
+                for field in fields
+            ],
+        )
+        added = cursor.rowcount == 1
+    if added:
+        _change_recipe_counter(model, [recipe_id], 1)
+    return added
+
+
+def delete_recipe_relation(model, user_id, recipe_id):
+    """
+    Удаляем рецепт из избранного или корзины пользователя
+    одним запросом DELETE. Счетчик добавлений рецепта
+    уменьшается только при удалении строки. Возвращаем True,
+    если строка была удалена.
+    """
+    deleted, _ = model.objects.filter(
+        user_id=user_id, recipe_id=recipe_id
+    ).delete()
+    if deleted:
+        _change_recipe_counter(model, [recipe_id], -1)
+    return bool(deleted)
+
+
+def remove_user_from_recipe_counters(user_id):
+    """
+    Уменьшаем счетчики рецептов, которые пользователь добавил
+    в избранное или корзину. Вызывается перед удалением
+    пользователя: его записи удаляются каскадно.
+    """
+    for model in RECIPE_COUNTER_FIELDS:
+        _change_recipe_counter(
+            model,
+            model.objects.filter(user_id=user_id).values('recipe_id'),
+            -1,
+        )
+
+
+def get_actual_recipe_counters():
+    """
+    Получаем выражения фактического количества добавлений
+    рецепта в избранное и корзину по таблицам связей.
+    """
+    return {
+        counter: Coalesce(
+            Subquery(
+                model.objects.filter(
+                    recipe=OuterRef('pk')
+                ).order_by().values('recipe').annotate(
+                    total=Count('id')
+                ).values('total')
+            ),
+            0,
+        )
+        for model, counter in RECIPE_COUNTER_FIELDS.items()
+    }
+
+
+def get_recipes_with_counters_drift():
+    """Получаем рецепты, у которых счетчики разошлись с фактом."""
+    actual = {
+        f'actual_{counter}': expression
+        for counter, expression in get_actual_recipe_counters().items()
+    }
+    drift = Q()
+    for counter in RECIPE_COUNTER_FIELDS.values():
+        drift |= ~Q(**{counter: F(f'actual_{counter}')})
+    return Recipe.objects.annotate(**actual).filter(drift)
+
+
+def reconcile_recipe_counters():
+    """
+    Пересчитываем счетчики всех рецептов одним UPDATE.
+    Возвращаем количество обновленных рецептов.
+    """
+    return Recipe.objects.update(**get_actual_recipe_counters())
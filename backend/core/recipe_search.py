@@ -0,0 +1,74 @@
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+from recipes.models import Recipe
+
+POSTGRESQL_SEARCH_QUERY = "websearch_to_tsquery('pg_catalog.russian', %s)"
+# Веса столбцов name и text для bm25 в SQLite.
+SQLITE_SEARCH_WEIGHTS = (10.0, 1.0)
+
+
+def get_fts5_query(value):
+    """
+    Собираем запрос FTS5 из слов строки поиска: каждое слово
+    в кавычках и ищется по началу, что частично заменяет
+    стемминг. Слова объединяются через AND.
+    """
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', value))
+
+
+def _search_postgresql(queryset, value):
+    return queryset.filter(
+        RawSQL(
+            f'"recipes_recipe"."search_vector" @@ {POSTGRESQL_SEARCH_QUERY}',
+            (value,),
+            output_field=BooleanField(),
+        )
+    ).annotate(
+        search_rank=RawSQL(
+            'ts_rank_cd("recipes_recipe"."search_vector", '
+            f'{POSTGRESQL_SEARCH_QUERY})',
+            (value,),
+            output_field=FloatField(),
+        )
+    )
+
+
+def _search_sqlite(queryset, query):
+    weights = ', '.join(map(str, SQLITE_SEARCH_WEIGHTS))
+    return queryset.filter(
+        id__in=RawSQL(
+            'SELECT rowid FROM recipes_recipe_fts '
+            'WHERE recipes_recipe_fts MATCH %s',
+            (query,),
+        )
+    ).annotate(
+        search_rank=RawSQL(
+            f'(SELECT -bm25(recipes_recipe_fts, {weights}) '
+            'FROM recipes_recipe_fts WHERE recipes_recipe_fts MATCH %s '
+            'AND rowid = "recipes_recipe"."id")',
+            (query,),
+            output_field=FloatField(),
+        )
+    )
+
+
+def search_recipes(queryset, value):
+    """
+    Ищем рецепты по названию и описанию и сортируем по
+    релевантности, при равенстве - по сортировке рецептов.
+    В PostgreSQL поиск идет по колонке tsvector с русским
+    стеммингом через GIN индекс, в SQLite - по таблице FTS5.
+    Ранг считается только для найденных рецептов.
+    """
+    if connection.vendor == 'postgresql':
+        queryset = _search_postgresql(queryset, value)
+    else:
+        query = get_fts5_query(value)
+        if not query:
+            return queryset.none()
+        queryset = _search_sqlite(queryset, query)
+    return queryset.order_by('-search_rank', *Recipe._meta.ordering)
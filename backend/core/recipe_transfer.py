@@ -0,0 +1,286 @@
+import json
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import F
+
+from core.catalog_cache import get_tags_by_id
+from core.constants import RECIPE_TRANSFER_BATCH_SIZE
+from core.images import build_recipe_image
+from core.loaders import iter_batches
+from core.similar_recipes import update_similar_recipes
+from core.tasks import enqueue
+from core.timeline import fan_out_recipes
+from recipes.models import Ingredient, Recipe, RecipeIngredientAmount, Tag
+
+User = get_user_model()
+
+RECIPE_EXPORT_FIELDS = (
+    'id', 'name', 'text', 'cooking_time', 'image', 'image_thumbnails',
+    'image_status',
+)
+RECIPE_IMPORT_FIELDS = ('name', 'text', 'cooking_time')
+
+
+def _get_recipes_relations(recipe_ids):
+    """
+    Получаем слаги тегов и ингредиенты пачки рецептов двумя
+    запросами. Слаги берутся из кеша справочника тегов.
+    """
+    tags_by_id = get_tags_by_id()
+    tags = defaultdict(list)
+    for recipe_id, tag_id in Recipe.tags.through.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list('recipe_id', 'tag_id'):
+        tags[recipe_id].append(tags_by_id[tag_id]['slug'])
+    ingredients = defaultdict(list)
+    for row in RecipeIngredientAmount.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values(
+        'recipe_id', 'amount',
+        name=F('ingredient__name'),
+        measurement_unit=F('ingredient__measurement_unit'),
+    ).order_by('id'):
+        ingredients[row.pop('recipe_id')].append(row)
+    return tags, ingredients
+
+
+def iter_recipes_ndjson(batch_size=RECIPE_TRANSFER_BATCH_SIZE):
+    """
+    Выгружаем рецепты построчно в NDJSON. Рецепты читаются
+    курсором через iterator() (в PostgreSQL - серверным), теги
+    и ингредиенты подгружаются на каждую пачку, поэтому память
+    не зависит от количества рецептов. Автор, теги и ингредиенты
+    выгружаются по естественным ключам, картинка - путем в
+    хранилище вместе с миниатюрами.
+    """
+    recipes = Recipe.objects.order_by('id').values(
+        *RECIPE_EXPORT_FIELDS, 'author__username'
+    ).iterator(chunk_size=batch_size)
+    for batch in iter_batches(recipes, batch_size):
+        tags, ingredients = _get_recipes_relations(
+            [recipe['id'] for recipe in batch]
+        )
+        for recipe in batch:
+            recipe_id = recipe.pop('id')
+            recipe['author'] = recipe.pop('author__username')
+            recipe['tags'] = tags[recipe_id]
+            recipe['ingredients'] = ingredients[recipe_id]
+            yield json.dumps(recipe, ensure_ascii=False) + '\n'
+
+
+class RecipeImporter:
+    """
+    Загрузка рецептов из NDJSON пачками. Каждая пачка
+    загружается в своей транзакции: авторы, теги и ингредиенты
+    пачки ищутся тремя запросами, рецепты, их теги и количества
+    ингредиентов записываются одним bulk_create на таблицу,
+    по лентам подписчиков пачка раскладывается, а похожие рецепты
+    пересчитываются фоновыми задачами.
+    Некорректные строки пропускаются и попадают в отчет с
+    номером строки. Картинки не декодируются: в строке передается
+    путь к файлу в хранилище, а без готовых миниатюр рецепт
+    ждет обработки командой buildrecipethumbnails.
+    """
+
+    def __init__(self, batch_size=RECIPE_TRANSFER_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.created = 0
+        self.errors = []
+
+    def parse(self, batch):
+        """Разбираем строки пачки в словари."""
+        records = []
+        for number, line in batch:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            if not isinstance(record, dict):
+                self.errors.append(
+                    {'line': number, 'errors': ['некорректный JSON']}
+                )
+                continue
+            records.append((number, record))
+        return records
+
+    @staticmethod
+    def load_lookups(records):
+        """Ищем авторов, теги и ингредиенты всей пачки."""
+        usernames, slugs, names = set(), set(), set()
+        for _, record in records:
+            usernames.add(str(record.get('author')))
+            slugs.update(map(str, record.get('tags') or ()))
+            names.update(
+                str(ingredient.get('name'))
+                for ingredient in record.get('ingredients') or ()
+                if isinstance(ingredient, dict)
+            )
+        return {
+            'authors': User.objects.in_bulk(usernames, field_name='username'),
+            'tags': Tag.objects.in_bulk(slugs, field_name='slug'),
+            'ingredients': {
+                (ingredient.name, ingredient.measurement_unit): ingredient
+                for ingredient in Ingredient.objects.filter(name__in=names)
+            },
+        }
+
+    @staticmethod
+    def clean_fields(record):
+        """
+        Проверяем поля рецепта валидаторами модели. Возвращаем
+        приведенные значения и список ошибок.
+        """
+        values, errors = {}, []
+        for field_name in RECIPE_IMPORT_FIELDS:
+            try:
+                values[field_name] = Recipe._meta.get_field(field_name).clean(
+                    record.get(field_name), None
+                )
+            except ValidationError as error:
+                errors.append(f'{field_name}: {" ".join(error.messages)}')
+        image = record.get('image')
+        if not isinstance(image, str) or not image or len(image) > (
+            Recipe._meta.get_field('image').max_length
+        ):
+            errors.append('image: нужен путь к файлу в хранилище')
+        return values, errors
+
+    @staticmethod
+    def clean_tags(record, lookups):
+        """Находим теги рецепта по слагам."""
+        slugs = record.get('tags')
+        if not isinstance(slugs, list) or not slugs:
+            return [], ['tags: нужен список слагов тегов']
+        tags = [lookups['tags'].get(str(slug)) for slug in slugs]
+        if None in tags:
+            return [], ['tags: неизвестный тег']
+        if len(set(slugs)) != len(slugs):
+            return [], ['tags: тег указан дважды']
+        return tags, []
+
+    @staticmethod
+    def clean_ingredients(record, lookups):
+        """Находим ингредиенты по названию и единице измерения."""
+        amount_field = RecipeIngredientAmount._meta.get_field('amount')
+        items = record.get('ingredients')
+        if not isinstance(items, list) or not items:
+            return [], ['ingredients: нужен список ингредиентов']
+        amounts = {}
+        for item in items:
+            if not isinstance(item, dict):
+                return [], ['ingredients: некорректный ингредиент']
+            ingredient = lookups['ingredients'].get(
+                (item.get('name'), item.get('measurement_unit'))
+            )
+            if ingredient is None:
+                return [], [f'ingredients: неизвестный {item.get("name")}']
+            if ingredient.id in amounts:
+                return [], ['ingredients: ингредиент указан дважды']
+            try:
+                amounts[ingredient.id] = amount_field.clean(
+                    item.get('amount'), None
+                )
+            except ValidationError as error:
+                return [], [f'ingredients: {" ".join(error.messages)}']
+        return list(amounts.items()), []
+
+    def build(self, record, lookups):
+        """
+        Собираем рецепт и его связи. Возвращаем рецепт, теги,
+        пары (id ингредиента, количество) и список ошибок.
+        """
+        values, errors = self.clean_fields(record)
+        author = lookups['authors'].get(str(record.get('author')))
+        if author is None:
+            errors.append('author: неизвестный автор')
+        tags, tag_errors = self.clean_tags(record, lookups)
+        amounts, ingredient_errors = self.clean_ingredients(record, lookups)
+        errors += tag_errors + ingredient_errors
+        if errors:
+            return None, errors
+        thumbnails = record.get('image_thumbnails')
+        ready = (
+            record.get('image_status') == Recipe.ImageStatus.READY
+            and isinstance(thumbnails, dict) and thumbnails
+        )
+        recipe = Recipe(
+            author=author,
+            image=record['image'],
+            image_thumbnails=thumbnails if ready else {},
+            image_status=(
+                Recipe.ImageStatus.READY if ready
+                else Recipe.ImageStatus.PENDING
+            ),
+            **values,
+        )
+        return (recipe, tags, amounts), []
+
+    @staticmethod
+    def save_recipes(recipes):
+        """
+        Записываем рецепты одним bulk_create. Если БД не
+        возвращает id вставленных строк (SQLite в Django 3.2),
+        рецепты сохраняются по одному.
+        """
+        if connection.features.can_return_rows_from_bulk_insert:
+            Recipe.objects.bulk_create(recipes)
+            return
+        for recipe in recipes:
+            recipe.save(force_insert=True)
+
+    def import_batch(self, batch):
+        """
+        Загружаем пачку строк в одной транзакции. Для рецептов
+        без готовых миниатюр ставим в очередь обработку
+        изображения, как при создании рецепта через API.
+        """
+        records = self.parse(batch)
+        lookups = self.load_lookups(records)
+        built = []
+        for number, record in records:
+            result, errors = self.build(record, lookups)
+            if errors:
+                self.errors.append({'line': number, 'errors': errors})
+            else:
+                built.append(result)
+        if not built:
+            return
+        with transaction.atomic():
+            self.save_recipes([recipe for recipe, _, _ in built])
+            Recipe.tags.through.objects.bulk_create(
+                Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id)
+                for recipe, tags, _ in built
+                for tag in tags
+            )
+            RecipeIngredientAmount.objects.bulk_create(
+                RecipeIngredientAmount(
+                    recipe_id=recipe.id,
+                    ingredient_id=ingredient_id,
+                    amount=amount,
+                )
+                for recipe, _, amounts in built
+                for ingredient_id, amount in amounts
+            )
+            recipe_ids = [recipe.id for recipe, _, _ in built]
+            enqueue(fan_out_recipes, *recipe_ids)
+            enqueue(update_similar_recipes, *recipe_ids)
+            for recipe, _, _ in built:
+                if recipe.image_status == Recipe.ImageStatus.PENDING:
+                    enqueue(build_recipe_image, recipe.id)
+        self.created += len(built)
+
+    def run(self, lines):
+        """
+        Загружаем поток строк NDJSON. Пустые строки пропускаются.
+        Возвращаем количество созданных рецептов и ошибки строк.
+        """
+        numbered = (
+            (number, line) for number, line in enumerate(lines, 1)
+            if line.strip()
+        )
+        for batch in iter_batches(numbered, self.batch_size):
+            self.import_batch(batch)
+        return {'created': self.created, 'errors': self.errors}
@@ -1,25 +1,73 @@
-import base64
-
-from django.core.files.base import ContentFile
+from django.core.files import File
+from django.db.models.fields.files import FieldFile
 from rest_framework.exceptions import ValidationError
-from rest_framework.serializers import ImageField, ModelSerializer
+from rest_framework.serializers import (ImageField, ModelSerializer,
+                                        PrimaryKeyRelatedField)
 
-from recipes.models import RecipeIngredientAmount
+from core.catalog_cache import get_tags_by_id
+from core.images import check_uploaded_image, decode_base64_image
+from core.metrics import measure_serializer
+from recipes.models import RecipeIngredientAmount, Tag
 
 
 class Base64ImageField(ImageField):
-    """Кастомное поле для работы с изображениями в формате base64."""
+    """
+    Кастомное поле для работы с изображениями в формате base64.
+    Изображение только декодируется и проверяется по заголовку,
+    уменьшение и перекодирование выполняет фоновая задача.
+    При выводе отдается ссылка на миниатюру thumbnail_size,
+    если она уже построена, иначе - на оригинал.
+    """
+
+    def __init__(self, *args, thumbnail_size=None, **kwargs):
+        self.thumbnail_size = thumbnail_size
+        super().__init__(*args, **kwargs)
 
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
-            format, imgstr = data.split(';base64,')
-            ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
-
+            if ';base64,' not in data:
+                raise ValidationError('Ожидалось изображение в base64!')
+            file = decode_base64_image(data.split(';base64,', 1)[1])
+            data = File(file, name=check_uploaded_image(file))
         return super().to_internal_value(data)
 
+    def to_representation(self, value):
+        thumbnails = getattr(value.instance, 'image_thumbnails', None)
+        if value and self.thumbnail_size and thumbnails:
+            name = thumbnails.get(self.thumbnail_size)
+            if name:
+                value = FieldFile(value.instance, value.field, name)
+        return super().to_representation(value)
 
-class CustomBaseSerializer(ModelSerializer):
+
+class CachedTagPrimaryKeyRelatedField(PrimaryKeyRelatedField):
+    """
+    Кастомное поле выбора тега по id. Проверяет id по кешу
+    справочника тегов, а не запросом к БД на каждый тег,
+    и собирает экземпляр тега из закешированных полей.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            tag = get_tags_by_id().get(int(data))
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if tag is None:
+            self.fail('does_not_exist', pk_value=data)
+        return Tag.from_db(Tag.objects.db, tuple(tag), tuple(tag.values()))
+
+
+class TimedSerializerMixin:
+    """Учитываем время сериализации в метриках запроса."""
+
+    def to_representation(self, instance):
+        with measure_serializer(self):
+            return super().to_representation(instance)
+
+
+class CustomBaseSerializer(TimedSerializerMixin, ModelSerializer):
     """
     Кастомный сериализатор для добавления сериализаторам
     дополнительных методов воизбежании дублирования кода.
@@ -64,6 +112,45 @@ class CustomBaseSerializer(ModelSerializer):
             )for ingredient in ingredients]
         )
 
+    def get_recipe_ingredients_changes(self, recipe, ingredients):
+        """
+        Сравниваем ингредиенты рецепта с переданными. Возвращаем
+        id строк для удаления, строки с новым количеством и
+        ингредиенты для добавления. Строки без изменений не попадают
+        ни в один список.
+        """
+        amounts = {
+            ingredient['id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+        to_delete, to_update = [], []
+        for recipe_amount in RecipeIngredientAmount.objects.filter(
+            recipe=recipe
+        ).only('id', 'ingredient_id', 'amount'):
+            amount = amounts.pop(recipe_amount.ingredient_id, None)
+            if amount is None:
+                to_delete.append(recipe_amount.id)
+            elif amount != recipe_amount.amount:
+                recipe_amount.amount = amount
+                to_update.append(recipe_amount)
+        to_create = [
+            {'id': ingredient_id, 'amount': amount}
+            for ingredient_id, amount in amounts.items()
+        ]
+        return to_delete, to_update, to_create
+
+    def apply_recipe_ingredients_changes(self, recipe, to_delete, to_update,
+                                         to_create):
+        """Применяем изменения ингредиентов рецепта пакетно."""
+        if to_delete:
+            RecipeIngredientAmount.objects.filter(id__in=to_delete).delete()
+        if to_update:
+            RecipeIngredientAmount.objects.bulk_update(to_update, ('amount',))
+        if to_create:
+            self.create_recipe_ingredients_amount(
+                recipe=recipe, ingredients=to_create
+            )
+
     def get_field_and_no_field_value_validate(self, field, value):
         """
         Присваиваем проверяемому полю задаваемое значение
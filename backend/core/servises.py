@@ -1,13 +1,29 @@
 from django.contrib.auth import get_user_model
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.db import transaction
+from django.db.models import (Count, Exists, F, Max, OuterRef, Prefetch, Q,
+                              Subquery, Value, Window,
+                              prefetch_related_objects)
+from django.db.models.expressions import OrderBy, RawSQL
+from django.db.models.functions import RowNumber
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.response import Response
 
 from api.serializers import RecipMiniFieldseSerializer, SubscriptionSerializer
-from recipes.models import Recipe, RecipeIngredientAmount
+from core.constants import (RECIPE_EXPORT_FILENAME, SHOPPING_CART_FILENAME,
+                            SHOPPING_CART_ITERATOR_CHUNK_SIZE,
+                            SUBSCRIPTION_RECIPES_ORDERING)
+from core.exporters import SHOPPING_CART_EXPORTERS
+from core.recipe_relations import add_recipe_relation, delete_recipe_relation
+from core.recipe_transfer import RecipeImporter, iter_recipes_ndjson
+from core.shopping_cart import (add_recipe_to_shopping_cart_totals,
+                                remove_recipe_from_shopping_cart_totals)
+from core.timeline import (add_author_to_timeline, get_pull_author_ids,
+                           remove_author_from_timeline)
+from recipes.models import (Cart, FavoriteRecipe, Recipe,
+                            ShoppingCartIngredient, TimelineEntry)
 from users.models import Subscription
 
 User = get_user_model()
@@ -37,7 +53,10 @@ def creating_subscription_between_user_and_author(
         context={"request": request},
     )
     serializer.is_valid(raise_exception=True)
-    Subscription.objects.create(user=user, author=author)
+    with transaction.atomic():
+        Subscription.objects.create(user=user, author=author)
+        add_author_to_timeline(user_id=user.id, author_id=author.id)
+    prefetch_subscription_recipes(request, [author])
     return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
@@ -52,17 +71,95 @@ def delete_subscription_between_user_and_author(user, author_id):
         user=user,
         author=_get_author(author_id),
     )
-    subscription.delete()
+    with transaction.atomic():
+        subscription.delete()
+        remove_author_from_timeline(
+            user_id=user.id, author_id=subscription.author_id
+        )
     return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 def get_filtered_subscription_queryset(user):
-    """Получаем queryset авторов на которых подписан юзер."""
-    return User.objects.filter(author_in_subscription__user=user)
+    """
+    Получаем queryset авторов на которых подписан юзер.
+    Количество рецептов считается в том же запросе, а статус
+    подписки заведомо истинный и не требует проверки. Сортировку
+    задаем явно: к запросам с GROUP BY Meta.ordering не применяется.
+    """
+    return User.objects.filter(author_in_subscription__user=user).annotate(
+        recipes_count=Count('recipe_author'),
+        is_subscribed=Value(True),
+    ).order_by(*User._meta.ordering)
+
+
+def _get_recipes_limit(request):
+    """
+    Получаем ограничение количества рецептов из параметра
+    recipes_limit. Некорректное значение игнорируем.
+    """
+    recipes_limit = request.query_params.get('recipes_limit', '')
+    if recipes_limit.isdigit():
+        return int(recipes_limit)
+    return None
+
+
+def _get_limited_recipes_queryset(author_ids, recipes_limit):
+    """
+    Получаем последние recipes_limit рецептов каждого автора
+    одним запросом: рецепты нумеруются оконной функцией
+    ROW_NUMBER() в разрезе автора и отбираются по номеру.
+    Без авторов (пустая страница подписок) запрос не строится:
+    фильтр по пустому списку не компилируется в SQL.
+    """
+    if not author_ids:
+        return Recipe.objects.none()
+    recipes = Recipe.objects.filter(
+        author__in=author_ids
+    ).order_by(*SUBSCRIPTION_RECIPES_ORDERING)
+    if recipes_limit is None:
+        return recipes
+    ranked_sql, ranked_params = recipes.annotate(
+        recipe_rank=Window(
+            expression=RowNumber(),
+            partition_by=(F('author'),),
+            order_by=[
+                OrderBy(F(field.lstrip('-')), descending=field[0] == '-')
+                for field in SUBSCRIPTION_RECIPES_ORDERING
+            ],
+        )
+    ).order_by().values('id', 'recipe_rank').query.sql_with_params()
+    return recipes.filter(
+        id__in=RawSQL(
+            f'SELECT ranked.id FROM ({ranked_sql}) AS ranked '
+            'WHERE ranked.recipe_rank <= %s',
+            (*ranked_params, recipes_limit),
+        )
+    )
+
+
+def prefetch_subscription_recipes(request, authors):
+    """
+    Подгружаем последние рецепты авторов одним запросом
+    с учетом параметра recipes_limit.
+    """
+    prefetch_related_objects(
+        authors,
+        Prefetch(
+            'recipe_author',
+            queryset=_get_limited_recipes_queryset(
+                author_ids=[author.id for author in authors],
+                recipes_limit=_get_recipes_limit(request),
+            ),
+        ),
+    )
 
 
 def get_subscriptions_serializer_with_pages(request, pages):
-    """Получаем сериализатор для вывода списка всех подписок у юзера."""
+    """
+    Получаем сериализатор для вывода списка всех подписок у юзера.
+    Рецепты авторов страницы подгружаются одним запросом.
+    """
+    prefetch_subscription_recipes(request, pages)
     return SubscriptionSerializer(
         pages,
         many=True,
@@ -70,6 +167,135 @@ def get_subscriptions_serializer_with_pages(request, pages):
     )
 
 
+def get_recipe_queryset_with_user_flags(user):
+    """
+    Получаем queryset рецептов для чтения с фиксированным
+    количеством запросов к БД вне зависимости от размера страницы.
+    Автор подтягивается через JOIN, а флаги is_favorited,
+    is_in_shopping_cart и is_subscribed аннотируются подзапросами
+    EXISTS. Теги и ингредиенты подгружает сериализатор только
+    для рецептов, которых нет в кеше фрагментов.
+    Для анонима флаги аннотируются значением False.
+    """
+    queryset = Recipe.objects.select_related('author')
+    if user.is_anonymous:
+        return queryset.annotate(
+            is_favorited=Value(False),
+            is_in_shopping_cart=Value(False),
+            is_subscribed=Value(False),
+        )
+    return queryset.annotate(
+        is_favorited=Exists(
+            FavoriteRecipe.objects.filter(user=user, recipe=OuterRef('pk'))
+        ),
+        is_in_shopping_cart=Exists(
+            Cart.objects.filter(user=user, recipe=OuterRef('pk'))
+        ),
+        is_subscribed=Exists(
+            Subscription.objects.filter(
+                user=user, author=OuterRef('author')
+            )
+        ),
+    )
+
+
+def get_timeline_queryset(user):
+    """
+    Получаем ленту юзера для пагинации, новые рецепты первыми.
+    Обычно это записи TimelineEntry: страница читается по
+    индексу (user, -pub_date) без сортировки всей ленты. Если
+    юзер подписан на авторов с большим количеством подписчиков,
+    их рецепты не разложены по лентам, и лента собирается из
+    рецептов: разложенных и рецептов этих авторов. У элементов
+    обоих вариантов есть recipe_id.
+    """
+    entries = TimelineEntry.objects.filter(user=user)
+    pull_author_ids = get_pull_author_ids(user)
+    if not pull_author_ids:
+        return entries.order_by('-pub_date', '-recipe_id')
+    return Recipe.objects.filter(
+        Q(id__in=entries.values('recipe_id'))
+        | Q(author_id__in=pull_author_ids)
+    ).annotate(recipe_id=F('id')).order_by('-pub_date', '-id')
+
+
+def get_timeline_recipes(user, page):
+    """
+    Получаем рецепты страницы ленты одним запросом по первичному
+    ключу в порядке страницы.
+    """
+    recipes = get_recipe_queryset_with_user_flags(user).in_bulk(
+        [item.recipe_id for item in page]
+    )
+    return [
+        recipes[item.recipe_id] for item in page
+        if item.recipe_id in recipes
+    ]
+
+
+def get_similar_recipes(user, recipe_id):
+    """
+    Получаем предрасчитанные похожие рецепты одним запросом
+    по индексу (recipe, -score). Если похожих нет, проверяем
+    существование рецепта: для неизвестного вызываем ошибку 404.
+    """
+    similar = list(get_recipe_queryset_with_user_flags(user).filter(
+        similar_to_recipes__recipe_id=recipe_id
+    ).order_by('-similar_to_recipes__score', '-id'))
+    if not similar:
+        get_object_or_404(Recipe, id=recipe_id)
+    return similar
+
+
+def get_user_relations_version(user):
+    """
+    Получаем версию связей юзера, от которых зависят флаги
+    is_favorited, is_in_shopping_cart и is_subscribed: количество
+    и максимальный id его записей в избранном, корзине и подписках.
+    Любое добавление или удаление меняет версию, поэтому ее не
+    нужно сбрасывать при изменениях. Считается одним запросом.
+    """
+    versions = {}
+    for name, model in (
+        ('favorites', FavoriteRecipe),
+        ('carts', Cart),
+        ('subscriptions', Subscription),
+    ):
+        relations = model.objects.filter(
+            user=OuterRef('pk')
+        ).order_by().values('user')
+        versions[f'{name}_count'] = Subquery(
+            relations.annotate(value=Count('id')).values('value')
+        )
+        versions[f'{name}_max_id'] = Subquery(
+            relations.annotate(value=Max('id')).values('value')
+        )
+    return User.objects.filter(pk=user.pk).annotate(
+        **versions
+    ).values_list(*versions).get()
+
+
+def get_recipes_version(queryset):
+    """
+    Получаем версию выборки рецептов: количество и время
+    последнего изменения. Новый, измененный или удаленный
+    рецепт меняет версию.
+    """
+    return tuple(queryset.order_by().aggregate(
+        count=Count('id'), updated_at=Max('updated_at')
+    ).values())
+
+
+def get_recipe_version(queryset, pk):
+    """
+    Получаем версию рецепта для ответа: время изменения и
+    аннотированные флаги юзера. Если рецепта нет - None.
+    """
+    return queryset.filter(pk=pk).values_list(
+        'updated_at', 'is_favorited', 'is_in_shopping_cart', 'is_subscribed'
+    ).first()
+
+
 def creation_favorite_or_shopping_cart_recipe(model, user, id):
     """
     Добавляет рецепт в избранное или список покупок
@@ -77,14 +303,19 @@ def creation_favorite_or_shopping_cart_recipe(model, user, id):
     найден - передает ошибку 404. Если рецепт ранее был
     добавлен - передает ошибку 400. При успешном выполнении
     возвращает статус 201 и сериализованные данные.
+    При добавлении в корзину пересчитывает список покупок.
     """
     recipe = get_object_or_404(Recipe, id=id)
-    if model.objects.filter(user=user, recipe=recipe).exists():
-        return Response(
-            {"errors": "Рецепт уже добавлен!"},
-            status=status.HTTP_400_BAD_REQUEST,
-        )
-    model.objects.create(user=user, recipe=recipe)
+    with transaction.atomic():
+        if not add_recipe_relation(model, user.id, recipe.id):
+            return Response(
+                {"errors": "Рецепт уже добавлен!"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if model is Cart:
+            add_recipe_to_shopping_cart_totals(
+                recipe_id=recipe.id, user_id=user.id
+            )
     serializer = RecipMiniFieldseSerializer(recipe)
     return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -95,56 +326,73 @@ def delete_recipe_from_favorite_or_shopping_cart(model, user, id):
     в зависимости от преданной модели. Если рецепт ранее был
     удален - передает ошибку 400. При успешном выполнении
     возвращает статус 204.
+    При удалении из корзины пересчитывает список покупок.
     """
-    favorite_or_in_shopping_cart_recipe = model.objects.filter(
-        user=user, recipe__id=id
-    )
-    if favorite_or_in_shopping_cart_recipe.exists():
-        favorite_or_in_shopping_cart_recipe.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
-    return Response(
-        {"errors": "Рецепт уже удален!"},
-        status=status.HTTP_400_BAD_REQUEST,
-    )
-
-
-def _create_shopping_cart_text(user, ingredients, date):
-    """Получаем текст списка покупок."""
-    text = (
-        f'Привет, {user.first_name}!\n\n'
-        f'Вот твой список покупок на {date.strftime("%d.%m")}.\n\n'
-        'Для выбранных рецептов нужны игредиенты:\n\n'
-    )
-    text += '\n'.join([
-        f' - {ingredient["ingredient__name"]} '
-        f'({ingredient["ingredient__measurement_unit"]})'
-        f' - {ingredient["in_shopping_cart_ingredient_amount"]}'
-        for ingredient in ingredients
-    ])
-    text += f'\n\nПолучено с помощью Foodgram {date.strftime("%Y")}.'
-    return text
+    with transaction.atomic():
+        if not delete_recipe_relation(model, user.id, id):
+            return Response(
+                {"errors": "Рецепт уже удален!"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if model is Cart:
+            remove_recipe_from_shopping_cart_totals(
+                recipe_id=id, user_id=user.id
+            )
+    return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-def create_and_download_shopping_cart(user):
+def create_and_download_shopping_cart(user, export_format):
     """
     Создает и скачивает список покупок пользователя.
-    Производит подсчет необходимых ингредиентов
-    в рецептах из списка покупок. Формирует текстовый
-    файл и выгружает его.
+    Суммы ингредиентов берутся из предрасчитанной таблицы
+    ShoppingCartIngredient, строки читаются курсором через
+    iterator() и сразу передаются в потоковый ответ в
+    выбранном формате, не собирая файл в памяти.
     """
-    ingredients = RecipeIngredientAmount.objects.filter(
-        recipe__in_shopping_cart__user=user
+    ingredients = ShoppingCartIngredient.objects.filter(
+        user=user
     ).values(
         'ingredient__name',
-        'ingredient__measurement_unit'
-    ).annotate(in_shopping_cart_ingredient_amount=Sum('amount'))
-    shopping_list_date = timezone.now()
-    cart_text = _create_shopping_cart_text(
-        user, ingredients, shopping_list_date
+        'ingredient__measurement_unit',
+        in_shopping_cart_ingredient_amount=F('amount'),
+    ).order_by(
+        'ingredient__name'
+    ).iterator(chunk_size=SHOPPING_CART_ITERATOR_CHUNK_SIZE)
+    exporter = SHOPPING_CART_EXPORTERS[export_format](
+        user, ingredients, timezone.now()
+    )
+    response = StreamingHttpResponse(
+        exporter.stream(), content_type=exporter.content_type
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{SHOPPING_CART_FILENAME}.{exporter.format}"'
     )
+    return response
+
 
-    response = HttpResponse(cart_text, content_type='text/plain')
+def create_recipes_export_response():
+    """
+    Выгружает все рецепты потоком в NDJSON: по рецепту
+    на строку, без сборки файла в памяти.
+    """
+    response = StreamingHttpResponse(
+        iter_recipes_ndjson(), content_type='application/x-ndjson'
+    )
     response['Content-Disposition'] = (
-        'attachment; filename="foodgram_shopping_cart.txt"'
+        f'attachment; filename="{RECIPE_EXPORT_FILENAME}.ndjson"'
     )
     return response
+
+
+def import_recipes_from_request(request):
+    """
+    Загружает рецепты из тела запроса в NDJSON. Тело читается
+    построчно, пачки рецептов записываются в отдельных
+    транзакциях. Возвращает количество созданных рецептов и
+    ошибки по номерам строк. Если ни один рецепт не создан
+    из-за ошибок - статус 400.
+    """
+    report = RecipeImporter().run(request.stream or ())
+    if report['errors'] and not report['created']:
+        return Response(report, status=status.HTTP_400_BAD_REQUEST)
+    return Response(report, status=status.HTTP_200_OK)
@@ -0,0 +1,101 @@
+from contextlib import contextmanager
+
+from django.db import connection
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Greatest
+
+from recipes.models import Cart, RecipeIngredientAmount, ShoppingCartIngredient
+
+
+def add_recipe_to_shopping_cart_totals(recipe_id, user_id=None):
+    """
+    Прибавляем ингредиенты рецепта к спискам покупок.
+    Если user_id не передан - ко всем пользователям,
+    у которых рецепт лежит в корзине. Выполняется одним
+    запросом INSERT ... ON CONFLICT DO UPDATE.
+    """
+    quote_name = connection.ops.quote_name
+    totals_table = quote_name(ShoppingCartIngredient._meta.db_table)
+    params = [recipe_id]
+    user_condition = ''
+    if user_id is not None:
+        user_condition = 'AND cart.user_id = %s'
+        params.append(user_id)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {totals_table} (user_id, ingredient_id, amount) '
+            'SELECT cart.user_id, ria.ingredient_id, ria.amount '
+            f'FROM {quote_name(Cart._meta.db_table)} AS cart '
+            f'INNER JOIN {quote_name(RecipeIngredientAmount._meta.db_table)}'
+            ' AS ria ON ria.recipe_id = cart.recipe_id '
+            f'WHERE cart.recipe_id = %s {user_condition} '
+            'ON CONFLICT (user_id, ingredient_id) DO UPDATE '
+            f'SET amount = {totals_table}.amount + EXCLUDED.amount',
+            params,
+        )
+
+
+def remove_recipe_from_shopping_cart_totals(recipe_id, user_id=None):
+    """
+    Вычитаем ингредиенты рецепта из списков покупок.
+    Если user_id не передан - у всех пользователей,
+    у которых рецепт лежит в корзине. Вызывается до удаления
+    записи корзины или изменения ингредиентов рецепта.
+    Опустевшие строки удаляются.
+    """
+    recipe_amounts = RecipeIngredientAmount.objects.filter(
+        recipe_id=recipe_id
+    )
+    totals = ShoppingCartIngredient.objects.filter(
+        ingredient__in=recipe_amounts.values('ingredient')
+    )
+    if user_id is not None:
+        totals = totals.filter(user_id=user_id)
+    else:
+        totals = totals.filter(
+            user__in=Cart.objects.filter(
+                recipe_id=recipe_id
+            ).values('user')
+        )
+    totals.update(
+        amount=Greatest(
+            F('amount') - Subquery(
+                recipe_amounts.filter(
+                    ingredient=OuterRef('ingredient')
+                ).values('amount')[:1]
+            ),
+            0,
+        )
+    )
+    totals.filter(amount=0).delete()
+
+
+@contextmanager
+def recipes_shopping_cart_totals_updated(recipe_ids):
+    """
+    Пересчитываем списки покупок при изменении ингредиентов
+    рецептов в обход сериализатора, например, в админке: до
+    изменения вычитаем ингредиенты рецептов, после - прибавляем.
+    """
+    recipe_ids = set(recipe_ids)
+    for recipe_id in recipe_ids:
+        remove_recipe_from_shopping_cart_totals(recipe_id=recipe_id)
+    yield
+    for recipe_id in recipe_ids:
+        add_recipe_to_shopping_cart_totals(recipe_id=recipe_id)
+
+
+def get_expected_shopping_cart_totals():
+    """
+    Считаем эталонные суммы ингредиентов по всем корзинам
+    агрегацией в БД. Используется для перестроения таблицы
+    и поиска расхождений.
+    """
+    return RecipeIngredientAmount.objects.filter(
+        recipe__in_shopping_cart__isnull=False
+    ).values(
+        'ingredient_id',
+        user_id=F('recipe__in_shopping_cart__user'),
+    ).annotate(
+        total_amount=Sum('amount')
+    ).order_by()
@@ -0,0 +1,32 @@
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from core.middleware import query_recorder
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    """
+    Подключаем учет SQL запросов к каждому новому соединению.
+    Обертка остается на соединении и ничего не делает вне запроса.
+    """
+    if query_recorder not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_recorder)
+
+
+@receiver(request_started)
+def check_persistent_connections(**kwargs):
+    """
+    Проверяем постоянные соединения с CONN_HEALTH_CHECKS перед
+    запросом: разорванное на стороне БД соединение закрывается,
+    и запрос откроет новое вместо ошибки на первом SQL.
+    """
+    for connection in connections.all():
+        if (
+            connection.settings_dict.get('CONN_HEALTH_CHECKS')
+            and connection.connection is not None
+            and not connection.is_usable()
+        ):
+            connection.close()
@@ -0,0 +1,136 @@
+import math
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Count, Min
+
+from core.constants import SIMILAR_RECIPES_BATCH_SIZE, SIMILAR_RECIPES_LIMIT
+from core.loaders import iter_batches
+from core.tasks import background_task
+from recipes.models import RecipeIngredientAmount, SimilarRecipe
+
+
+def _get_pairs_sql(recipe_count, limited):
+    """
+    Собираем запрос пар рецептов с общими ингредиентами. Это
+    произведение разреженной матрицы рецепт x ингредиент на ее
+    транспонированную: самосоединение по ингредиенту дает только
+    ненулевые пары, COUNT(*) - скалярное произведение бинарных
+    векторов, подзапросы - квадраты их норм. Для limited в каждой
+    группе оставляем SIMILAR_RECIPES_LIMIT лучших пар: при
+    фиксированном рецепте порядок по overlap^2 / similar_total
+    совпадает с порядком по косинусу, поэтому корень в БД не нужен.
+    """
+    table = connection.ops.quote_name(RecipeIngredientAmount._meta.db_table)
+    pairs = (
+        'SELECT a.recipe_id, b.recipe_id AS similar_id, COUNT(*) AS overlap, '
+        f'(SELECT COUNT(*) FROM {table} c WHERE c.recipe_id = a.recipe_id) '
+        'AS recipe_total, '
+        f'(SELECT COUNT(*) FROM {table} c WHERE c.recipe_id = b.recipe_id) '
+        'AS similar_total '
+        f'FROM {table} a INNER JOIN {table} b '
+        'ON b.ingredient_id = a.ingredient_id AND b.recipe_id <> a.recipe_id '
+        f'WHERE a.recipe_id IN ({", ".join(["%s"] * recipe_count)}) '
+        'GROUP BY a.recipe_id, b.recipe_id'
+    )
+    if not limited:
+        return pairs
+    return (
+        'SELECT recipe_id, similar_id, overlap, recipe_total, similar_total '
+        'FROM (SELECT p.*, ROW_NUMBER() OVER (PARTITION BY p.recipe_id '
+        'ORDER BY p.overlap * p.overlap * 1.0 / p.similar_total DESC, '
+        'p.similar_id DESC) AS position '
+        f'FROM ({pairs}) p) ranked WHERE position <= %s'
+    )
+
+
+def iter_similarity_scores(recipe_ids, limited=False):
+    """
+    Получаем тройки (рецепт, похожий рецепт, похожесть) для
+    рецептов recipe_ids. Похожесть - косинус бинарных векторов
+    ингредиентов. Рецепты без общих ингредиентов не попадают.
+    """
+    params = list(recipe_ids)
+    if limited:
+        params.append(SIMILAR_RECIPES_LIMIT)
+    with connection.cursor() as cursor:
+        cursor.execute(_get_pairs_sql(len(recipe_ids), limited), params)
+        for recipe_id, similar_id, overlap, recipe_total, similar_total in (
+            cursor.fetchall()
+        ):
+            yield (
+                recipe_id,
+                similar_id,
+                overlap / math.sqrt(recipe_total * similar_total),
+            )
+
+
+@background_task()
+def build_similar_recipes(*recipe_ids):
+    """
+    Пересчитываем списки похожих рецептов пачками по
+    SIMILAR_RECIPES_BATCH_SIZE: одним запросом на пачку находим
+    лучших соседей и заменяем строки пачки в транзакции.
+    Возвращаем количество записанных строк.
+    """
+    written = 0
+    for batch in iter_batches(recipe_ids, SIMILAR_RECIPES_BATCH_SIZE):
+        rows = [
+            SimilarRecipe(recipe_id=recipe_id, similar_id=similar_id,
+                          score=score)
+            for recipe_id, similar_id, score in iter_similarity_scores(
+                batch, limited=True
+            )
+        ]
+        with transaction.atomic():
+            SimilarRecipe.objects.filter(recipe_id__in=batch).delete()
+            SimilarRecipe.objects.bulk_create(rows)
+        written += len(rows)
+    return written
+
+
+def _get_affected_recipe_ids(recipe_ids):
+    """
+    Находим рецепты, чьи списки похожих меняются после записи
+    рецептов recipe_ids. Похожесть симметрична, поэтому список
+    соседа пересчитывается, если измененный рецепт в него уже
+    входит или теперь обгоняет в нем последнего.
+    """
+    written = set(recipe_ids)
+    scores = defaultdict(float)
+    for _, similar_id, score in iter_similarity_scores(recipe_ids):
+        scores[similar_id] = max(scores[similar_id], score)
+    affected = set(SimilarRecipe.objects.filter(
+        similar_id__in=recipe_ids
+    ).values_list('recipe_id', flat=True))
+    candidates = [
+        recipe_id for recipe_id in scores if recipe_id not in written
+    ]
+    for batch in iter_batches(candidates, SIMILAR_RECIPES_BATCH_SIZE):
+        lists = {
+            row['recipe_id']: row
+            for row in SimilarRecipe.objects.filter(
+                recipe_id__in=batch
+            ).order_by().values('recipe_id').annotate(
+                lowest=Min('score'), total=Count('id')
+            )
+        }
+        affected.update(
+            recipe_id for recipe_id in batch
+            if recipe_id not in lists
+            or lists[recipe_id]['total'] < SIMILAR_RECIPES_LIMIT
+            or scores[recipe_id] > lists[recipe_id]['lowest']
+        )
+    return affected - written
+
+
+@background_task()
+def update_similar_recipes(*recipe_ids):
+    """
+    Обновляем похожие рецепты после создания рецептов или
+    изменения их ингредиентов: пересчитываем списки самих
+    рецептов и соседей, на которые изменение влияет.
+    """
+    return build_similar_recipes(
+        *recipe_ids, *_get_affected_recipe_ids(recipe_ids)
+    )
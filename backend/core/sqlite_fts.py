@@ -0,0 +1,57 @@
+SQLITE_FTS_TABLE = 'recipes_recipe_fts'
+SQLITE_FTS_INSERT = (
+    'INSERT INTO recipes_recipe_fts(rowid, name, text) '
+    'VALUES (new.id, new.name, new.text);'
+)
+SQLITE_FTS_DELETE = (
+    'INSERT INTO recipes_recipe_fts(recipes_recipe_fts, rowid, name, text) '
+    "VALUES ('delete', old.id, old.name, old.text);"
+)
+# Триггеры, синхронизирующие таблицу FTS5 с recipes_recipe.
+SQLITE_FTS_TRIGGERS = {
+    'recipes_recipe_fts_insert': (
+        'CREATE TRIGGER recipes_recipe_fts_insert AFTER INSERT '
+        f'ON recipes_recipe BEGIN {SQLITE_FTS_INSERT} END;'
+    ),
+    'recipes_recipe_fts_delete': (
+        'CREATE TRIGGER recipes_recipe_fts_delete AFTER DELETE '
+        f'ON recipes_recipe BEGIN {SQLITE_FTS_DELETE} END;'
+    ),
+    'recipes_recipe_fts_update': (
+        'CREATE TRIGGER recipes_recipe_fts_update AFTER UPDATE '
+        'OF name, text ON recipes_recipe BEGIN '
+        f'{SQLITE_FTS_DELETE} {SQLITE_FTS_INSERT} END;'
+    ),
+}
+SQLITE_FTS_REBUILD = (
+    'INSERT INTO recipes_recipe_fts(recipes_recipe_fts) '
+    "VALUES ('rebuild');"
+)
+
+
+def restore_sqlite_fts_triggers(connection):
+    """
+    Создаем заново триггеры FTS5, которые SQLite теряет при
+    пересоздании recipes_recipe в миграциях, и перестраиваем
+    индекс: изменения рецептов без триггеров в него не попали.
+    Возвращаем имена восстановленных триггеров.
+    """
+    if connection.vendor != 'sqlite':
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT type, name FROM sqlite_master WHERE name = %s "
+            "OR (type = 'trigger' AND tbl_name = 'recipes_recipe')",
+            [SQLITE_FTS_TABLE],
+        )
+        existing = {name for _, name in cursor.fetchall()}
+        if SQLITE_FTS_TABLE not in existing:
+            return []
+        missing = [
+            name for name in SQLITE_FTS_TRIGGERS if name not in existing
+        ]
+        for name in missing:
+            cursor.execute(SQLITE_FTS_TRIGGERS[name])
+        if missing:
+            cursor.execute(SQLITE_FTS_REBUILD)
+    return missing
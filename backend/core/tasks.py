@@ -0,0 +1,172 @@
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from core.constants import STALE_BACKGROUND_TASK_ERROR
+from core.executors import LazyThreadPool
+from core.models import BackgroundTask
+
+logger = logging.getLogger(__name__)
+
+_executor = LazyThreadPool('BACKGROUND_TASKS_WORKERS', 'background-task')
+
+
+def background_task(on_failure=None):
+    """
+    Помечаем функцию как фоновую задачу. Задача находится
+    по пути к функции, ее аргументы должны сериализоваться
+    в JSON. Функция on_failure вызывается с теми же
+    аргументами, когда все попытки исчерпаны.
+    """
+    def decorator(func):
+        func.task_name = f'{func.__module__}.{func.__qualname__}'
+        func.on_failure = on_failure
+        return func
+    return decorator
+
+
+def get_executor():
+    """Получаем пул потоков процесса для фоновых задач."""
+    return _executor.get()
+
+
+def _run_in_thread(task_id):
+    """Выполняем задачу в потоке пула и закрываем его соединение с БД."""
+    try:
+        run_task(task_id)
+    except Exception:
+        logger.exception('Фоновая задача %s завершилась с ошибкой', task_id)
+    finally:
+        connection.close()
+
+
+def submit(task_id, delay=0):
+    """Передаем задачу в пул потоков, при необходимости с задержкой."""
+    if delay:
+        timer = threading.Timer(delay, submit, (task_id,))
+        timer.daemon = True
+        timer.start()
+        return
+    get_executor().submit(_run_in_thread, task_id)
+
+
+def enqueue(func, *args):
+    """
+    Ставим задачу в очередь. Строка задачи пишется в текущей
+    транзакции, а запуск откладывается до ее фиксации.
+    Режим BACKGROUND_TASKS_MODE определяет исполнителя:
+    thread - пул потоков процесса, sync - сразу в текущем
+    потоке, queue - только команда runtasks.
+    """
+    task = BackgroundTask.objects.create(name=func.task_name, args=list(args))
+    mode = settings.BACKGROUND_TASKS_MODE
+    if mode == 'thread':
+        transaction.on_commit(lambda: submit(task.id))
+    elif mode == 'sync':
+        transaction.on_commit(lambda: run_task(task.id))
+    return task
+
+
+def _fail(task, func, last_error):
+    """
+    Помечаем задачу проваленной и вызываем ее on_failure.
+    Задача переводится условным UPDATE из работы, поэтому при
+    параллельных runtasks on_failure вызывается один раз.
+    """
+    failed = BackgroundTask.objects.filter(
+        id=task.id, status=BackgroundTask.Status.RUNNING
+    ).update(status=BackgroundTask.Status.FAILED, last_error=last_error)
+    if failed and func.on_failure is not None:
+        func.on_failure(*task.args)
+
+
+def _retry_or_fail(task, func, error):
+    """
+    Откладываем повтор задачи с экспоненциальной задержкой
+    или, если попытки исчерпаны, помечаем ее проваленной.
+    """
+    if task.attempts < settings.BACKGROUND_TASKS_MAX_ATTEMPTS:
+        delay = settings.BACKGROUND_TASKS_RETRY_DELAY * 2 ** (
+            task.attempts - 1
+        )
+        BackgroundTask.objects.filter(id=task.id).update(
+            status=BackgroundTask.Status.PENDING,
+            run_at=timezone.now() + timedelta(seconds=delay),
+            last_error=repr(error),
+        )
+        if settings.BACKGROUND_TASKS_MODE == 'thread':
+            submit(task.id, delay)
+        return
+    _fail(task, func, repr(error))
+
+
+def _recover_stale_tasks(now):
+    """
+    Возвращаем в очередь задачи, зависшие в работе дольше
+    BACKGROUND_TASKS_TIMEOUT (например, после падения процесса).
+    Попытка зависшей задачи засчитана при захвате, поэтому
+    задачи, исчерпавшие BACKGROUND_TASKS_MAX_ATTEMPTS, больше
+    не повторяются, а помечаются проваленными.
+    """
+    stale = BackgroundTask.objects.filter(
+        status=BackgroundTask.Status.RUNNING,
+        started_at__lt=now - timedelta(
+            seconds=settings.BACKGROUND_TASKS_TIMEOUT
+        ),
+    )
+    stale.filter(
+        attempts__lt=settings.BACKGROUND_TASKS_MAX_ATTEMPTS
+    ).update(status=BackgroundTask.Status.PENDING)
+    for task in stale:
+        _fail(task, import_string(task.name), STALE_BACKGROUND_TASK_ERROR)
+
+
+def run_task(task_id):
+    """
+    Выполняем задачу, если ее удалось захватить: условный
+    UPDATE переводит в работу только ожидающую задачу, поэтому
+    пул потоков и runtasks не выполнят ее дважды. Успешно
+    выполненная задача удаляется из очереди.
+    """
+    claimed = BackgroundTask.objects.filter(
+        id=task_id, status=BackgroundTask.Status.PENDING
+    ).update(
+        status=BackgroundTask.Status.RUNNING,
+        attempts=F('attempts') + 1,
+        started_at=timezone.now(),
+    )
+    if not claimed:
+        return
+    task = BackgroundTask.objects.get(id=task_id)
+    func = import_string(task.name)
+    try:
+        func(*task.args)
+    except Exception as error:
+        logger.exception('Ошибка фоновой задачи %s', task)
+        _retry_or_fail(task, func, error)
+        return
+    BackgroundTask.objects.filter(id=task.id).delete()
+
+
+def run_pending_tasks(limit):
+    """
+    Выполняем до limit задач, время запуска которых наступило.
+    Перед этим возвращаем в очередь или проваливаем зависшие
+    задачи. Возвращаем количество обработанных задач.
+    """
+    now = timezone.now()
+    _recover_stale_tasks(now)
+    task_ids = list(
+        BackgroundTask.objects.filter(
+            status=BackgroundTask.Status.PENDING, run_at__lte=now
+        ).values_list('id', flat=True)[:limit]
+    )
+    for task_id in task_ids:
+        run_task(task_id)
+    return len(task_ids)
@@ -0,0 +1,160 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from core.tasks import background_task, enqueue
+from recipes.models import Recipe, TimelineEntry
+from users.models import Subscription
+
+User = get_user_model()
+
+
+def _insert_timeline_entries(condition, params, tail='', tail_params=()):
+    """
+    Раскладываем рецепты по лентам подписчиков их авторов одним
+    запросом INSERT ... SELECT ... ON CONFLICT DO NOTHING.
+    Рецепты авторов, у которых подписчиков больше
+    TIMELINE_PULL_THRESHOLD, пропускаются: они подмешиваются в
+    ленту при чтении. Возвращаем количество добавленных записей.
+    """
+    quote_name = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote_name(TimelineEntry._meta.db_table)} '
+            '(user_id, recipe_id, author_id, pub_date) '
+            'SELECT s.user_id, r.id, r.author_id, r.pub_date '
+            f'FROM {quote_name(Recipe._meta.db_table)} r '
+            f'INNER JOIN {quote_name(Subscription._meta.db_table)} s '
+            'ON s.author_id = r.author_id '
+            f'INNER JOIN {quote_name(User._meta.db_table)} a '
+            'ON a.id = r.author_id '
+            f'WHERE a.subscribers_count <= %s AND {condition}{tail} '
+            'ON CONFLICT (user_id, recipe_id) DO NOTHING',
+            [settings.TIMELINE_PULL_THRESHOLD, *params, *tail_params],
+        )
+        return cursor.rowcount
+
+
+@background_task()
+def fan_out_recipes(*recipe_ids):
+    """
+    Добавляем новые рецепты в ленты подписчиков их авторов.
+    Запускается после фиксации транзакции, в которой рецепты
+    созданы, повторный запуск ничего не дублирует.
+    """
+    if not recipe_ids:
+        return 0
+    return _insert_timeline_entries(
+        f'r.id IN ({", ".join(["%s"] * len(recipe_ids))})', recipe_ids
+    )
+
+
+@background_task()
+def fan_out_author(author_id):
+    """
+    Раскладываем все рецепты автора по лентам его подписчиков.
+    Запускается, когда подписчиков у автора становится не больше
+    TIMELINE_PULL_THRESHOLD: пока они читались при запросе ленты,
+    новые рецепты по лентам не раскладывались.
+    """
+    return _insert_timeline_entries('r.author_id = %s', (author_id,))
+
+
+def _change_subscribers_count(author_ids, delta):
+    """
+    Изменяем счетчик подписчиков авторов на delta одним
+    UPDATE с выражением F(), без чтения текущего значения.
+    """
+    User.objects.filter(id__in=author_ids).update(
+        subscribers_count=F('subscribers_count') + delta
+    )
+
+
+def add_author_to_timeline(user_id, author_id):
+    """
+    Вызывается после создания подписки: увеличиваем счетчик
+    подписчиков автора и добавляем в ленту юзера
+    TIMELINE_BACKFILL_SIZE последних рецептов автора.
+    """
+    _change_subscribers_count([author_id], 1)
+    _insert_timeline_entries(
+        's.user_id = %s AND s.author_id = %s',
+        (user_id, author_id),
+        ' ORDER BY r.pub_date DESC LIMIT %s',
+        (settings.TIMELINE_BACKFILL_SIZE,),
+    )
+
+
+def _fan_out_authors_below_threshold(author_ids):
+    """
+    Ставим в очередь раскладку рецептов авторов, у которых после
+    отписки подписчиков стало ровно TIMELINE_PULL_THRESHOLD, то
+    есть авторов, которые перестали читаться при запросе ленты.
+    """
+    for author_id in User.objects.filter(
+        id__in=author_ids,
+        subscribers_count=settings.TIMELINE_PULL_THRESHOLD,
+    ).values_list('id', flat=True):
+        enqueue(fan_out_author, author_id)
+
+
+def remove_author_from_timeline(user_id, author_id):
+    """
+    Вызывается после удаления подписки: уменьшаем счетчик
+    подписчиков автора и убираем его рецепты из ленты юзера.
+    Если автор при этом перестал читаться при запросе ленты,
+    раскладываем его рецепты по лентам подписчиков.
+    """
+    _change_subscribers_count([author_id], -1)
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+    _fan_out_authors_below_threshold([author_id])
+
+
+def remove_user_from_subscribers_counts(user_id):
+    """
+    Уменьшаем счетчики подписчиков авторов, на которых подписан
+    пользователь. Вызывается перед удалением пользователя:
+    его подписки удаляются каскадно.
+    """
+    author_ids = list(Subscription.objects.filter(
+        user_id=user_id
+    ).values_list('author_id', flat=True))
+    _change_subscribers_count(author_ids, -1)
+    _fan_out_authors_below_threshold(author_ids)
+
+
+def get_pull_author_ids(user):
+    """
+    Получаем id авторов из подписок юзера, чьи рецепты не
+    раскладываются по лентам, а читаются при запросе ленты.
+    """
+    return list(Subscription.objects.filter(
+        user=user,
+        author__subscribers_count__gt=settings.TIMELINE_PULL_THRESHOLD,
+    ).values_list('author_id', flat=True))
+
+
+def reconcile_timelines():
+    """
+    Пересчитываем счетчики подписчиков всех авторов и заново
+    раскладываем все рецепты по лентам. Нужен после загрузки
+    данных в обход сервисных функций и после изменения
+    TIMELINE_PULL_THRESHOLD. Возвращаем количество добавленных
+    записей ленты.
+    """
+    User.objects.update(subscribers_count=Coalesce(
+        Subquery(
+            Subscription.objects.filter(
+                author=OuterRef('pk')
+            ).order_by().values('author').annotate(
+                total=Count('id')
+            ).values('total')
+        ),
+        0,
+    ))
+    TimelineEntry.objects.filter(
+        author__subscribers_count__gt=settings.TIMELINE_PULL_THRESHOLD
+    ).delete()
+    return _insert_timeline_entries('1 = 1', ())
@@ -37,6 +37,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -52,10 +53,42 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
 }
 
+# Заголовок Server-Timing раскрывает внутренние тайминги, по умолчанию
+# он включен только в режиме отладки.
+METRICS_SERVER_TIMING = os.getenv(
+    'METRICS_SERVER_TIMING', str(DEBUG)
+) == 'True'
+# 0 отключает поиск N+1, иначе - сколько одинаковых запросов
+# сериализатора считать подозрительными.
+METRICS_N_PLUS_ONE_THRESHOLD = int(
+    os.getenv('METRICS_N_PLUS_ONE_THRESHOLD', 0)
+)
+# /api/_metrics доступен администратору и, если токен задан, с
+# заголовком Authorization: Bearer <METRICS_TOKEN>.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+# Анонимный доступ к /api/_metrics, только для закрытых сетей.
+METRICS_PUBLIC = os.getenv('METRICS_PUBLIC') == 'True'
+
+TOKEN_AUTH_LOCAL_CACHE_SIZE = int(
+    os.getenv('TOKEN_AUTH_LOCAL_CACHE_SIZE', 10000)
+)
+TOKEN_AUTH_LOCAL_CACHE_TTL = int(os.getenv('TOKEN_AUTH_LOCAL_CACHE_TTL', 10))
+# Пустое значение отключает общий кеш токенов.
+TOKEN_AUTH_SHARED_CACHE_ALIAS = os.getenv(
+    'TOKEN_AUTH_SHARED_CACHE_ALIAS', 'shared'
+)
+TOKEN_AUTH_SHARED_CACHE_TTL = int(
+    os.getenv('TOKEN_AUTH_SHARED_CACHE_TTL', 5 * 60)
+)
+
+CURSOR_PAGINATION_BY_DEFAULT = (
+    os.getenv('CURSOR_PAGINATION_BY_DEFAULT') == 'True'
+)
+
 DJOSER = {
     'SERIALIZERS': {
         'user_create': 'api.serializers.CustomUserCreateSerializer',
@@ -98,9 +131,58 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
         'PORT': os.getenv('DB_PORT'),
+        # Постоянные соединения: время жизни в секундах, 0 - на запрос.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 0)),
+        # Проверка постоянного соединения в начале запроса.
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS') == 'True',
+        # Тестовая БД. Для SQLite без имени создается в памяти, и
+        # тесты параллельных запросов пропускаются.
+        'TEST': {'NAME': os.getenv('DB_TEST_NAME')},
     }
 }
 
+# Покрывающие индексы избранного, корзины и подписок используют
+# INCLUDE, который есть только в PostgreSQL. SQLite создает их без
+# неключевых колонок, предупреждение об этом выводилось бы при
+# каждой команде manage.py.
+SILENCED_SYSTEM_CHECKS = ['models.W040']
+
+# Пул соединений процесса для DB_ENGINE=core.postgresql_pool:
+# MIN_SIZE соединений держатся открытыми, сверх них до MAX_SIZE
+# открываются под нагрузкой и закрываются при возврате.
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', 5))
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 10))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'foodgram-local',
+    },
+    'shared': {
+        'BACKEND': os.getenv(
+            'SHARED_CACHE_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache',
+        ),
+        'LOCATION': os.getenv(
+            'SHARED_CACHE_LOCATION', os.path.join(BASE_DIR, 'cache')
+        ),
+    },
+}
+
+CATALOG_LOCAL_CACHE_ALIAS = 'default'
+CATALOG_SHARED_CACHE_ALIAS = 'shared'
+# max-age общих ответов справочников и рецептов для анонимов.
+HTTP_CACHE_MAX_AGE = int(os.getenv('HTTP_CACHE_MAX_AGE', 60))
+RECIPE_FRAGMENT_CACHE_ALIAS = os.getenv(
+    'RECIPE_FRAGMENT_CACHE_ALIAS', 'shared'
+)
+RECIPE_FRAGMENT_CACHE_TIMEOUT = int(
+    os.getenv('RECIPE_FRAGMENT_CACHE_TIMEOUT', 24 * 60 * 60)
+)
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', 60 * 60))
+CATALOG_CACHE_VERSION_TTL = int(os.getenv('CATALOG_CACHE_VERSION_TTL', 5))
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -138,5 +220,37 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+RECIPE_IMAGE_MAX_UPLOAD_SIZE = int(
+    os.getenv('RECIPE_IMAGE_MAX_UPLOAD_SIZE', 10 * 1024 * 1024)
+)
+# Изображение приходит в теле запроса в base64, он на треть длиннее.
+DATA_UPLOAD_MAX_MEMORY_SIZE = (
+    RECIPE_IMAGE_MAX_UPLOAD_SIZE * 4 // 3 + 1024 * 1024
+)
+
+# thread - пул потоков процесса, queue - только команда runtasks,
+# sync - выполнение сразу после фиксации транзакции.
+BACKGROUND_TASKS_MODE = os.getenv('BACKGROUND_TASKS_MODE', 'thread')
+BACKGROUND_TASKS_WORKERS = int(os.getenv('BACKGROUND_TASKS_WORKERS', 2))
+BACKGROUND_TASKS_MAX_ATTEMPTS = int(
+    os.getenv('BACKGROUND_TASKS_MAX_ATTEMPTS', 3)
+)
+BACKGROUND_TASKS_RETRY_DELAY = int(
+    os.getenv('BACKGROUND_TASKS_RETRY_DELAY', 10)
+)
+BACKGROUND_TASKS_TIMEOUT = int(os.getenv('BACKGROUND_TASKS_TIMEOUT', 10 * 60))
+
+# Асинхронные представления для списков рецептов, ингредиентов
+# и подписок. Имеют смысл при запуске под ASGI (SERVER_MODE=asgi).
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS') == 'True'
+ASYNC_VIEWS_THREADS = int(os.getenv('ASYNC_VIEWS_THREADS', 10))
+
+# Лента рецептов из подписок. Рецепты авторов, у которых подписчиков
+# больше TIMELINE_PULL_THRESHOLD, не раскладываются по лентам, а
+# подмешиваются при чтении. При подписке в ленту добавляются
+# TIMELINE_BACKFILL_SIZE последних рецептов автора.
+TIMELINE_PULL_THRESHOLD = int(os.getenv('TIMELINE_PULL_THRESHOLD', 10000))
+TIMELINE_BACKFILL_SIZE = int(os.getenv('TIMELINE_BACKFILL_SIZE', 50))
+
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -1,7 +1,12 @@
 from django.contrib import admin
+from django.db import transaction
 
+from core.shopping_cart import (add_recipe_to_shopping_cart_totals,
+                                recipes_shopping_cart_totals_updated,
+                                remove_recipe_from_shopping_cart_totals)
 from recipes.models import (Cart, FavoriteRecipe, Ingredient, Recipe,
-                            RecipeIngredientAmount, Tag)
+                            RecipeIngredientAmount, ShoppingCartIngredient,
+                            Tag)
 
 
 @admin.register(Cart)
@@ -18,6 +23,35 @@ class CartAdmin(admin.ModelAdmin):
         'recipe',
     )
 
+    def save_model(self, request, obj, form, change):
+        """
+        Записи корзины из админки тоже меняют списки покупок:
+        вычитаем прежний рецепт юзера и прибавляем новый.
+        """
+        if change:
+            previous = Cart.objects.get(pk=obj.pk)
+            remove_recipe_from_shopping_cart_totals(
+                recipe_id=previous.recipe_id, user_id=previous.user_id
+            )
+        super().save_model(request, obj, form, change)
+        add_recipe_to_shopping_cart_totals(
+            recipe_id=obj.recipe_id, user_id=obj.user_id
+        )
+
+    def delete_model(self, request, obj):
+        remove_recipe_from_shopping_cart_totals(
+            recipe_id=obj.recipe_id, user_id=obj.user_id
+        )
+        super().delete_model(request, obj)
+
+    @transaction.atomic
+    def delete_queryset(self, request, queryset):
+        for recipe_id, user_id in queryset.values_list('recipe', 'user'):
+            remove_recipe_from_shopping_cart_totals(
+                recipe_id=recipe_id, user_id=user_id
+            )
+        super().delete_queryset(request, queryset)
+
 
 @admin.register(FavoriteRecipe)
 class FavoriteRecipeAdmin(admin.ModelAdmin):
@@ -53,6 +87,7 @@ class RecipeAdmin(admin.ModelAdmin):
         'name',
         'author',
         'in_favorite_count',
+        'carts_count',
     )
     list_filter = (
         'author__username',
@@ -61,16 +96,18 @@ class RecipeAdmin(admin.ModelAdmin):
     )
     readonly_fields = (
         'in_favorite_count',
+        'carts_count',
     )
 
     def in_favorite_count(self, obj):
         """
-        Возвращаем расчет кол-ва добавлений
-        в избранное рецепта.
+        Возвращаем кол-во добавлений в избранное рецепта
+        из счетчика, без запроса на каждую строку.
         """
-        return obj.in_favorite.count()
+        return obj.favorites_count
 
     in_favorite_count.short_description = 'Добавлений в избранное'
+    in_favorite_count.admin_order_field = 'favorites_count'
 
 
 @admin.register(RecipeIngredientAmount)
@@ -86,6 +123,48 @@ class RecipeIngredientAmountAdmin(admin.ModelAdmin):
         'amount',
     )
 
+    def save_model(self, request, obj, form, change):
+        """
+        Ингредиенты рецепта из админки тоже меняют списки
+        покупок, где лежит рецепт: пересчитываем их по прежнему
+        и новому рецепту строки.
+        """
+        recipe_ids = {obj.recipe_id}
+        if change:
+            recipe_ids.add(
+                RecipeIngredientAmount.objects.get(pk=obj.pk).recipe_id
+            )
+        with recipes_shopping_cart_totals_updated(recipe_ids):
+            super().save_model(request, obj, form, change)
+
+    def delete_model(self, request, obj):
+        with recipes_shopping_cart_totals_updated({obj.recipe_id}):
+            super().delete_model(request, obj)
+
+    @transaction.atomic
+    def delete_queryset(self, request, queryset):
+        with recipes_shopping_cart_totals_updated(
+            queryset.values_list('recipe', flat=True)
+        ):
+            super().delete_queryset(request, queryset)
+
+
+@admin.register(ShoppingCartIngredient)
+class ShoppingCartIngredientAdmin(admin.ModelAdmin):
+    """
+    Настройка админки для предрасчитанных
+    сумм ингредиентов в списках покупок.
+    """
+
+    list_display = (
+        'user',
+        'ingredient',
+        'amount',
+    )
+    list_filter = (
+        'user',
+    )
+
 
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
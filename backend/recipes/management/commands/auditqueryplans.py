@@ -0,0 +1,84 @@
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+
+from benchmarks.database import benchmark_database
+from benchmarks.explain import AuditError, audit_query_plans, get_audit_context
+from benchmarks.seed import DEFAULT_SCALE, seed_dataset
+
+
+class Command(BaseCommand):
+    """
+    Команда аудита планов горячих запросов API. Заполняет
+    временную тестовую БД синтетическими данными, выполняет
+    EXPLAIN для канонических запросов и завершается ошибкой,
+    если крупная таблица читается последовательным сканированием.
+    С --current-db проверяет планы на подключенной БД без заполнения.
+    """
+
+    help = 'Проверяет планы горячих запросов на последовательное сканирование'
+
+    def add_arguments(self, parser):
+        for name, value in DEFAULT_SCALE.items():
+            parser.add_argument(
+                f'--{name.replace("_", "-")}',
+                type=int,
+                default=value,
+                help=f'Масштаб данных: {name}',
+            )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Зерно генератора синтетических данных',
+        )
+        parser.add_argument(
+            '--min-rows', type=int, default=1000,
+            help='Минимальный размер таблицы для учета сканирования',
+        )
+        parser.add_argument(
+            '--current-db', action='store_true',
+            help='Проверить планы на подключенной БД без заполнения',
+        )
+        parser.add_argument(
+            '--verbose-plans', action='store_true',
+            help='Вывести планы всех запросов',
+        )
+
+    def audit(self, options):
+        """Обновляем статистику планировщика и строим планы."""
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        return audit_query_plans(get_audit_context(), options['min_rows'])
+
+    def run(self, options):
+        if options['current_db']:
+            return self.audit(options)
+        with benchmark_database():
+            seed_dataset(
+                {name: options[name] for name in DEFAULT_SCALE},
+                options['seed'],
+            )
+            return self.audit(options)
+
+    def handle(self, *args, **options):
+        try:
+            plans = self.run(options)
+        except AuditError as error:
+            raise CommandError(error)
+        flagged = []
+        for plan in plans:
+            if plan.seq_scans:
+                flagged.append(
+                    f'{plan.name}: {", ".join(plan.seq_scans)}'
+                )
+            self.stdout.write(
+                f'{plan.name}: '
+                + ('сканирование ' + ', '.join(plan.seq_scans)
+                   if plan.seq_scans else 'индексы')
+            )
+            if options['verbose_plans'] or plan.seq_scans:
+                self.stdout.write(f'  {plan.sql}\n  {plan.plan}')
+        if flagged:
+            raise CommandError(
+                'Последовательное сканирование в запросах:\n'
+                + '\n'.join(flagged)
+            )
+        self.stdout.write('Последовательных сканирований не найдено.')
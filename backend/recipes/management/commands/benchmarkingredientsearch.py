@@ -0,0 +1,119 @@
+import json
+import os
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from benchmarks.runner import percentile
+from core.ingredient_search import IngredientSearchIndex
+
+
+class Command(BaseCommand):
+    """
+    Команда для замера скорости поиска ингредиентов
+    по индексу в памяти на корпусе ingredients.json
+    в сравнении с линейным перебором названий.
+    """
+
+    help = 'Замеряет скорость поиска ингредиентов по ingredients.json'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=2000,
+            help='Количество поисковых запросов',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Зерно генератора случайных запросов',
+        )
+
+    @staticmethod
+    def get_queries(names, count, seed):
+        """
+        Генерируем запросы автодополнения: начала названий
+        и подстроки из середины длиной от 1 до 6 символов.
+        """
+        generator = random.Random(seed)
+        queries = []
+        for _ in range(count):
+            name = generator.choice(names)
+            length = generator.randint(1, min(6, len(name)))
+            start = (
+                0 if generator.random() < 0.5
+                else generator.randint(0, len(name) - length)
+            )
+            queries.append(name[start:start + length])
+        return queries
+
+    @staticmethod
+    def linear_search(names, query):
+        """Эталонный поиск перебором всех названий."""
+        prefix_ids = [
+            index for index, name in enumerate(names)
+            if name.startswith(query)
+        ]
+        substring_ids = {
+            index for index, name in enumerate(names) if query in name
+        }
+        return prefix_ids, substring_ids
+
+    @staticmethod
+    def measure(search, queries):
+        """Замеряем время каждого запроса в микросекундах."""
+        timings = []
+        results = []
+        for query in queries:
+            started = time.perf_counter()
+            results.append(search(query))
+            timings.append((time.perf_counter() - started) * 1_000_000)
+        return timings, results
+
+    def report(self, title, timings):
+        """Выводим среднее, медиану и 95-й перцентиль."""
+        self.stdout.write(
+            f'{title}: среднее {statistics.mean(timings):.1f} мкс, '
+            f'медиана {statistics.median(timings):.1f} мкс, '
+            f'p95 {percentile(timings, 95):.1f} мкс'
+        )
+
+    def handle(self, *args, **options):
+        with open(
+            os.path.join(settings.BASE_DIR, 'data', 'ingredients.json')
+        ) as file:
+            names = [
+                ingredient['name'].lower() for ingredient in json.load(file)
+            ]
+        started = time.perf_counter()
+        index = IngredientSearchIndex(enumerate(names))
+        self.stdout.write(
+            f'Индекс по {len(names)} названиям построен за '
+            f'{(time.perf_counter() - started) * 1000:.1f} мс'
+        )
+        queries = self.get_queries(names, options['queries'], options['seed'])
+        index_timings, index_results = self.measure(index.search, queries)
+        linear_timings, linear_results = self.measure(
+            lambda query: self.linear_search(names, query), queries
+        )
+        mismatches = sum(
+            sorted(index_prefix) != linear_prefix
+            or set(index_substring) != linear_substring
+            for (index_prefix, index_substring), (
+                linear_prefix, linear_substring
+            ) in zip(index_results, linear_results)
+        )
+        self.report('Индекс', index_timings)
+        self.report('Перебор', linear_timings)
+        speedup = (
+            statistics.mean(linear_timings) / statistics.mean(index_timings)
+        )
+        self.stdout.write(
+            f'Ускорение: {speedup:.1f}x, '
+            f'расхождений в результатах: {mismatches}'
+        )
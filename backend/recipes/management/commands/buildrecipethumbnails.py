@@ -0,0 +1,37 @@
+from django.core.management import BaseCommand
+
+from core.images import build_recipe_image
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    """
+    Команда для обработки изображений рецептов и построения
+    миниатюр без очереди фоновых задач.
+    """
+
+    help = 'Обрабатывает изображения рецептов, которые еще не готовы'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Обработать изображения всех рецептов',
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.all()
+        if not options['all']:
+            recipes = recipes.exclude(image_status=Recipe.ImageStatus.READY)
+        built = failed = 0
+        for recipe_id in recipes.values_list('id', flat=True).iterator():
+            try:
+                build_recipe_image(recipe_id)
+            except Exception as error:
+                failed += 1
+                self.stderr.write(f'Рецепт {recipe_id}: {error}')
+                continue
+            built += 1
+        self.stdout.write(
+            f'Изображения обработаны: {built}, с ошибками: {failed}.'
+        )
@@ -0,0 +1,23 @@
+from django.core.management import BaseCommand
+
+from core.similar_recipes import build_similar_recipes
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    """
+    Команда для предрасчета похожих рецептов по наборам
+    ингредиентов без очереди фоновых задач.
+    """
+
+    help = 'Пересчитывает списки похожих рецептов всех рецептов'
+
+    def handle(self, *args, **options):
+        recipe_ids = list(
+            Recipe.objects.order_by('id').values_list('id', flat=True)
+        )
+        written = build_similar_recipes(*recipe_ids)
+        self.stdout.write(
+            f'Похожие рецепты пересчитаны: рецептов {len(recipe_ids)}, '
+            f'записей {written}.'
+        )
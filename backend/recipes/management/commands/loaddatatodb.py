@@ -1,13 +1,146 @@
-import json
 import os
 
 from django.conf import settings
-from django.core.management import BaseCommand
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
 
+from core.catalog_cache import ingredients_catalog, tags_catalog
+from core.constants import LOADER_BATCH_SIZE
+from core.loaders import iter_batches, iter_records
 from recipes.models import Ingredient, Tag
 
 
-class LoadIngredientsToDb(BaseCommand):
+class BaseLoadToDb(BaseCommand):
+    """
+    Базовая команда потоковой загрузки справочника в БД.
+    Записи читаются из JSON или CSV файла, проверяются на
+    ограничения БД и пачками записываются через
+    bulk_create с игнорированием уже существующих строк,
+    поэтому повторный запуск ничего не дублирует. Если задан
+    lookup_field, у существующих строк обновляются update_fields.
+    """
+
+    model = None
+    filename = None
+    fields = ()
+    lookup_field = None
+    update_fields = ()
+    catalog = None
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=os.path.join(settings.BASE_DIR, 'data', self.filename),
+            help='Путь к JSON или CSV файлу с данными',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=LOADER_BATCH_SIZE,
+            help='Количество записей в одной пачке',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Проверить данные и откатить изменения',
+        )
+
+    def validate_record(self, record):
+        """
+        Проверяем запись: все поля заполнены и укладываются
+        в ограничения БД. Возвращаем список ошибок.
+        """
+        errors = []
+        for field_name in self.fields:
+            value = record.get(field_name)
+            if not isinstance(value, str) or not value.strip():
+                errors.append(f'поле {field_name} не заполнено')
+                continue
+            max_length = self.model._meta.get_field(field_name).max_length
+            if max_length and len(value) > max_length:
+                errors.append(
+                    f'поле {field_name} длиннее {max_length} символов'
+                )
+        return errors
+
+    def build_objects(self, records, first_number):
+        """
+        Собираем экземпляры модели из пачки записей.
+        Некорректные записи пропускаем и выводим номер
+        записи с ошибками.
+        """
+        objects = []
+        for number, record in enumerate(records, first_number):
+            errors = self.validate_record(record)
+            if errors:
+                self.stderr.write(f'Запись {number}: {", ".join(errors)}.')
+                continue
+            objects.append(self.model(
+                **{field_name: record[field_name]
+                   for field_name in self.fields}
+            ))
+        return objects
+
+    def upsert(self, objects, batch_size):
+        """
+        Обновляем существующие по lookup_field строки и
+        вставляем новые одним bulk_create на пачку.
+        """
+        if self.lookup_field:
+            existing = self.model.objects.in_bulk(
+                [getattr(obj, self.lookup_field) for obj in objects],
+                field_name=self.lookup_field,
+            )
+            to_update = []
+            for obj in objects:
+                current = existing.get(getattr(obj, self.lookup_field))
+                if current is not None:
+                    obj.pk = current.pk
+                    to_update.append(obj)
+            self.model.objects.bulk_update(
+                to_update, self.update_fields, batch_size=batch_size
+            )
+            objects = [obj for obj in objects if obj.pk is None]
+        self.model.objects.bulk_create(
+            objects, batch_size=batch_size, ignore_conflicts=True
+        )
+
+    def load(self, path, batch_size, dry_run):
+        """Загружаем файл в одной транзакции и выводим прогресс."""
+        if batch_size < 1:
+            raise CommandError('Размер пачки должен быть больше нуля!')
+        processed = skipped = 0
+        with transaction.atomic():
+            count_before = self.model.objects.count()
+            try:
+                for batch in iter_batches(iter_records(path), batch_size):
+                    objects = self.build_objects(batch, processed + 1)
+                    self.upsert(objects, batch_size)
+                    processed += len(batch)
+                    skipped += len(batch) - len(objects)
+                    self.stdout.write(f'{self.filename}: обработано '
+                                      f'{processed} записей...')
+            except (OSError, ValueError) as error:
+                raise CommandError(f'Ошибка чтения {path}: {error}')
+            created = self.model.objects.count() - count_before
+            if dry_run:
+                transaction.set_rollback(True)
+        if not dry_run:
+            transaction.on_commit(self.catalog.invalidate)
+        self.stdout.write(
+            f'Загрузка данных из {self.filename} '
+            f'{"проверена" if dry_run else "завершена"}! '
+            f'Обработано: {processed}, новых: {created}, '
+            f'пропущено с ошибками: {skipped}.'
+        )
+
+    def handle(self, *args, **options):
+        self.load(
+            options['path'], options['batch_size'], options['dry_run']
+        )
+
+
+class LoadIngredientsToDb(BaseLoadToDb):
     """
     Команда для загрузки ингредиентов из файла
     ingredients.json в таблицу ингредиентов в
@@ -15,40 +148,25 @@ class LoadIngredientsToDb(BaseCommand):
     """
 
     help = 'Загружает ингредиенты из ingredients.json в БД'
+    model = Ingredient
+    filename = 'ingredients.json'
+    fields = ('name', 'measurement_unit')
+    catalog = ingredients_catalog
 
-    def handle(self, *args, **options):
-        with open(
-            os.path.join(settings.BASE_DIR, 'data', 'ingredients.json')
-        ) as file:
-            ingredients_data = json.load(file)
-            for ingredient_in_data in ingredients_data:
-                model = Ingredient()
-                model.name = ingredient_in_data['name']
-                model.measurement_unit = ingredient_in_data['measurement_unit']
-                model.save()
-            self.stdout.write('Загрузка данных из ingredients.json завершена!')
-
-
-class LoadTagsToDb(BaseCommand):
+
+class LoadTagsToDb(BaseLoadToDb):
     """
     Команда для загрузки тегов из файла tags.json
-    в таблицу ингредиентов в базе данных.
+    в таблицу тегов в базе данных.
     """
 
     help = 'Загружает теги из tags.json в БД'
-
-    def handle(self, *args, **options):
-        with open(
-            os.path.join(settings.BASE_DIR, 'data', 'tags.json')
-        ) as file:
-            tags_data = json.load(file)
-            for tag_in_data in tags_data:
-                model = Tag()
-                model.name = tag_in_data['name']
-                model.color = tag_in_data['color']
-                model.slug = tag_in_data['slug']
-                model.save()
-            self.stdout.write('Загрузка данных из tags.json завершена!')
+    model = Tag
+    filename = 'tags.json'
+    fields = ('name', 'color', 'slug')
+    lookup_field = 'slug'
+    update_fields = ('name', 'color')
+    catalog = tags_catalog
 
 
 class Command(BaseCommand):
@@ -56,9 +174,41 @@ class Command(BaseCommand):
 
     help = 'Загружаем данные из ingredients.json и tags.json в БД'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ingredients',
+            default=os.path.join(
+                settings.BASE_DIR, 'data', LoadIngredientsToDb.filename
+            ),
+            help='Путь к JSON или CSV файлу с ингредиентами',
+        )
+        parser.add_argument(
+            '--tags',
+            default=os.path.join(
+                settings.BASE_DIR, 'data', LoadTagsToDb.filename
+            ),
+            help='Путь к JSON или CSV файлу с тегами',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=LOADER_BATCH_SIZE,
+            help='Количество записей в одной пачке',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Проверить данные и откатить изменения',
+        )
+
+    @transaction.atomic
     def handle(self, *args, **options):
-        load_ingredients = LoadIngredientsToDb()
-        load_tags = LoadTagsToDb()
-        load_ingredients.handle()
-        load_tags.handle()
-        self.stdout.write('Все данные загружены!')
+        for loader, path in (
+            (LoadIngredientsToDb, options['ingredients']),
+            (LoadTagsToDb, options['tags']),
+        ):
+            loader(stdout=self.stdout, stderr=self.stderr).load(
+                path, options['batch_size'], options['dry_run']
+            )
+        if not options['dry_run']:
+            self.stdout.write('Все данные загружены!')
@@ -0,0 +1,80 @@
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+
+from core.constants import SHOPPING_CART_REBUILD_BATCH_SIZE
+from core.shopping_cart import get_expected_shopping_cart_totals
+from recipes.models import ShoppingCartIngredient
+
+
+class Command(BaseCommand):
+    """
+    Команда для проверки и перестроения предрасчитанных
+    сумм ингредиентов в списках покупок.
+    """
+
+    help = (
+        'Сверяет таблицу сумм ингредиентов в списках покупок '
+        'с корзинами и перестраивает ее с нуля'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только найти расхождения, не перестраивая таблицу',
+        )
+
+    def get_drift(self, expected):
+        """
+        Сравниваем текущую таблицу с эталоном. Возвращаем
+        количество лишних, недостающих и неверных строк.
+        """
+        extra = mismatched = 0
+        found = set()
+        for total in ShoppingCartIngredient.objects.values_list(
+            'user_id', 'ingredient_id', 'amount'
+        ).iterator():
+            key = total[:2]
+            if key not in expected:
+                extra += 1
+                continue
+            found.add(key)
+            if expected[key] != total[2]:
+                mismatched += 1
+        return extra, len(expected.keys() - found), mismatched
+
+    @transaction.atomic
+    def rebuild(self, expected):
+        """Перезаписываем таблицу эталонными значениями."""
+        ShoppingCartIngredient.objects.all().delete()
+        ShoppingCartIngredient.objects.bulk_create(
+            (
+                ShoppingCartIngredient(
+                    user_id=user_id,
+                    ingredient_id=ingredient_id,
+                    amount=amount,
+                )
+                for (user_id, ingredient_id), amount in expected.items()
+            ),
+            batch_size=SHOPPING_CART_REBUILD_BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        expected = {
+            (row['user_id'], row['ingredient_id']): row['total_amount']
+            for row in get_expected_shopping_cart_totals().iterator()
+        }
+        extra, missing, mismatched = self.get_drift(expected)
+        self.stdout.write(
+            f'Лишних строк: {extra}, недостающих: {missing}, '
+            f'с неверной суммой: {mismatched}.'
+        )
+        if options['check']:
+            if extra or missing or mismatched:
+                raise CommandError('Обнаружены расхождения в списках покупок!')
+            self.stdout.write('Расхождений нет.')
+            return
+        self.rebuild(expected)
+        self.stdout.write(
+            f'Таблица перестроена, строк: {len(expected)}.'
+        )
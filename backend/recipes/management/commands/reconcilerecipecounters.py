@@ -0,0 +1,34 @@
+from django.core.management import BaseCommand, CommandError
+
+from core.recipe_relations import (get_recipes_with_counters_drift,
+                                   reconcile_recipe_counters)
+
+
+class Command(BaseCommand):
+    """
+    Команда для проверки и пересчета счетчиков добавлений
+    рецептов в избранное и корзину.
+    """
+
+    help = (
+        'Сверяет счетчики добавлений рецептов в избранное и корзину '
+        'с фактическими записями и пересчитывает их'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только найти расхождения, не пересчитывая счетчики',
+        )
+
+    def handle(self, *args, **options):
+        drift = get_recipes_with_counters_drift().count()
+        self.stdout.write(f'Рецептов с неверными счетчиками: {drift}.')
+        if options['check']:
+            if drift:
+                raise CommandError('Обнаружены расхождения в счетчиках!')
+            self.stdout.write('Расхождений нет.')
+            return
+        updated = reconcile_recipe_counters()
+        self.stdout.write(f'Счетчики пересчитаны, рецептов: {updated}.')
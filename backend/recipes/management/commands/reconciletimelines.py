@@ -0,0 +1,19 @@
+from django.core.management import BaseCommand
+
+from core.timeline import reconcile_timelines
+
+
+class Command(BaseCommand):
+    """
+    Команда для пересчета счетчиков подписчиков и лент
+    рецептов из подписок.
+    """
+
+    help = (
+        'Пересчитывает счетчики подписчиков авторов и раскладывает '
+        'рецепты по лентам подписчиков'
+    )
+
+    def handle(self, *args, **options):
+        added = reconcile_timelines()
+        self.stdout.write(f'Ленты пересчитаны, добавлено записей: {added}.')
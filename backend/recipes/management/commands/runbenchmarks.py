@@ -0,0 +1,100 @@
+import json
+
+from django.core.management import BaseCommand, CommandError
+
+from benchmarks.compare import compare_results
+from benchmarks.database import benchmark_database
+from benchmarks.runner import BenchmarkError, run_benchmarks
+from benchmarks.seed import DEFAULT_SCALE
+
+
+class Command(BaseCommand):
+    """
+    Команда нагрузочного прогона API. Создает отдельную
+    тестовую БД, заполняет ее синтетическими данными,
+    прогоняет сценарии по всем маршрутам api и сохраняет
+    перцентили задержек и количество SQL запросов в JSON.
+    С --baseline сравнивает результат с сохраненным
+    прогоном и завершается ошибкой при регрессии.
+    """
+
+    help = 'Прогоняет бенчмарки API на синтетических данных'
+
+    def add_arguments(self, parser):
+        for name, value in DEFAULT_SCALE.items():
+            parser.add_argument(
+                f'--{name.replace("_", "-")}',
+                type=int,
+                default=value,
+                help=f'Масштаб данных: {name}',
+            )
+        parser.add_argument(
+            '--iterations', type=int, default=20,
+            help='Количество замеряемых проходов сценариев',
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=2,
+            help='Количество прогревочных проходов без замеров',
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Зерно генератора синтетических данных',
+        )
+        parser.add_argument(
+            '--output', default='benchmark.json',
+            help='Файл для сохранения результатов',
+        )
+        parser.add_argument(
+            '--baseline',
+            help='Файл с результатами для сравнения',
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help='Допустимый относительный рост p95',
+        )
+        parser.add_argument(
+            '--min-delta-ms', type=float, default=5.0,
+            help='Рост p95 в мс, который не считается регрессией',
+        )
+
+    def run(self, scale, options):
+        """Прогоняем сценарии на временной тестовой БД."""
+        with benchmark_database():
+            return run_benchmarks(
+                scale,
+                options['iterations'],
+                options['warmup'],
+                options['seed'],
+            )
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('Количество проходов должно быть больше нуля!')
+        scale = {name: options[name] for name in DEFAULT_SCALE}
+        try:
+            results = self.run(scale, options)
+        except BenchmarkError as error:
+            raise CommandError(error)
+        with open(options['output'], 'w', encoding='utf-8') as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+        for key, result in results['results'].items():
+            self.stdout.write(
+                f'{key}: p50 {result["p50_ms"]} мс, '
+                f'p95 {result["p95_ms"]} мс, '
+                f'SQL {result["queries_max"]}'
+            )
+        for route in results['meta']['not_covered_routes']:
+            self.stdout.write(f'Маршрут не покрыт сценариями: {route}')
+        self.stdout.write(f'Результаты сохранены в {options["output"]}.')
+        if not options['baseline']:
+            return
+        with open(options['baseline'], encoding='utf-8') as file:
+            baseline = json.load(file)
+        regressions = compare_results(
+            results, baseline, options['tolerance'], options['min_delta_ms']
+        )
+        if regressions:
+            raise CommandError(
+                'Обнаружены регрессии:\n' + '\n'.join(regressions)
+            )
+        self.stdout.write('Регрессий относительно базовой линии нет.')
@@ -0,0 +1,73 @@
+import json
+
+from django.core.management import BaseCommand, CommandError
+
+from benchmarks.concurrency import run_concurrency_benchmark
+
+
+class Command(BaseCommand):
+    """
+    Команда замера пропускной способности запущенного сервера
+    при одновременных медленных клиентах. Запускается против
+    backend без nginx отдельно для SERVER_MODE=wsgi и asgi,
+    результаты сравниваются по rps и перцентилям задержек.
+    """
+
+    help = 'Замеряет пропускную способность сервера с медленными клиентами'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url', default='http://localhost:8000',
+            help='Адрес запущенного backend',
+        )
+        parser.add_argument(
+            '--path', action='append',
+            help='Путь замеряемого маршрута, можно указать несколько',
+        )
+        parser.add_argument(
+            '--clients', type=int, default=20,
+            help='Количество клиентов, шлющих запросы без пауз',
+        )
+        parser.add_argument(
+            '--slow-clients', type=int, default=50,
+            help='Количество медленных клиентов',
+        )
+        parser.add_argument(
+            '--slow-delay', type=float, default=1.0,
+            help='Пауза медленного клиента между заголовками, секунды',
+        )
+        parser.add_argument(
+            '--duration', type=float, default=30.0,
+            help='Длительность замера одного маршрута, секунды',
+        )
+        parser.add_argument('--token', help='Токен для авторизации')
+        parser.add_argument('--output', help='Файл для сохранения JSON')
+
+    def handle(self, *args, **options):
+        if options['clients'] < 1 or options['duration'] <= 0:
+            raise CommandError(
+                'Количество клиентов и длительность должны быть больше нуля!'
+            )
+        results = []
+        for path in options['path'] or (
+            '/api/recipes/?limit=6',
+            '/api/ingredients/?name=%D0%BC',
+        ):
+            result = run_concurrency_benchmark(
+                options['url'],
+                path,
+                options['clients'],
+                options['slow_clients'],
+                options['slow_delay'],
+                options['duration'],
+                options['token'],
+            )
+            results.append(result)
+            self.stdout.write(
+                f'{result["url"]}: {result["rps"]} rps, '
+                f'p95 {result.get("p95_ms", "-")} мс, '
+                f'ошибок {result["errors"]}'
+            )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management import BaseCommand
+
+from core.constants import RUNTASKS_BATCH_SIZE
+from core.tasks import run_pending_tasks
+
+
+class Command(BaseCommand):
+    """
+    Команда-исполнитель очереди фоновых задач в БД.
+    Нужна в режиме BACKGROUND_TASKS_MODE=queue, а в режиме
+    thread подбирает отложенные и зависшие задачи.
+    """
+
+    help = 'Выполняет фоновые задачи из очереди в БД'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить накопившиеся задачи и завершиться',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=1,
+            help='Пауза между опросами пустой очереди в секундах',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            processed = run_pending_tasks(RUNTASKS_BATCH_SIZE)
+            if processed:
+                self.stdout.write(f'Обработано задач: {processed}.')
+                continue
+            if options['once']:
+                return
+            time.sleep(options['sleep'])
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+from core.migration_operations import PostgreSQLRunSQL
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_shoppingcartingredient'),
+    ]
+
+    operations = [
+        PostgreSQLRunSQL(
+            'CREATE EXTENSION IF NOT EXISTS pg_trgm;',
+            migrations.RunSQL.noop,
+        ),
+        PostgreSQLRunSQL(
+            'CREATE INDEX IF NOT EXISTS recipes_ingredient_name_trgm '
+            'ON recipes_ingredient USING gin (UPPER(name::text) '
+            'gin_trgm_ops);',
+            'DROP INDEX IF EXISTS recipes_ingredient_name_trgm;',
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 3.2 on 2026-10-18 06:21
+
+from django.db import migrations, models
+
+
+def mark_processed_images_ready(apps, schema_editor):
+    """Помечаем готовыми изображения, для которых уже есть миниатюры."""
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Recipe.objects.exclude(image_thumbnails={}).update(image_status='ready')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_recipe_image_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_status',
+            field=models.CharField(choices=[('pending', 'Ожидает обработки'), ('processing', 'Обрабатывается'), ('ready', 'Готово'), ('failed', 'Ошибка обработки')], default='pending', editable=False, max_length=16, verbose_name='Статус обработки картинки'),
+        ),
+        migrations.RunPython(
+            mark_processed_images_ready, migrations.RunPython.noop
+        ),
+    ]
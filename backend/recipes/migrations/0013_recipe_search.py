@@ -0,0 +1,76 @@
+from django.db import migrations
+
+from core.migration_operations import PostgreSQLRunSQL, SQLiteRunSQL
+from core.sqlite_fts import SQLITE_FTS_REBUILD, SQLITE_FTS_TRIGGERS
+
+# Вес названия выше веса описания: совпадение в названии
+# поднимает рецепт в выдаче.
+POSTGRESQL_SEARCH_VECTOR = (
+    "setweight(to_tsvector('pg_catalog.russian', "
+    "coalesce({table}.name, '')), 'A') || "
+    "setweight(to_tsvector('pg_catalog.russian', "
+    "coalesce({table}.text, '')), 'B')"
+)
+
+
+class Migration(migrations.Migration):
+    """
+    Полнотекстовый поиск рецептов. В PostgreSQL - колонка
+    tsvector с русским стеммингом, которую заполняет триггер,
+    и GIN индекс по ней. В SQLite - внешняя таблица FTS5 над
+    recipes_recipe, синхронизируемая триггерами. Колонка и
+    таблица не описаны в модели, чтобы не читать их вместе
+    с рецептами. SQLite пересоздает таблицу при изменении
+    колонок и теряет триггеры: их восстанавливает обработчик
+    post_migrate приложения recipes.
+    """
+
+    dependencies = [
+        ('recipes', '0012_hot_filter_indexes'),
+    ]
+
+    operations = [
+        PostgreSQLRunSQL(
+            [
+                'ALTER TABLE recipes_recipe ADD COLUMN search_vector '
+                'tsvector;',
+                'CREATE FUNCTION recipes_recipe_search_vector_update() '
+                'RETURNS trigger AS $$ BEGIN NEW.search_vector := '
+                + POSTGRESQL_SEARCH_VECTOR.format(table='NEW')
+                + '; RETURN NEW; END $$ LANGUAGE plpgsql;',
+                'CREATE TRIGGER recipes_recipe_search_vector_trigger '
+                'BEFORE INSERT OR UPDATE OF name, text ON recipes_recipe '
+                'FOR EACH ROW EXECUTE PROCEDURE '
+                'recipes_recipe_search_vector_update();',
+                'UPDATE recipes_recipe SET search_vector = '
+                + POSTGRESQL_SEARCH_VECTOR.format(table='recipes_recipe')
+                + ';',
+                'CREATE INDEX recipes_recipe_search_vector_idx '
+                'ON recipes_recipe USING gin (search_vector) '
+                'WITH (fastupdate = off);',
+            ],
+            [
+                'DROP TRIGGER IF EXISTS recipes_recipe_search_vector_trigger '
+                'ON recipes_recipe;',
+                'DROP FUNCTION IF EXISTS '
+                'recipes_recipe_search_vector_update();',
+                'ALTER TABLE recipes_recipe DROP COLUMN IF EXISTS '
+                'search_vector;',
+            ],
+        ),
+        SQLiteRunSQL(
+            [
+                'CREATE VIRTUAL TABLE recipes_recipe_fts USING fts5('
+                "name, text, content='recipes_recipe', "
+                "content_rowid='id');",
+                *SQLITE_FTS_TRIGGERS.values(),
+                SQLITE_FTS_REBUILD,
+            ],
+            [
+                'DROP TRIGGER IF EXISTS recipes_recipe_fts_update;',
+                'DROP TRIGGER IF EXISTS recipes_recipe_fts_delete;',
+                'DROP TRIGGER IF EXISTS recipes_recipe_fts_insert;',
+                'DROP TABLE IF EXISTS recipes_recipe_fts;',
+            ],
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2 on 2026-10-18 07:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0015_similarrecipe'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='recipe',
+            name='recipe_favorites_count_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='recipe',
+            name='recipe_carts_count_idx',
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['favorites_count', 'id'], name='recipe_favorites_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['carts_count', 'id'], name='recipe_carts_count_idx'),
+        ),
+    ]
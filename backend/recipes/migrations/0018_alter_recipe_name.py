@@ -0,0 +1,19 @@
+# Generated by Django 3.2 on 2026-10-18 07:32
+
+import core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0017_timeline_index_recipe'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='name',
+            field=models.CharField(help_text='Придумайте название рецепта', max_length=200, validators=[core.validators.MinTwoCharValidator(2)], verbose_name='Название'),
+        ),
+    ]
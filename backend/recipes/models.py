@@ -99,6 +99,12 @@ class Ingredient(models.Model):
 class Recipe(models.Model):
     """Модель рецепта."""
 
+    class ImageStatus(models.TextChoices):
+        PENDING = 'pending', 'Ожидает обработки'
+        PROCESSING = 'processing', 'Обрабатывается'
+        READY = 'ready', 'Готово'
+        FAILED = 'failed', 'Ошибка обработки'
+
     author = models.ForeignKey(
         User,
         verbose_name='Автор рецепта',
@@ -117,6 +123,18 @@ class Recipe(models.Model):
         verbose_name='Картинка',
         upload_to='recipes/images/',
     )
+    image_thumbnails = models.JSONField(
+        verbose_name='Миниатюры картинки',
+        default=dict,
+        editable=False,
+    )
+    image_status = models.CharField(
+        verbose_name='Статус обработки картинки',
+        max_length=16,
+        choices=ImageStatus.choices,
+        default=ImageStatus.PENDING,
+        editable=False,
+    )
     text = models.TextField(
         verbose_name='Описание',
         help_text='Опишите рецепт',
@@ -148,11 +166,47 @@ class Recipe(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True,
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+    )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='Добавлений в избранное',
+        default=0,
+        editable=False,
+    )
+    carts_count = models.PositiveIntegerField(
+        verbose_name='Добавлений в корзину',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         ordering = ('pub_date', 'name',)
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = (
+            models.Index(
+                fields=('pub_date', 'name'),
+                name='recipe_pub_date_name_idx',
+            ),
+            models.Index(
+                fields=('favorites_count', 'id'),
+                name='recipe_favorites_count_idx',
+            ),
+            models.Index(
+                fields=('carts_count', 'id'),
+                name='recipe_carts_count_idx',
+            ),
+            models.Index(
+                fields=('updated_at',),
+                name='recipe_updated_at_idx',
+            ),
+            models.Index(
+                fields=('author', 'pub_date', 'name'),
+                name='recipe_author_pub_date_idx',
+            ),
+        )
 
     def __str__(self):
         """Возвращаем читаемую связку для админки."""
@@ -241,6 +295,13 @@ class FavoriteRecipe(models.Model):
                 name='unique_fevorite_user_recipe',
             ),
         )
+        indexes = (
+            models.Index(
+                fields=('user', 'add_to_favorite_date'),
+                include=('recipe',),
+                name='favorite_user_date_idx',
+            ),
+        )
 
     def __str__(self):
         """Возвращаем читаемую связку для админки."""
@@ -284,7 +345,164 @@ class Cart(models.Model):
                 name='unique_cart_user_recipe',
             ),
         )
+        indexes = (
+            models.Index(
+                fields=('user', 'add_to_shopping_cart_date'),
+                include=('recipe',),
+                name='cart_user_date_idx',
+            ),
+        )
 
     def __str__(self):
         """Возвращаем читаемую связку для админки."""
         return f'{self.recipe.name} в корзине у {self.user.username}'
+
+
+class TimelineEntry(models.Model):
+    """
+    Запись ленты рецептов из подписок юзера. Записи
+    раскладываются по лентам подписчиков при публикации
+    рецепта, автор и дата публикации дублируются для
+    сортировки и очистки ленты без JOIN.
+    """
+
+    user = models.ForeignKey(
+        User,
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        db_index=False,
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        verbose_name='Рецепт',
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+    )
+    author = models.ForeignKey(
+        User,
+        verbose_name='Автор рецепта',
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        ordering = ('-pub_date',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=[
+                    'user',
+                    'recipe',
+                ],
+                name='unique_timeline_user_recipe',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-recipe'),
+                name='timeline_user_pub_date_idx',
+            ),
+            models.Index(
+                fields=('user', 'author'),
+                name='timeline_user_author_idx',
+            ),
+        )
+
+    def __str__(self):
+        """Возвращаем читаемую связку для админки."""
+        return f'{self.recipe.name} в ленте {self.user.username}'
+
+
+class SimilarRecipe(models.Model):
+    """
+    Предрасчитанный похожий рецепт. Похожесть - косинусная
+    мера наборов ингредиентов, для каждого рецепта хранится
+    SIMILAR_RECIPES_LIMIT ближайших.
+    """
+
+    recipe = models.ForeignKey(
+        Recipe,
+        verbose_name='Рецепт',
+        on_delete=models.CASCADE,
+        related_name='similar_recipes',
+        db_index=False,
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        verbose_name='Похожий рецепт',
+        on_delete=models.CASCADE,
+        related_name='similar_to_recipes',
+    )
+    score = models.FloatField(verbose_name='Похожесть')
+
+    class Meta:
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+        ordering = ('recipe', '-score')
+        constraints = (
+            models.UniqueConstraint(
+                fields=[
+                    'recipe',
+                    'similar',
+                ],
+                name='unique_similar_recipe',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('recipe', '-score'),
+                name='similar_recipe_score_idx',
+            ),
+        )
+
+    def __str__(self):
+        """Возвращаем читаемую связку для админки."""
+        return f'{self.similar.name} похож на {self.recipe.name}'
+
+
+class ShoppingCartIngredient(models.Model):
+    """
+    Предрасчитанная сумма ингредиента в корзине пользователя.
+    Поддерживается инкрементально при добавлении/удалении
+    рецептов из корзины и при изменении ингредиентов рецепта.
+    """
+
+    user = models.ForeignKey(
+        User,
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE,
+        related_name='shopping_cart_ingredients',
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        verbose_name='Ингредиент',
+        on_delete=models.CASCADE,
+        related_name='in_shopping_cart_totals',
+    )
+    amount = models.PositiveIntegerField(
+        verbose_name='Суммарное количество',
+    )
+
+    class Meta:
+        verbose_name = 'Ингредиент в списке покупок'
+        verbose_name_plural = 'Ингредиенты в списках покупок'
+        ordering = ('user', 'ingredient',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=[
+                    'user',
+                    'ingredient',
+                ],
+                name='unique_shopping_cart_user_ingredient',
+            ),
+        )
+
+    def __str__(self):
+        """Возвращаем читаемую связку для админки."""
+        return (
+            f'{self.ingredient.name} - {self.amount} '
+            f'в списке покупок у {self.user.username}'
+        )
@@ -0,0 +1,107 @@
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.db.models.signals import (post_delete, post_migrate, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.catalog_cache import ingredients_catalog, tags_catalog
+from core.recipe_fragments import RECIPE_AUTHOR_FIELDS
+from core.recipe_relations import remove_user_from_recipe_counters
+from core.shopping_cart import remove_recipe_from_shopping_cart_totals
+from core.similar_recipes import build_similar_recipes
+from core.sqlite_fts import restore_sqlite_fts_triggers
+from core.tasks import enqueue
+from core.timeline import remove_user_from_subscribers_counts
+from recipes.models import Ingredient, Recipe, SimilarRecipe, Tag
+
+User = get_user_model()
+
+
+@receiver(pre_delete, sender=Recipe)
+def remove_deleted_recipe_from_shopping_cart_totals(sender, instance,
+                                                    **kwargs):
+    """
+    Перед удалением рецепта вычитаем его ингредиенты из
+    списков покупок. Записи корзины удаляются каскадно и
+    не проходят через сервисные функции.
+    """
+    remove_recipe_from_shopping_cart_totals(recipe_id=instance.id)
+
+
+@receiver(pre_delete, sender=Recipe)
+def rebuild_similar_recipes_of_deleted_recipe(sender, instance, **kwargs):
+    """
+    Перед удалением рецепта ставим в очередь пересчет списков
+    похожих, в которые он входит: его строки удаляются
+    каскадно, и списки соседей становятся короче.
+    """
+    recipe_ids = list(SimilarRecipe.objects.filter(
+        similar=instance
+    ).values_list('recipe_id', flat=True))
+    if recipe_ids:
+        enqueue(build_similar_recipes, *recipe_ids)
+
+
+@receiver(pre_delete, sender=User)
+def remove_deleted_user_from_recipe_counters(sender, instance, **kwargs):
+    """
+    Перед удалением пользователя уменьшаем счетчики рецептов
+    в его избранном и корзине. Записи удаляются каскадно и
+    не проходят через сервисные функции.
+    """
+    remove_user_from_recipe_counters(user_id=instance.id)
+
+
+@receiver(pre_delete, sender=User)
+def remove_deleted_user_from_subscribers_counts(sender, instance, **kwargs):
+    """
+    Перед удалением пользователя уменьшаем счетчики подписчиков
+    авторов, на которых он подписан. Подписки удаляются каскадно
+    и не проходят через сервисные функции.
+    """
+    remove_user_from_subscribers_counts(user_id=instance.id)
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredients_catalog(sender, **kwargs):
+    """
+    Сбрасываем кеш справочника ингредиентов, вместе с ним
+    перестраивается и поисковый индекс ингредиентов.
+    """
+    ingredients_catalog.invalidate()
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tags_catalog(sender, **kwargs):
+    """Сбрасываем кеш справочника тегов."""
+    tags_catalog.invalidate()
+
+
+@receiver(post_save, sender=User)
+def touch_author_recipes(sender, instance, created, update_fields, **kwargs):
+    """
+    После правки профиля автора обновляем updated_at его
+    рецептов: профиль выводится в рецепте, поэтому меняются
+    и кеш фрагментов, и ETag ответов. Сохранения только
+    служебных полей (например, last_login) пропускаем.
+    """
+    if created or (
+        update_fields is not None
+        and not set(update_fields) & set(RECIPE_AUTHOR_FIELDS)
+    ):
+        return
+    Recipe.objects.filter(author=instance).update(updated_at=timezone.now())
+
+
+@receiver(post_migrate)
+def restore_recipe_search_triggers(sender, using, **kwargs):
+    """
+    После миграций восстанавливаем триггеры поиска рецептов
+    в SQLite: при пересоздании recipes_recipe они удаляются
+    вместе со старой таблицей.
+    """
+    if sender.label == 'recipes':
+        restore_sqlite_fts_triggers(connections[using])
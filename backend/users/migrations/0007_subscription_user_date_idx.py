@@ -0,0 +1,17 @@
+# Generated by Django 3.2 on 2026-10-18 06:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_auto_20230530_2203'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['user', 'subscription_date'], include=('author',), name='subscription_user_date_idx'),
+        ),
+    ]
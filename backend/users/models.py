@@ -47,6 +47,11 @@ class User(AbstractUser):
         max_length=constants.MAX_NAME_USERNAME_PASSWORD_LENGHT,
         help_text='Введите пароль!'
     )
+    subscribers_count = models.PositiveIntegerField(
+        verbose_name='Количество подписчиков',
+        default=0,
+        editable=False,
+    )
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = (
         'username',
@@ -72,6 +77,31 @@ class User(AbstractUser):
         """Возвращаем читаемую связку в админке."""
         return self.username
 
+    def refresh_from_db(self, using=None, fields=None):
+        """
+        При обращении к отложенному полю подгружаем все
+        отложенные поля одним запросом, а не по запросу на поле.
+        """
+        deferred_fields = self.get_deferred_fields()
+        if fields is not None and set(fields) <= deferred_fields:
+            fields = deferred_fields
+        super().refresh_from_db(using=using, fields=fields)
+
+    def save(self, *args, **kwargs):
+        """
+        Счетчик подписчиков меняется только выражением F(),
+        поэтому при обновлении пользователя он не перезаписывается
+        прочитанным ранее значением.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name != 'subscribers_count'
+                and field.attname not in self.get_deferred_fields()
+            ]
+        super().save(*args, **kwargs)
+
 
 class Subscription(models.Model):
     """
@@ -113,6 +143,13 @@ class Subscription(models.Model):
                 name='no_self_subscription'
             ),
         )
+        indexes = (
+            models.Index(
+                fields=('user', 'subscription_date'),
+                include=('author',),
+                name='subscription_user_date_idx',
+            ),
+        )
 
     def __str__(self):
         """Возвращаем читаемую связку Подписки."""